@@ -0,0 +1,97 @@
+"""Admin API routes for the Ads Genius AI service.
+
+Admin routes are protected by the ``X-Admin-Token`` header and disabled
+entirely when ``ADMIN_TOKEN`` is not configured.
+"""
+
+import os
+import secrets
+from typing import Optional
+
+import structlog
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+
+from app.api.schemas import MemoryTracingRequest, ProfilerArmRequest
+from app.core.config import get_settings
+from app.core.memory_snapshot import memory_snapshot, python_heap, start_tracing, stop_tracing
+from app.core.profiling import get_profiler
+from app.core.queue import get_queue
+from app.core.thread_plan import available_cpus, cgroup_cpu_limit, get_thread_plan
+from app.services.model_service import get_model_service
+
+logger = structlog.get_logger(__name__)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Reject requests without a valid admin token."""
+    admin_token = get_settings().ADMIN_TOKEN
+    if not admin_token:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin endpoints are disabled")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/profiler")
+async def arm_profiler(request: ProfilerArmRequest) -> dict:
+    """Arm the profiler for the next requests and/or seconds."""
+    try:
+        return get_profiler().arm(requests=request.requests, seconds=request.seconds)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))  # noqa: B904
+
+
+@router.get("/profiler")
+async def get_profiler_status() -> dict:
+    """Get the profiler status."""
+    return get_profiler().status()
+
+
+@router.delete("/profiler")
+async def disarm_profiler() -> dict:
+    """Disarm the profiler and write the summary of the captured requests."""
+    return get_profiler().disarm()
+
+
+@router.get("/threads")
+async def get_thread_layout() -> dict:
+    """Get the thread plan applied to this worker and the live thread settings."""
+    plan = get_thread_plan()
+    torch_threads = {"torch_intra_op_threads": None, "torch_inter_op_threads": None}
+    # The fake backend runs without torch, and reporting its threads must not load it
+    if get_settings().INFERENCE_BACKEND != "fake":
+        import torch
+
+        torch_threads = {
+            "torch_intra_op_threads": torch.get_num_threads(),
+            "torch_inter_op_threads": torch.get_num_interop_threads(),
+        }
+    return {
+        "plan": plan.as_dict() if plan else None,
+        **torch_threads,
+        "cpu_count": os.cpu_count(),
+        "affinity": available_cpus(),
+        "cgroup_cpu_limit": cgroup_cpu_limit(),
+    }
+
+
+@router.get("/memory")
+def get_memory_snapshot(top: int = Query(default=10, ge=0, le=100)) -> dict:
+    """Get the RSS, Python heap, live tensors and cache sizes of this worker.
+
+    Walking the garbage collector's objects and taking a heap snapshot block for a while, so the route
+    is synchronous and runs in the threadpool rather than on the event loop.
+    """
+    return memory_snapshot(get_model_service(), get_queue(), top=top)
+
+
+@router.post("/memory/tracing")
+async def set_memory_tracing(request: MemoryTracingRequest) -> dict:
+    """Start or stop tracing Python allocations for the heap section of the memory snapshot."""
+    if request.enabled:
+        start_tracing(request.frames)
+    else:
+        stop_tracing()
+    return python_heap(top=0)
@@ -1,11 +1,21 @@
 """API routes for the Ads Genius AI service."""
 
+import asyncio
+import time
+
 import structlog
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Response, status
 
 from app.api.schemas import CompletionRequest, CompletionResponse
+from app.core.metrics import REQUESTS_CANCELLED_TOTAL, REQUESTS_REJECTED_TOTAL
+from app.core.profiling import get_profiler
 from app.core.queue import get_queue
-from app.services.model_service import LLMService
+from app.core.timing import StageTimings, maybe_trace
+from app.services.autotuner import get_autotuner
+from app.services.health_service import get_health_service
+from app.services.lora_adapters import UnknownAdapterError
+from app.services.memory_budget import MemoryBudgetExceededError
+from app.services.model_service import get_model_service
 
 logger = structlog.get_logger(__name__)
 router = APIRouter(
@@ -22,16 +32,17 @@ router = APIRouter(
     },
 )
 
-model_service = LLMService()
-
 
 @router.post("/complete", response_model=CompletionResponse)
-async def get_completion(request: CompletionRequest) -> CompletionResponse:
+async def get_completion(request: CompletionRequest, http_response: Response) -> CompletionResponse:
     """Get LLM completions for masked tokens in the input text."""
-    print(request)
+    timings = StageTimings()
     try:
-        logger.info("Processing completion request", text=request.text)
+        logger.debug("Processing completion request", text=request.text)
         queue = get_queue()
+        enqueued_at = time.perf_counter()
+
+        model_service = get_model_service()
 
         async def process_completion():
             return await model_service.get_completion(
@@ -42,15 +53,43 @@ async def get_completion(request: CompletionRequest) -> CompletionResponse:
                 top_k=request.top_k,
                 repetition_penalty=request.repetition_penalty,
                 tone=request.tone,
+                queue_wait_seconds=time.perf_counter() - enqueued_at,
+                timings=timings,
+                include_timings=request.include_timings,
+                adapter=request.adapter,
+                adaptive_max_new_tokens=request.adaptive_max_new_tokens is not False,
+                queue_depth=queue.waiting,
+                num_candidates=request.num_candidates or 1,
             )
 
-        async with queue.request(process_completion) as response:
-            logger.info("Completion successful", response=response.model_dump())
-            return response
+        with get_profiler().capture_request():
+            async with queue.request(process_completion) as response:
+                logger.info(
+                    "Completion successful",
+                    cached=response.metadata.cached,
+                    output_tokens=response.metadata.output_tokens,
+                    num_candidates=response.metadata.num_candidates,
+                    degradation_level=response.metadata.degradation_level,
+                    total_ms=round(timings.total() * 1000, 3),
+                )
+                http_response.headers["Server-Timing"] = timings.server_timing_header()
+                http_response.headers["X-Degradation-Level"] = str(response.metadata.degradation_level)
+                maybe_trace(timings, tone=request.tone, max_new_tokens=request.max_new_tokens)
+                return response
 
+    except asyncio.CancelledError:
+        REQUESTS_CANCELLED_TOTAL.inc()
+        raise
+    except MemoryBudgetExceededError as e:
+        REQUESTS_REJECTED_TOTAL.labels(reason="memory_budget").inc()
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))  # noqa: B904
+    except UnknownAdapterError as e:
+        REQUESTS_REJECTED_TOTAL.labels(reason="unknown_adapter").inc()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))  # noqa: B904
     except Exception as e:
         logger.error("Error processing completion request", error=str(e))
         if "Queue not initialized" in str(e):
+            REQUESTS_REJECTED_TOTAL.labels(reason="not_ready").inc()
             raise HTTPException(  # noqa: B904
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Service is starting up",
@@ -63,31 +102,47 @@ async def get_queue_status() -> dict:
     """Get current queue status."""
     try:
         queue = get_queue()
+        model_service = get_model_service()
+        memory_budget = model_service.memory_budget
         return {
             "active_requests": queue.current_requests,
-            "queued_requests": queue.queue.qsize(),
+            "queued_requests": queue.waiting,
             "max_parallel_requests": queue.max_parallel_requests,
+            "max_batch_size": model_service.batcher.max_batch_size,
+            "memory_budget": memory_budget.as_dict() if memory_budget is not None else None,
+            "degradation": model_service.degradation.status() if model_service.degradation is not None else None,
+            "autotuner": autotuner.status() if (autotuner := get_autotuner()) is not None else None,
         }
     except Exception as e:
         logger.error("Error getting queue status", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))  # noqa: B904
 
 
+@router.get("/health/live")
+async def liveness_check() -> dict:
+    """Liveness check endpoint, answering in constant time without touching the model."""
+    return {"status": "alive"}
+
+
 @router.get("/health")
 async def health_check() -> dict:
-    """Health check endpoint."""
+    """Health check endpoint reporting the cached result of the background canary inference."""
     try:
-        logger.info("Health check started")
-        # Simple inference to check if model is working
-        model_service.get_completion("The [MASK] is a test.")
         queue = get_queue()
-        return {
-            "status": "healthy",
-            "queue": {
-                "active_requests": queue.current_requests,
-                "queued_requests": queue.queue.qsize(),
-            },
-        }
+        health_service = get_health_service()
+        model_health = health_service.status() if health_service else {"status": "healthy", "canary": None}
     except Exception as e:
         logger.error("Health check failed", error=str(e))
         raise HTTPException(status_code=503, detail="Service unhealthy")  # noqa: B904
+
+    if model_health["status"] == "unhealthy":
+        logger.error("Health check failed", canary=model_health["canary"])
+        raise HTTPException(status_code=503, detail="Service unhealthy")
+
+    return {
+        **model_health,
+        "queue": {
+            "active_requests": queue.current_requests,
+            "queued_requests": queue.waiting,
+        },
+    }
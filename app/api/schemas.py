@@ -5,6 +5,9 @@ from typing import Optional
 
 from pydantic import BaseModel, Field
 
+# Maximum number of candidate completions a request may ask for
+MAX_CANDIDATES = 8
+
 
 class Tone(str, Enum):
     """Tone enum for completion API."""
@@ -63,6 +66,28 @@ class CompletionRequest(BaseModel):
         description="Tone to use for generation",
         example=Tone.PROFESSIONAL,
     )
+    include_timings: Optional[bool] = Field(
+        default=False,
+        description="Include the per-stage timing breakdown in the response metadata",
+        example=False,
+    )
+    adapter: Optional[str] = Field(
+        default=None,
+        description="LoRA adapter (client vertical) to generate with, when the replica serves adapters",
+        example="retail",
+    )
+    adaptive_max_new_tokens: Optional[bool] = Field(
+        default=True,
+        description="Cap max_new_tokens at the output length predicted from similar requests; false opts out",
+        example=True,
+    )
+    num_candidates: Optional[int] = Field(
+        default=1,
+        description="Alternative completions sampled in one generate call, returned best first with their scores",
+        example=3,
+        ge=1,
+        le=MAX_CANDIDATES,
+    )
 
     class Config:
         """Config for the completion request."""
@@ -84,8 +109,53 @@ class CompletionRequest(BaseModel):
 class CompletionMetadata(BaseModel):
     """Metadata for the completion."""
 
-    input_tokens: int = Field(default=..., description="Number of input tokens", example=10)  # type: ignore
-    output_tokens: int = Field(default=..., description="Number of output tokens", example=10)  # type: ignore
+    input_tokens: int = Field(default=..., description="Number of prompt tokens", example=10)  # type: ignore
+    output_tokens: int = Field(default=..., description="Number of newly generated tokens", example=10)  # type: ignore
+    cached: bool = Field(
+        default=False,
+        description="Whether the completion was served from the cache rather than generated",
+        example=False,
+    )
+    generation_time_seconds: Optional[float] = Field(
+        default=None,
+        description="Wall time of the generate call that produced the completion",
+        example=1.25,
+    )
+    tokens_per_second: Optional[float] = Field(
+        default=None,
+        description="Newly generated tokens per second of generation wall time",
+        example=8.0,
+    )
+    max_new_tokens: Optional[int] = Field(
+        default=None,
+        description="Effective token limit of the generation, after output length prediction",
+        example=96,
+    )
+    degradation_level: int = Field(
+        default=0,
+        description="Level of the load-shedding quality ladder the request was served at (0 is full quality)",
+        example=0,
+    )
+    degradation: str = Field(
+        default="full",
+        description="Name of the quality level: full, fewer_beams, greedy, short or approximate_cache",
+        example="full",
+    )
+    num_candidates: int = Field(
+        default=1,
+        description="Number of candidate completions generated; reduced to 1 when load shedding disables sampling",
+        example=1,
+    )
+    adapter: Optional[str] = Field(
+        default=None,
+        description="LoRA adapter that generated the completion",
+        example="retail",
+    )
+    timings: Optional[dict[str, float]] = Field(
+        default=None,
+        description="Per-stage timings in milliseconds, when requested",
+        example={"cache_lookup": 0.4, "tokenize": 0.2, "prefill": 35.1, "decode": 812.7},
+    )
 
 
 class CompletionResponse(BaseModel):
@@ -100,8 +170,45 @@ class CompletionResponse(BaseModel):
             "The weather today is warm",
         ],
     )
+    scores: Optional[list[float]] = Field(
+        default=None,
+        description="Reranking score of each completion, highest first, when several candidates were generated",
+        example=[0.42, 0.17, -0.35],
+    )
     metadata: CompletionMetadata = Field(  # type: ignore
         default=...,
         description="Metadata about the completion",
         example=CompletionMetadata(input_tokens=10, output_tokens=10),
     )
+
+
+class ProfilerArmRequest(BaseModel):
+    """Request schema for arming the on-demand profiler."""
+
+    requests: Optional[int] = Field(
+        default=None,
+        description="Number of upcoming requests to profile",
+        example=20,
+        gt=0,
+        le=1000,
+    )
+    seconds: Optional[float] = Field(
+        default=None,
+        description="Duration of the profiling window in seconds",
+        example=60,
+        gt=0,
+        le=3600,
+    )
+
+
+class MemoryTracingRequest(BaseModel):
+    """Request schema for starting or stopping Python allocation tracing."""
+
+    enabled: bool = Field(default=..., description="Start (true) or stop (false) tracing", example=True)  # type: ignore
+    frames: int = Field(
+        default=1,
+        description="Frames of traceback stored per allocation",
+        example=1,
+        ge=1,
+        le=50,
+    )
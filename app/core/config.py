@@ -16,20 +16,133 @@ class Settings(BaseSettings):
     # Model settings
     BASE_MODEL: str = "google/gemma-3-1b-it"
     LORA_WEIGHTS: str = "wassim249/ads-genius-gemma-3-1b-it-finetuned"
+    SERVED_MODEL: str = "wassim249/ads-genius-gemma-3-1b-it-finetuned-merged"  # Merged fine-tuned model served
+    LORA_ADAPTERS: dict[str, str] = {}  # Adapter name -> LoRA weights; when set, BASE_MODEL is served with adapters
+    DEFAULT_ADAPTER: str = ""  # Adapter used when a request names none ("" uses the base model)
+    LORA_MEMORY_BUDGET_MB: float = 512.0  # Memory for loaded adapters; least recently used ones are evicted beyond it
     DEFAULT_MAX_NEW_TOKENS: int = 32
     DEFAULT_TEMPERATURE: float = 0.7
     DEFAULT_TOP_P: float = 0.95
     DEFAULT_TOP_K: int = 50
     DEFAULT_DO_SAMPLE: bool = True
     DEFAULT_REPETITION_PENALTY: float = 1.1
+    DEFAULT_NUM_BEAMS: int = 5
     DEVICE: str = "cuda"  # or "cpu"
     OFFLOAD_DIR: str = "offload_folder"  # Directory for model offloading
+    INFERENCE_BACKEND: str = "transformers"  # "transformers", "onnxruntime" or "fake"
+    ONNX_MODEL_DIR: str = "onnx_model"  # Directory produced by `python -m app.export_onnx`
+    ONNX_NUM_THREADS: int = 0  # Intra-op threads for ONNX Runtime (0 lets ONNX Runtime decide)
+    FAKE_PREFILL_SECONDS_PER_TOKEN: float = 0.0005  # Simulated prefill latency per prompt token (fake backend)
+    FAKE_DECODE_SECONDS_PER_TOKEN: float = 0.02  # Simulated decode latency per new token (fake backend)
+    FAKE_OUTPUT_TOKENS: int = 48  # Tokens generated per completion by the fake backend, capped by max_new_tokens
+    FAKE_KV_BYTES_PER_TOKEN: int = 26624  # Simulated KV cache size per token (fake backend; gemma-3-1b in bfloat16)
+    COMPILE_MODEL: bool = False  # Serve through torch.compile with a static KV cache (opt-in)
+    COMPILE_MODE: str = "reduce-overhead"  # torch.compile mode
+    COMPILE_BUCKETS: list[int] = [64, 128, 256, 512]  # Prompt lengths prompts are left-padded to
+    COMPILE_MAX_NEW_TOKENS: int = 500  # Static KV cache capacity beyond the largest bucket
+    COMPILE_CACHE_DIR: str = "compile_cache"  # Directory persisting compiled graphs between restarts
+    STOPPING_ENABLED: bool = True  # Stop generating once the ad copy is complete
+    STOP_AFTER_HASHTAG_LINE: bool = True  # Stop after a line made only of hashtags
+    STOP_CTA_MARKERS: list[str] = []  # Stop after a line containing one of these call-to-action markers
+    STOP_MAX_BLANK_LINES: int = 2  # Stop after this many consecutive blank lines following the body (0 disables)
+    STOP_MAX_PARAGRAPHS: int = 0  # Stop after this many paragraphs (0 disables)
+    ADAPTIVE_MAX_NEW_TOKENS: bool = True  # Cap max_new_tokens at the predicted output length
+    LENGTH_HISTORY_SIZE: int = 1000  # Recent output lengths kept per (tone, prompt-length bucket)
+    LENGTH_MIN_SAMPLES: int = 50  # Observations required before predicting for a (tone, prompt-length bucket)
+    LENGTH_PERCENTILE: float = 99.0  # Percentile of recent output lengths used as the prediction
+    LENGTH_MARGIN: float = 1.25  # Multiplier applied to the predicted percentile
+    PROMPT_CACHE_SIZE: int = 4096  # Maximum number of memoized prompt token sequences (0 disables memoization)
+
+    # Reranking settings
+    RERANK_LIKELIHOOD_WEIGHT: float = 1.0  # Weight of the mean token log-probability of a candidate
+    RERANK_LENGTH_WEIGHT: float = 0.5  # Weight of the (log) distance of a candidate's length to RERANK_TARGET_WORDS
+    RERANK_TARGET_WORDS: int = 40  # Preferred length of a candidate, in words
+    RERANK_FORMAT_WEIGHT: float = 1.0  # Weight of the format checks (complete ending, no repeated lines)
+    RERANK_DIVERSITY_PENALTY: float = 1.0  # Penalty per unit of word overlap with the better-ranked candidates
 
     # Performance settings
     WORKERS_PER_CORE: float = 1.0
     MAX_WORKERS: int = 16
     TIMEOUT: int = 300
     MAX_PARALLEL_REQUESTS: int = 5  # Maximum number of parallel inference requests
+    MAX_BATCH_SIZE: int = 1  # Maximum number of prompts generated together (1 disables batching)
+    BATCH_WINDOW_MS: float = 5.0  # Time a request waits for others to share its generate call
+
+    # Memory budget settings
+    MEMORY_BUDGET_ENABLED: bool = True  # Admit requests only while their KV cache fits in the memory left after loading
+    MEMORY_HEADROOM: float = 0.2  # Fraction of the available memory kept free for activations and allocator slack
+    MEMORY_BUDGET_MB: float = 0.0  # Memory available for the KV cache of each worker (0 measures it at startup)
+    MEMORY_ADMISSION_TIMEOUT: float = 30.0  # Seconds a request may wait for KV cache memory before being rejected
+    MEMORY_REFERENCE_PROMPT_TOKENS: int = 256  # Prompt length of the typical request used to derive safe batch sizes
+
+    # Load shedding settings
+    DEGRADATION_ENABLED: bool = False  # Lower the quality of completions under queue pressure
+    DEGRADATION_QUEUE_THRESHOLDS: list[int] = [4, 8, 16, 32]  # Queued requests entering each degradation level
+    DEGRADATION_LATENCY_THRESHOLDS: list[float] = [10.0, 20.0, 40.0, 80.0]  # Recent p90 latencies entering each level
+    DEGRADATION_LATENCY_WINDOW: int = 50  # Recent request latencies considered
+    DEGRADATION_COOLDOWN_SECONDS: float = 10.0  # Time under the thresholds per level stepped down
+    DEGRADATION_REDUCED_BEAMS: int = 2  # Beams kept at the "fewer_beams" level
+    DEGRADATION_MAX_NEW_TOKENS_FACTOR: float = 0.5  # Factor applied to max_new_tokens from the "short" level
+
+    # Autotuning settings
+    AUTOTUNE_ENABLED: bool = False  # Tune the parallelism and batch window from measured throughput and latency
+    LATENCY_SLO_SECONDS: float = 10.0  # Target p95 end-to-end latency of completion requests
+    AUTOTUNE_INTERVAL_SECONDS: float = 15.0  # Seconds between tuning decisions
+    AUTOTUNE_MIN_SAMPLES: int = 20  # Completed requests required in an interval to act on it
+    AUTOTUNE_MIN_GAIN: float = 0.05  # Relative throughput gain required to keep an adjustment
+    AUTOTUNE_DECREASE_FACTOR: float = 0.7  # Factor applied to the parallelism when the latency SLO is breached
+    AUTOTUNE_MIN_PARALLEL_REQUESTS: int = 1  # Lower bound of the tuned parallelism
+    AUTOTUNE_MAX_PARALLEL_REQUESTS: int = 64  # Upper bound of the tuned parallelism (also capped by the memory budget)
+    AUTOTUNE_MAX_BATCH_WINDOW_MS: float = 50.0  # Upper bound of the tuned batch window
+
+    # Threading settings
+    THREAD_PLAN_ENABLED: bool = False  # Split the node's physical cores between inference workers at startup
+    WORKERS_PER_NODE: int = 0  # Inference workers sharing the node (0 reads WEB_CONCURRENCY, defaulting to 1)
+    WORKER_INDEX: int = -1  # Index of this worker (-1 claims a free slot with a file lock)
+    WORKER_SLOT_DIR: str = "/tmp/ads-genius-workers"  # Directory of the worker slot lock files
+    PIN_CPU_AFFINITY: bool = False  # Pin each worker to the CPUs of its cores
+    TORCH_INTRA_OP_THREADS: int = 0  # Override of the planned torch intra-op threads (0 uses the plan)
+    TORCH_INTER_OP_THREADS: int = 0  # Override of the planned torch inter-op threads (0 uses the plan)
+    TOKENIZER_THREADS: int = 0  # Override of the planned tokenizer threads (0 uses the plan)
+
+    # Health check settings
+    HEALTH_CANARY_ENABLED: bool = True  # Run a periodic background canary inference
+    HEALTH_CANARY_INTERVAL: float = 60.0  # Seconds between canary inferences
+    HEALTH_CANARY_TIMEOUT: float = 30.0  # Seconds before a canary inference times out (degraded if behind queued work)
+    HEALTH_CANARY_MAX_AGE: float = 300.0  # Seconds after which the last canary result is considered stale
+    HEALTH_CANARY_PROMPT: str = "a reusable water bottle that keeps drinks cold for 24 hours"
+    HEALTH_CANARY_MAX_NEW_TOKENS: int = 8
+
+    # Admin settings
+    ADMIN_TOKEN: str = ""  # Token expected in the X-Admin-Token header; admin endpoints are disabled when empty
+    PROFILE_DIR: str = "profiles"  # Directory where on-demand profiler captures are written
+    MEMORY_TRACE_FRAMES: int = 0  # Trace Python allocations from startup with this many frames (0 disables)
+
+    # Router settings
+    ROUTER_REPLICAS: list[str] = []  # Base URLs of the replicas the router proxies completions to
+    ROUTER_POLICY: str = "least_tokens"  # Replica choice: least_tokens, power_of_two or round_robin
+    ROUTER_AFFINITY_ENABLED: bool = True  # Send identical prompts to the same replica, for cache locality
+    ROUTER_AFFINITY_MAX_LOAD: float = 1.25  # Affinity is ignored when its replica is this much busier than average
+    ROUTER_RETRIES: int = 1  # Other replicas tried when one fails or is at capacity
+    ROUTER_TIMEOUT_SECONDS: float = 120.0  # Timeout of a proxied completion
+    ROUTER_EJECT_FAILURES: int = 3  # Consecutive failures after which a replica is ejected
+    ROUTER_EJECT_SECONDS: float = 30.0  # Time an ejected replica stays out of rotation
+    ROUTER_HEALTH_INTERVAL_SECONDS: float = 5.0  # Seconds between replica health checks (0 disables them)
+    ROUTER_HEALTH_TIMEOUT_SECONDS: float = 2.0  # Timeout of a replica health check
+
+    # Logging settings
+    LOG_DIR: str = "logs"  # Directory of the daily JSON lines log files
+    LOG_CONSOLE: bool = True  # Also write the JSON log lines to stdout
+    LOG_MAX_BYTES: int = 100 * 1024 * 1024  # Size after which a log file rolls over to the next part of the day
+    LOG_BATCH_SIZE: int = 256  # Maximum number of events written at once by the log writer thread
+    LOG_FLUSH_INTERVAL_SECONDS: float = 1.0  # Maximum time an event waits in a partial batch before being written
+    LOG_QUEUE_SIZE: int = 10000  # Pending log events; further events are dropped rather than blocking requests
+    LOG_MAX_FIELD_LENGTH: int = 1000  # Longer string fields are truncated (0 disables truncation)
+    LOG_SAMPLE_RATES: dict[str, float] = {}  # Fraction of INFO/DEBUG events kept, by event name
+
+    # Tracing settings
+    TRACE_SAMPLE_RATE: float = 0.0  # Fraction of slow requests whose stage timings are logged (0 disables tracing)
+    TRACE_SLOW_THRESHOLD_SECONDS: float = 5.0  # Only requests slower than this are considered for tracing
 
 
 @lru_cache
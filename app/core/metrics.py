@@ -0,0 +1,209 @@
+"""Prometheus metrics for the application.
+
+All metrics are registered on the default registry so they are exposed by the
+``/metrics`` endpoint mounted in ``app.main``.
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Health canary metrics
+CANARY_LATENCY_SECONDS = Histogram(
+    "ads_genius_canary_latency_seconds",
+    "Latency of the background canary inference",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+CANARY_LAST_LATENCY_SECONDS = Gauge(
+    "ads_genius_canary_last_latency_seconds",
+    "Latency of the most recent canary inference",
+)
+CANARY_LAST_SUCCESS_TIMESTAMP = Gauge(
+    "ads_genius_canary_last_success_timestamp_seconds",
+    "Unix timestamp of the most recent successful canary inference",
+)
+CANARY_FAILURES_TOTAL = Counter(
+    "ads_genius_canary_failures_total",
+    "Number of failed canary inferences",
+)
+
+# Inference metrics, labeled by tone and decoding profile
+INFERENCE_LABELS = ("tone", "profile")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (1, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+
+QUEUE_WAIT_SECONDS = Histogram(
+    "ads_genius_queue_wait_seconds",
+    "Time a request spent waiting in the request queue",
+    INFERENCE_LABELS,
+    buckets=LATENCY_BUCKETS,
+)
+PREFILL_SECONDS = Histogram(
+    "ads_genius_prefill_seconds",
+    "Time to first token: prompt prefill up to the first decoding step",
+    INFERENCE_LABELS,
+    buckets=LATENCY_BUCKETS,
+)
+DECODE_SECONDS = Histogram(
+    "ads_genius_decode_seconds",
+    "Time spent decoding new tokens after the first one",
+    INFERENCE_LABELS,
+    buckets=LATENCY_BUCKETS,
+)
+TOKENS_PER_SECOND = Histogram(
+    "ads_genius_tokens_per_second",
+    "Generated tokens per second of generation wall time",
+    INFERENCE_LABELS,
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+INPUT_TOKENS = Histogram(
+    "ads_genius_input_tokens",
+    "Number of prompt tokens per request",
+    INFERENCE_LABELS,
+    buckets=TOKEN_BUCKETS,
+)
+OUTPUT_TOKENS = Histogram(
+    "ads_genius_output_tokens",
+    "Number of newly generated tokens per request",
+    INFERENCE_LABELS,
+    buckets=TOKEN_BUCKETS,
+)
+PREDICTED_OUTPUT_TOKENS = Histogram(
+    "ads_genius_predicted_output_tokens",
+    "Effective max_new_tokens predicted from historical output lengths",
+    INFERENCE_LABELS,
+    buckets=TOKEN_BUCKETS,
+)
+LENGTH_PREDICTION_RATIO = Histogram(
+    "ads_genius_length_prediction_ratio",
+    "Actual output tokens divided by the predicted token limit",
+    INFERENCE_LABELS,
+    buckets=(0.1, 0.25, 0.5, 0.75, 0.9, 1.0),
+)
+LENGTH_PREDICTION_TRUNCATIONS_TOTAL = Counter(
+    "ads_genius_length_prediction_truncations_total",
+    "Completions cut by a predicted token limit below the requested max_new_tokens",
+    INFERENCE_LABELS,
+)
+BATCH_SIZE = Histogram(
+    "ads_genius_batch_size",
+    "Number of sequences per generate call",
+    INFERENCE_LABELS,
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+CACHE_REQUESTS_TOTAL = Counter(
+    "ads_genius_cache_requests_total",
+    "Cache lookups by tier and result (hit or miss)",
+    ("tier", "result"),
+)
+PROMPT_CACHE_ENTRIES = Gauge(
+    "ads_genius_prompt_cache_entries",
+    "Number of memoized prompt token sequences",
+)
+PROMPT_CACHE_SECONDS_SAVED_TOTAL = Counter(
+    "ads_genius_prompt_cache_seconds_saved_total",
+    "Estimated chat-template rendering and tokenization time saved by the prompt cache",
+)
+REQUESTS_REJECTED_TOTAL = Counter(
+    "ads_genius_requests_rejected_total",
+    "Requests rejected before inference, by reason",
+    ("reason",),
+)
+REQUESTS_CANCELLED_TOTAL = Counter(
+    "ads_genius_requests_cancelled_total",
+    "Requests cancelled by the client before completion",
+)
+LORA_ADAPTER_EVENTS_TOTAL = Counter(
+    "ads_genius_lora_adapter_events_total",
+    "LoRA adapter loads and evictions",
+    ("event",),
+)
+LORA_ADAPTER_MEMORY_BYTES = Gauge(
+    "ads_genius_lora_adapter_memory_bytes",
+    "Memory used by the weights of loaded LoRA adapters",
+)
+DEGRADATION_LEVEL = Gauge(
+    "ads_genius_degradation_level",
+    "Current level of the load-shedding quality ladder (0 is full quality)",
+)
+DEGRADATION_TRANSITIONS_TOTAL = Counter(
+    "ads_genius_degradation_transitions_total",
+    "Transitions between levels of the load-shedding quality ladder",
+    ("from_level", "to_level"),
+)
+AUTOTUNE_MAX_PARALLEL_REQUESTS = Gauge(
+    "ads_genius_autotune_max_parallel_requests",
+    "Parallelism limit of the request queue set by the autotuner",
+)
+AUTOTUNE_BATCH_WINDOW_MS = Gauge(
+    "ads_genius_autotune_batch_window_ms",
+    "Batch window set by the autotuner",
+)
+AUTOTUNE_P95_LATENCY_SECONDS = Gauge(
+    "ads_genius_autotune_p95_latency_seconds",
+    "p95 end-to-end latency measured over the last tuning interval",
+)
+AUTOTUNE_TOKENS_PER_SECOND = Gauge(
+    "ads_genius_autotune_tokens_per_second",
+    "Generated tokens per second measured over the last tuning interval",
+)
+AUTOTUNE_DECISIONS_TOTAL = Counter(
+    "ads_genius_autotune_decisions_total",
+    "Autotuner decisions, by tuned parameter and action",
+    ("parameter", "action"),
+)
+MEMORY_BUDGET_TOKENS = Gauge(
+    "ads_genius_memory_budget_tokens",
+    "KV cache tokens that fit in the memory budget of the worker",
+)
+MEMORY_RESERVED_TOKENS = Gauge(
+    "ads_genius_memory_reserved_tokens",
+    "KV cache tokens reserved by requests currently generating",
+)
+MEMORY_ADMISSION_WAIT_SECONDS = Histogram(
+    "ads_genius_memory_admission_wait_seconds",
+    "Time a request waited for KV cache memory before generating",
+    buckets=LATENCY_BUCKETS,
+)
+ROUTER_REQUESTS_TOTAL = Counter(
+    "ads_genius_router_requests_total",
+    "Completions proxied by the router, by replica and outcome",
+    ("replica", "outcome"),
+)
+ROUTER_OUTSTANDING_TOKENS = Gauge(
+    "ads_genius_router_outstanding_tokens",
+    "Estimated tokens of the completions in flight, by replica",
+    ("replica",),
+)
+ROUTER_REPLICA_AVAILABLE = Gauge(
+    "ads_genius_router_replica_available",
+    "Whether the replica is in rotation (1) or ejected (0)",
+    ("replica",),
+)
+ROUTER_AFFINITY_TOTAL = Counter(
+    "ads_genius_router_affinity_total",
+    "Routing decisions of prompts by affinity, by result (hit, or overloaded when the load bound overrode it)",
+    ("result",),
+)
+LOG_EVENTS_DROPPED_TOTAL = Counter(
+    "ads_genius_log_events_dropped_total",
+    "Log events not written, by reason (sampled out or log queue full)",
+    ("reason",),
+)
+MODEL_LOAD_SECONDS = Gauge(
+    "ads_genius_model_load_seconds",
+    "Time taken to load the model and tokenizer",
+)
+
+
+def decoding_profile(do_sample: bool, num_beams: int) -> str:
+    """Get the decoding profile label for a set of generation parameters.
+
+    Args:
+        do_sample: Whether sampling is enabled.
+        num_beams: Number of beams used for beam search.
+
+    Returns:
+        str: One of ``greedy``, ``sample``, ``beam`` or ``beam_sample``.
+    """
+    if num_beams > 1:
+        return "beam_sample" if do_sample else "beam"
+    return "sample" if do_sample else "greedy"
@@ -0,0 +1,263 @@
+"""On-demand profiler capture for live replicas.
+
+An admin arms the profiler for the next N requests and/or T seconds. Each
+captured request gets a cProfile profile and a torch profiler trace of its
+generation, written to ``PROFILE_DIR``. When the session ends, a
+``summary.txt`` with the top torch operators and Python hot spots is written
+next to the traces.
+
+cProfile only records the thread that enables it. The event loop thread runs
+the coroutines of every concurrent request, so the capture is taken in the
+generation thread, around the generate call of the captured request's batch.
+Requests served from the cache, or whose prompt joined a batch started by
+another request, are counted but have no profile.
+
+Captures never overlap: while one request is being profiled, concurrent
+requests are served without profiling.
+"""
+
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+TOP_N = 25
+
+_current_capture: contextvars.ContextVar[Optional["RequestCapture"]] = contextvars.ContextVar(
+    "profiler_capture", default=None
+)
+
+
+@dataclass
+class RequestCapture:
+    """Profiling artifacts of a single captured request."""
+
+    index: int
+    directory: str
+
+    @property
+    def prefix(self) -> str:
+        """Path prefix for this request's artifacts."""
+        return os.path.join(self.directory, f"request-{self.index:04d}")
+
+
+@dataclass
+class ProfilerSession:
+    """An armed profiling session."""
+
+    directory: str
+    max_requests: Optional[int]
+    deadline: Optional[float]
+    started_at: float = field(default_factory=time.time)
+    captured: int = 0
+    stats_files: list[str] = field(default_factory=list)
+    operators: dict[str, list[float]] = field(default_factory=dict)
+
+    def expired(self) -> bool:
+        """Whether the session reached its request count or deadline."""
+        if self.max_requests is not None and self.captured >= self.max_requests:
+            return True
+        return self.deadline is not None and time.time() >= self.deadline
+
+
+class ProfilerManager:
+    """Arm, capture and summarize profiling sessions."""
+
+    def __init__(self, profile_dir: str = settings.PROFILE_DIR) -> None:
+        """Initialize the profiler manager.
+
+        Args:
+            profile_dir: Directory in which session directories are created.
+        """
+        self.profile_dir = profile_dir
+        self.session: Optional[ProfilerSession] = None
+        self.last_summary: Optional[str] = None
+        self._capture_in_progress = False
+        self._lock = threading.Lock()
+
+    def arm(self, requests: Optional[int] = None, seconds: Optional[float] = None) -> dict:
+        """Arm the profiler for the next requests and/or seconds.
+
+        Args:
+            requests: Number of requests to capture.
+            seconds: Duration of the capture window in seconds.
+
+        Returns:
+            dict: The profiler status.
+
+        Raises:
+            ValueError: If neither a request count nor a duration is given.
+        """
+        if requests is None and seconds is None:
+            raise ValueError("Either requests or seconds must be set")
+        self.disarm()
+        directory = os.path.join(self.profile_dir, datetime.now().strftime("%Y%m%d-%H%M%S"))
+        os.makedirs(directory, exist_ok=True, mode=0o755)
+        self.session = ProfilerSession(
+            directory=directory,
+            max_requests=requests,
+            deadline=time.time() + seconds if seconds is not None else None,
+        )
+        logger.info("Profiler armed", directory=directory, requests=requests, seconds=seconds)
+        return self.status()
+
+    def disarm(self) -> dict:
+        """Stop the current session, writing its summary if anything was captured.
+
+        Returns:
+            dict: The profiler status.
+        """
+        with self._lock:
+            session, self.session = self.session, None
+        if session is not None:
+            self._finalize(session)
+        return self.status()
+
+    def status(self) -> dict:
+        """Get the profiler status."""
+        session = self.session
+        if session is not None and session.expired() and not self._capture_in_progress:
+            self.disarm()
+            session = None
+        return {
+            "armed": session is not None,
+            "directory": session.directory if session else None,
+            "captured_requests": session.captured if session else 0,
+            "max_requests": session.max_requests if session else None,
+            "seconds_remaining": max(0.0, session.deadline - time.time()) if session and session.deadline else None,
+            "last_summary": self.last_summary,
+        }
+
+    @contextmanager
+    def capture_request(self) -> Iterator[None]:
+        """Mark the enclosed request for profiling if the profiler is armed and idle."""
+        session = self.session
+        if session is None:
+            yield
+            return
+
+        with self._lock:
+            if self._capture_in_progress or session is not self.session or session.expired():
+                capture = None
+            else:
+                self._capture_in_progress = True
+                session.captured += 1
+                capture = RequestCapture(index=session.captured, directory=session.directory)
+
+        if capture is None:
+            if session.expired() and not self._capture_in_progress:
+                self.disarm()
+            yield
+            return
+
+        token = _current_capture.set(capture)
+        try:
+            yield
+        finally:
+            _current_capture.reset(token)
+            self._capture_in_progress = False
+            if session.expired():
+                self.disarm()
+
+    def profile_model(self) -> Any:
+        """Get a context manager profiling the generation of the current captured request.
+
+        Must be entered in the thread running the generation, with the request's context.
+
+        Returns:
+            A cProfile and torch profiler context when the current request is being captured, otherwise a
+            no-op context.
+        """
+        capture = _current_capture.get()
+        if capture is None:
+            return nullcontext()
+        return self._profile_generation(capture)
+
+    @contextmanager
+    def _profile_generation(self, capture: RequestCapture) -> Iterator[None]:
+        """Run the enclosed block under cProfile and the torch profiler and save their outputs."""
+        import torch
+        from torch.profiler import ProfilerActivity, profile
+
+        activities = [ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(ProfilerActivity.CUDA)
+
+        profiler = cProfile.Profile()
+        with profile(activities=activities, record_shapes=True) as prof:
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+        prof.export_chrome_trace(f"{capture.prefix}.trace.json")
+        stats_file = f"{capture.prefix}.prof"
+        profiler.dump_stats(stats_file)
+
+        session = self.session
+        if session is None:
+            return
+        session.stats_files.append(stats_file)
+        for event in prof.key_averages():
+            totals = session.operators.setdefault(event.key, [0, 0.0, 0.0])
+            totals[0] += event.count
+            totals[1] += event.self_cpu_time_total
+            totals[2] += event.cpu_time_total
+
+    def _finalize(self, session: ProfilerSession) -> None:
+        """Write the session summary with top torch operators and Python hot spots."""
+        if not session.stats_files:
+            logger.info("Profiler disarmed without captures", directory=session.directory)
+            return
+
+        lines = [
+            f"Profiled requests: {session.captured}",
+            f"Started at: {datetime.fromtimestamp(session.started_at).isoformat()}",
+            "",
+            f"Top {TOP_N} torch operators by self CPU time",
+            f"{'operator':<60} {'calls':>8} {'self_cpu_ms':>12} {'cpu_total_ms':>13}",
+        ]
+        top_operators = sorted(session.operators.items(), key=lambda item: item[1][1], reverse=True)[:TOP_N]
+        for name, (count, self_cpu, cpu_total) in top_operators:
+            lines.append(f"{name[:60]:<60} {int(count):>8} {self_cpu / 1000:>12.2f} {cpu_total / 1000:>13.2f}")
+
+        stream = io.StringIO()
+        stats = pstats.Stats(*session.stats_files, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_N)
+        lines += ["", f"Top {TOP_N} Python functions by cumulative time", stream.getvalue()]
+
+        summary_file = os.path.join(session.directory, "summary.txt")
+        with open(summary_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        self.last_summary = summary_file
+        logger.info("Profiler session summarized", summary=summary_file, captured_requests=session.captured)
+
+
+# Global profiler manager instance
+_profiler: Optional[ProfilerManager] = None
+
+
+def get_profiler() -> ProfilerManager:
+    """Retrieve the global profiler manager, creating it on first use.
+
+    Returns:
+        ProfilerManager: The profiler manager.
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = ProfilerManager()
+    return _profiler
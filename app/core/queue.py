@@ -30,8 +30,26 @@ class RequestQueue:
         """
         self.max_parallel_requests: int = max_parallel_requests
         self.current_requests: int = 0
-        self.queue: asyncio.Queue = asyncio.Queue()
-        self.semaphore: asyncio.Semaphore = asyncio.Semaphore(max_parallel_requests)
+        self.waiting: int = 0  # Requests waiting for a processing slot
+        # A condition on current_requests rather than a semaphore, so the limit can be resized at runtime
+        self.slot_available: asyncio.Condition = asyncio.Condition()
+        self._notify_tasks: set[asyncio.Task] = set()
+
+    async def set_max_parallel_requests(self, max_parallel_requests: int) -> None:
+        """Change the maximum number of parallel requests.
+
+        Requests already processing are not interrupted when the limit is lowered.
+
+        Args:
+            max_parallel_requests (int): New maximum number of requests processed simultaneously.
+        """
+        self.max_parallel_requests = max(1, max_parallel_requests)
+        await self._notify_slot_available()
+
+    async def _notify_slot_available(self) -> None:
+        """Wake the requests waiting for a processing slot."""
+        async with self.slot_available:
+            self.slot_available.notify_all()
 
     async def _process_request(
         self,
@@ -55,29 +73,40 @@ class RequestQueue:
             Exception: Re-raises any exception that occurs during request processing.
         """
         try:
-            async with self.semaphore:
+            async with self.slot_available:
+                if self.current_requests >= self.max_parallel_requests:
+                    logger.info("Request %s queued. Current queue size: %s", request_id, self.waiting + 1)
+                self.waiting += 1
+                try:
+                    await self.slot_available.wait_for(lambda: self.current_requests < self.max_parallel_requests)
+                finally:
+                    self.waiting -= 1
                 self.current_requests += 1
+            logger.info(
+                "Processing request %s. Current requests: %s",
+                request_id,
+                self.current_requests,
+            )
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                self.current_requests -= 1
+                # Waking waiters needs the condition's lock; a task keeps a cancelled request from skipping it
+                task = asyncio.create_task(self._notify_slot_available())
+                self._notify_tasks.add(task)
+                task.add_done_callback(self._notify_tasks.discard)
                 logger.info(
-                    "Processing request %s. Current requests: %s",
+                    "Completed request %s. Current requests: %s",
                     request_id,
                     self.current_requests,
                 )
-                try:
-                    return await handler(*args, **kwargs)
-                finally:
-                    self.current_requests -= 1
-                    logger.info(
-                        "Completed request %s. Current requests: %s",
-                        request_id,
-                        self.current_requests,
-                    )
         except Exception as e:
             logger.error("Error processing request %s: %s", request_id, str(e))
             raise
 
     @asynccontextmanager
     async def request(self, handler: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
-        """Manage a request by queuing or processing immediately based on current load.
+        """Process a request once a slot is free, waiting for one when all are taken.
 
         Args:
             handler (Callable): Async function to process the request.
@@ -88,30 +117,7 @@ class RequestQueue:
             Any: Result of the request handler.
         """
         request_id: str = str(time.time())
-
-        if self.current_requests >= self.max_parallel_requests:
-            logger.info(
-                "Request %s queued. Current queue size: %s",
-                request_id,
-                self.queue.qsize(),
-            )
-            await self.queue.put((request_id, handler, args, kwargs))
-            while True:
-                current_id, _, _, _ = await self.queue.get()
-                if current_id == request_id:
-                    break
-                await self.queue.put((current_id, handler, args, kwargs))
-                await asyncio.sleep(0.1)  # Prevent busy waiting
-
-        try:
-            result = await self._process_request(request_id, handler, *args, **kwargs)
-            yield result
-        finally:
-            if not self.queue.empty():
-                next_request: tuple[
-                    str, Callable[..., Awaitable[Any]], tuple[Any, ...], dict[str, Any]
-                ] = await self.queue.get()
-                asyncio.create_task(self._process_request(*next_request))
+        yield await self._process_request(request_id, handler, *args, **kwargs)
 
 
 # Global queue instance
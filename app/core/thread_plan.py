@@ -0,0 +1,254 @@
+"""CPU topology-aware threading plan for inference workers.
+
+Every library defaults to one thread per visible core, so several workers on
+one node (uvicorn/gunicorn ``--workers``) each start a full set of torch,
+OpenMP and tokenizer threads and oversubscribe the CPUs. The planner splits
+the physical cores available to the process (CPU affinity and cgroup quota)
+evenly between the workers of the node and gives each worker:
+
+- torch intra-op threads equal to its physical cores (SMT siblings do not speed up GEMMs),
+- a single inter-op thread (generation runs one graph at a time),
+- tokenizer threads for the Rust tokenizers pool, disabled on small partitions,
+- optionally, CPU affinity to its own cores so the scheduler does not migrate threads.
+
+Workers identify themselves by claiming a slot file lock, so the plan works
+without the server passing a worker index.
+"""
+
+import fcntl
+import math
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+_SYSFS_CPU = "/sys/devices/system/cpu"
+# Slot lock files are kept open for the life of the worker
+_slot_file = None
+
+
+@dataclass
+class ThreadPlan:
+    """Thread layout of one inference worker."""
+
+    worker_index: int
+    workers: int
+    cpus: list[int]  # Logical CPUs assigned to the worker
+    physical_cores: int  # Physical cores among the assigned CPUs
+    intra_op_threads: int
+    inter_op_threads: int
+    tokenizer_threads: int
+    pin_affinity: bool
+    applied: dict = field(default_factory=dict)  # Values read back after applying the plan
+
+    def as_dict(self) -> dict:
+        """Get the plan as a JSON-serializable dict."""
+        return asdict(self)
+
+
+def available_cpus() -> list[int]:
+    """Get the logical CPUs the process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """Get the CPU quota of the container, in CPUs, or None when unlimited."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max", encoding="utf-8") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", encoding="utf-8") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us", encoding="utf-8") as f:
+            period = int(f.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def physical_cores(cpus: list[int]) -> list[list[int]]:
+    """Group logical CPUs into physical cores using the sysfs topology.
+
+    Args:
+        cpus: Logical CPUs to group.
+
+    Returns:
+        list[list[int]]: Logical CPUs of each physical core, ordered by package and core id.
+    """
+    cores: dict[tuple[int, int], list[int]] = {}
+    for cpu in cpus:
+        try:
+            with open(f"{_SYSFS_CPU}/cpu{cpu}/topology/physical_package_id", encoding="utf-8") as f:
+                package_id = int(f.read())
+            with open(f"{_SYSFS_CPU}/cpu{cpu}/topology/core_id", encoding="utf-8") as f:
+                core_id = int(f.read())
+        except (OSError, ValueError):
+            # Without topology information, every logical CPU is treated as a core
+            package_id, core_id = 0, cpu
+        cores.setdefault((package_id, core_id), []).append(cpu)
+    return [cores[key] for key in sorted(cores)]
+
+
+def plan_threads(
+    workers: int,
+    worker_index: int,
+    cores: list[list[int]],
+    cpu_limit: Optional[float] = None,
+    pin_affinity: bool = False,
+) -> ThreadPlan:
+    """Plan the thread layout of one worker.
+
+    Args:
+        workers: Number of inference workers on the node.
+        worker_index: Index of this worker, from 0 to ``workers - 1``.
+        cores: Logical CPUs of each physical core available to the workers.
+        cpu_limit: CPU quota shared by the workers, in CPUs.
+        pin_affinity: Whether to pin the worker to its CPUs.
+
+    Returns:
+        ThreadPlan: The worker's thread layout.
+    """
+    workers = max(1, workers)
+    worker_index = worker_index % workers
+    if cpu_limit is not None:
+        cores = cores[: max(1, math.floor(cpu_limit))]
+
+    if len(cores) >= workers:
+        # Contiguous blocks of whole cores, the first workers getting one more core when uneven
+        share, extra = divmod(len(cores), workers)
+        start = worker_index * share + min(worker_index, extra)
+        assigned = cores[start : start + share + (1 if worker_index < extra else 0)]
+    else:
+        # More workers than cores: workers share cores round-robin
+        assigned = [cores[worker_index % len(cores)]]
+
+    cpus = sorted(cpu for core in assigned for cpu in core)
+    threads = len(assigned)
+    return ThreadPlan(
+        worker_index=worker_index,
+        workers=workers,
+        cpus=cpus,
+        physical_cores=threads,
+        intra_op_threads=settings.TORCH_INTRA_OP_THREADS or threads,
+        inter_op_threads=settings.TORCH_INTER_OP_THREADS or 1,
+        tokenizer_threads=settings.TOKENIZER_THREADS or (1 if threads <= 2 else min(4, threads // 2)),
+        pin_affinity=pin_affinity,
+    )
+
+
+def claim_worker_slot(workers: int, slot_dir: str = settings.WORKER_SLOT_DIR) -> int:
+    """Claim the first free worker slot on the node with a file lock held for the life of the process.
+
+    Args:
+        workers: Number of inference workers on the node.
+        slot_dir: Directory holding the slot lock files.
+
+    Returns:
+        int: The claimed slot, or the process id modulo ``workers`` when every slot is taken.
+    """
+    global _slot_file
+    os.makedirs(slot_dir, exist_ok=True)
+    for slot in range(workers):
+        slot_file = open(os.path.join(slot_dir, f"worker-{slot}.lock"), "w")  # noqa: SIM115
+        try:
+            fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            slot_file.close()
+            continue
+        _slot_file = slot_file
+        return slot
+    return os.getpid() % workers
+
+
+def apply_thread_plan(plan: ThreadPlan, torch_threads: bool = True) -> ThreadPlan:
+    """Apply a thread plan to the current process.
+
+    Must run before the first torch operation and the first tokenization: the
+    inter-op and tokenizer pool sizes cannot be changed once they have started.
+    ``torch.set_num_threads`` also sizes the OpenMP and MKL pools of torch, whose
+    environment variables are only read when torch is first imported.
+
+    Args:
+        plan: The thread plan.
+        torch_threads: Whether to size the torch pools, importing torch.
+
+    Returns:
+        ThreadPlan: The plan, with the values read back after applying it.
+    """
+    # The Rust tokenizers read their pool size from the environment when the pool starts
+    os.environ["RAYON_NUM_THREADS"] = str(plan.tokenizer_threads)
+    os.environ["RAYON_RS_NUM_CPUS"] = str(plan.tokenizer_threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "true" if plan.tokenizer_threads > 1 else "false"
+
+    if plan.pin_affinity and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, plan.cpus)
+
+    plan.applied = {"affinity": available_cpus(), "tokenizers_parallelism": os.environ["TOKENIZERS_PARALLELISM"]}
+    if torch_threads:
+        import torch
+
+        torch.set_num_threads(plan.intra_op_threads)
+        try:
+            torch.set_num_interop_threads(plan.inter_op_threads)
+        except RuntimeError as e:
+            logger.warning("Inter-op threads already started, keeping the current pool", error=str(e))
+        plan.applied["torch_intra_op_threads"] = torch.get_num_threads()
+        plan.applied["torch_inter_op_threads"] = torch.get_num_interop_threads()
+    logger.info("Thread plan applied", **plan.as_dict())
+    return plan
+
+
+def workers_per_node() -> int:
+    """Get the number of inference workers on the node (``WORKERS_PER_NODE``, else ``WEB_CONCURRENCY``)."""
+    if settings.WORKERS_PER_NODE > 0:
+        return settings.WORKERS_PER_NODE
+    try:
+        return max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+    except ValueError:
+        return 1
+
+
+# Global thread plan of the worker
+_thread_plan: Optional[ThreadPlan] = None
+
+
+def configure_threads() -> Optional[ThreadPlan]:
+    """Plan and apply the thread layout of this worker from the settings.
+
+    Returns:
+        Optional[ThreadPlan]: The applied plan, or None when the planner is disabled.
+    """
+    global _thread_plan
+    if not settings.THREAD_PLAN_ENABLED:
+        return None
+    if _thread_plan is None:
+        workers = workers_per_node()
+        worker_index = settings.WORKER_INDEX if settings.WORKER_INDEX >= 0 else claim_worker_slot(workers)
+        plan = plan_threads(
+            workers,
+            worker_index,
+            physical_cores(available_cpus()),
+            cpu_limit=cgroup_cpu_limit(),
+            pin_affinity=settings.PIN_CPU_AFFINITY,
+        )
+        # The fake backend never loads torch
+        _thread_plan = apply_thread_plan(plan, torch_threads=settings.INFERENCE_BACKEND != "fake")
+    return _thread_plan
+
+
+def get_thread_plan() -> Optional[ThreadPlan]:
+    """Retrieve the thread plan applied to this worker, if any."""
+    return _thread_plan
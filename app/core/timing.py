@@ -0,0 +1,82 @@
+"""Per-stage request timing and sampled request tracing.
+
+A ``StageTimings`` instance travels with a completion request and collects the
+duration of each serving stage (cache lookup, queue wait, tokenization,
+prefill, decode, ...). The timings are rendered as a ``Server-Timing`` header
+and, for a sample of slow requests, written to the structured log.
+"""
+
+import random
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+class StageTimings:
+    """Collect the duration of each stage of a single request."""
+
+    __slots__ = ("stages", "started_at")
+
+    def __init__(self) -> None:
+        self.stages: dict[str, float] = {}
+        self.started_at = time.perf_counter()
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add the duration of a stage, accumulating repeated stages.
+
+        Args:
+            name: Stage name, used as the ``Server-Timing`` metric name.
+            seconds: Stage duration in seconds.
+        """
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as the given stage.
+
+        Args:
+            name: Stage name, used as the ``Server-Timing`` metric name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def total(self) -> float:
+        """Get the elapsed time since the timings were created, in seconds."""
+        return time.perf_counter() - self.started_at
+
+    def as_milliseconds(self) -> dict[str, float]:
+        """Get the stage durations in milliseconds, rounded to microseconds."""
+        return {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+
+    def server_timing_header(self) -> str:
+        """Render the stages and the total as a ``Server-Timing`` header value."""
+        entries = [f"{name};dur={ms}" for name, ms in self.as_milliseconds().items()]
+        entries.append(f"total;dur={round(self.total() * 1000, 3)}")
+        return ", ".join(entries)
+
+
+def maybe_trace(timings: StageTimings, **fields) -> None:
+    """Write a request trace to the structured log for a sample of slow requests.
+
+    Nothing is evaluated beyond a float comparison when sampling is disabled.
+
+    Args:
+        timings: The request's stage timings.
+        **fields: Extra fields to include in the trace event.
+    """
+    sample_rate = settings.TRACE_SAMPLE_RATE
+    if sample_rate <= 0:
+        return
+    total = timings.total()
+    if total < settings.TRACE_SLOW_THRESHOLD_SECONDS or random.random() >= sample_rate:
+        return
+    logger.info("Slow request trace", total_ms=round(total * 1000, 3), stages_ms=timings.as_milliseconds(), **fields)
@@ -0,0 +1,40 @@
+"""Export the served model to ONNX with KV-cache inputs and outputs.
+
+Usage:
+    python -m app.export_onnx --model wassim249/ads-genius-gemma-3-1b-it-finetuned-merged --output onnx_model
+
+The output directory holds ``model.onnx``, the tokenizer and the generation
+config, and can be served with ``INFERENCE_BACKEND=onnxruntime`` and
+``ONNX_MODEL_DIR`` pointing at it.
+"""
+
+import argparse
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+def export_onnx(model_name: str, output_dir: str) -> None:
+    """Export a causal LM and its tokenizer to ONNX with past key values.
+
+    Args:
+        model_name: Model name or path to export.
+        output_dir: Directory receiving ``model.onnx`` and the tokenizer files.
+    """
+    from optimum.exporters.onnx import main_export  # type: ignore
+
+    main_export(model_name, output=output_dir, task="text-generation-with-past", trust_remote_code=True)
+
+
+def main() -> None:
+    """Parse the command-line arguments and export the model."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=settings.SERVED_MODEL, help="Model name or path to export")
+    parser.add_argument("--output", default=settings.ONNX_MODEL_DIR, help="Output directory")
+    args = parser.parse_args()
+    export_onnx(args.model, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,10 +9,15 @@ from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from prometheus_client import make_asgi_app
 
+from app.api.admin import router as admin_router
 from app.api.routes import router as api_router
 from app.core.app_logging import setup_logging
-from app.core.config import Settings, get_settings
+from app.core.config import get_settings
+from app.core.memory_snapshot import start_tracing
 from app.core.queue import get_queue, init_queue
+from app.services.autotuner import init_autotuner
+from app.services.health_service import init_health_service
+from app.services.model_service import get_model_service
 
 logger = structlog.get_logger()
 
@@ -24,16 +29,34 @@ async def lifespan(_: FastAPI):
     setup_logging()
     logger.info("Application starting up")
     settings = get_settings()
-    init_queue(settings.MAX_PARALLEL_REQUESTS)
-    logger.info(f"Initialized request queue with max {settings.MAX_PARALLEL_REQUESTS} parallel requests")
+    if settings.MEMORY_TRACE_FRAMES > 0:
+        start_tracing(settings.MEMORY_TRACE_FRAMES)
+    # The model is loaded here rather than at import, so importing the app stays cheap
+    model_service = get_model_service()
+    # The memory budget may lower the configured parallelism
+    max_parallel_requests = model_service.max_parallel_requests()
+    init_queue(max_parallel_requests)
+    logger.info(f"Initialized request queue with max {max_parallel_requests} parallel requests")
+    autotuner = None
+    if settings.AUTOTUNE_ENABLED:
+        autotuner = init_autotuner(model_service, get_queue())
+        autotuner.start()
+    health_service = None
+    if settings.HEALTH_CANARY_ENABLED:
+        health_service = init_health_service(model_service)
+        health_service.start()
     yield
     # Shutdown
     logger.info("Application shutting down")
+    if health_service is not None:
+        await health_service.stop()
+    if autotuner is not None:
+        await autotuner.stop()
 
 
 def create_application() -> FastAPI:
     """Create the FastAPI application."""
-    settings = Settings()
+    settings = get_settings()
 
     application = FastAPI(
         title=settings.PROJECT_NAME,
@@ -62,13 +85,14 @@ def create_application() -> FastAPI:
 
     # Include API router
     application.include_router(api_router, prefix="/api")
+    application.include_router(admin_router, prefix="/api")
 
     # Add middleware to handle queue status
     @application.middleware("http")
     async def add_queue_headers(request, call_next):
         response = await call_next(request)
         queue = get_queue()
-        response.headers["X-Queue-Size"] = str(queue.queue.qsize())
+        response.headers["X-Queue-Size"] = str(queue.waiting)
         response.headers["X-Active-Requests"] = str(queue.current_requests)
         return response
 
@@ -0,0 +1,245 @@
+"""Request router balancing completions across model replicas.
+
+The router is a separate entry point placed in front of the replicas
+(``uvicorn app.router:app`` with ``ROUTER_REPLICAS`` set). It proxies
+``POST /api/complete`` to the replica chosen by ``ReplicaPool`` from the load
+and prompt affinity, retries another replica when one fails or is at
+capacity, and checks the health of the replicas in the background. It loads
+no model.
+"""
+
+import asyncio
+import hashlib
+import json
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+import httpx
+import structlog
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from prometheus_client import make_asgi_app
+
+from app.api.schemas import CompletionRequest, CompletionResponse
+from app.core.app_logging import setup_logging
+from app.core.config import get_settings
+from app.core.metrics import ROUTER_REQUESTS_TOTAL
+from app.services.prompt_cache import normalize_text
+from app.services.replica_pool import Replica, ReplicaPool
+
+logger = structlog.get_logger(__name__)
+
+# Replica response headers passed on to the client
+_FORWARDED_HEADERS = ("server-timing", "x-degradation-level", "x-queue-size", "x-active-requests")
+# Characters per prompt token assumed when estimating the tokens of a request
+_CHARS_PER_TOKEN = 4
+
+
+def affinity_key(request: CompletionRequest) -> str:
+    """Get the key of a prompt: requests with the same key share the replica caches."""
+    tone = request.tone.value if request.tone is not None else None
+    payload = json.dumps([request.adapter, tone, normalize_text(request.text)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def estimate_tokens(request: CompletionRequest) -> int:
+    """Estimate the prompt and generated tokens of a request, without a tokenizer."""
+    return len(request.text) // _CHARS_PER_TOKEN + (request.max_new_tokens or 0) * (request.num_candidates or 1)
+
+
+class ReplicaRouter:
+    """Proxy completions to the replicas of a pool and check their health."""
+
+    def __init__(
+        self,
+        pool: ReplicaPool,
+        client: httpx.AsyncClient,
+        retries: int,
+        health_interval: float,
+        health_timeout: float,
+    ) -> None:
+        """Initialize the router.
+
+        Args:
+            pool: The replica pool.
+            client: HTTP client used to reach the replicas.
+            retries: Other replicas tried when one fails or is at capacity.
+            health_interval: Seconds between health checks (0 disables them).
+            health_timeout: Timeout of a health check.
+        """
+        self.pool = pool
+        self.client = client
+        self.retries = max(0, retries)
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self._task: Optional[asyncio.Task] = None
+
+    async def complete(self, request: CompletionRequest) -> tuple[Replica, httpx.Response]:
+        """Proxy a completion request.
+
+        Args:
+            request: The completion request.
+
+        Returns:
+            tuple[Replica, httpx.Response]: The replica that answered and its response.
+
+        Raises:
+            HTTPException: 503 when no replica could answer.
+        """
+        payload = request.model_dump(mode="json", exclude_unset=True)
+        key = affinity_key(request)
+        tokens = estimate_tokens(request)
+        tried: list[Replica] = []
+        last: Optional[tuple[Replica, httpx.Response]] = None
+
+        for _ in range(self.retries + 1):
+            replica = self.pool.choose(key, exclude=tried)
+            if replica is None:
+                break
+            tried.append(replica)
+            self.pool.acquire(replica, tokens)
+            try:
+                response = await self.client.post(f"{replica.url}/api/complete", json=payload)
+            except httpx.HTTPError as e:
+                ROUTER_REQUESTS_TOTAL.labels(replica=replica.url, outcome="error").inc()
+                self.pool.record_failure(replica)
+                logger.warning("Replica request failed", replica=replica.url, error=str(e))
+                continue
+            finally:
+                self.pool.release(replica, tokens)
+
+            self.pool.observe(replica, response.headers)
+            last = (replica, response)
+            if response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+                # At capacity or starting up: a load signal rather than a fault
+                ROUTER_REQUESTS_TOTAL.labels(replica=replica.url, outcome="unavailable").inc()
+                continue
+            if response.status_code >= 500:
+                ROUTER_REQUESTS_TOTAL.labels(replica=replica.url, outcome="error").inc()
+                self.pool.record_failure(replica)
+                continue
+            ROUTER_REQUESTS_TOTAL.labels(replica=replica.url, outcome="ok").inc()
+            self.pool.record_success(replica)
+            return replica, response
+
+        if last is not None:
+            return last
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="No replica available")
+
+    async def check_health(self) -> None:
+        """Check the health of every replica concurrently."""
+
+        async def check(replica: Replica) -> None:
+            try:
+                response = await self.client.get(f"{replica.url}/api/health", timeout=self.health_timeout)
+            except httpx.HTTPError:
+                self.pool.set_health(replica, False)
+                return
+            self.pool.observe(replica, response.headers)
+            self.pool.set_health(replica, response.status_code == status.HTTP_200_OK)
+
+        await asyncio.gather(*[check(replica) for replica in self.pool.replicas])
+
+    async def _run_forever(self) -> None:
+        """Check the replicas until cancelled."""
+        while True:
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error("Replica health check failed", error=str(e))
+            await asyncio.sleep(self.health_interval)
+
+    def start(self) -> None:
+        """Start the background health checks."""
+        if self.health_interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        """Stop the background health checks."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def create_router_application(
+    pool: Optional[ReplicaPool] = None, client: Optional[httpx.AsyncClient] = None
+) -> FastAPI:
+    """Create the router application.
+
+    Args:
+        pool: Replica pool (default: ``ROUTER_REPLICAS`` with the configured policy).
+        client: HTTP client used to reach the replicas, e.g. bound to in-process stub replicas.
+
+    Returns:
+        FastAPI: The application; the replica pool is created at startup.
+    """
+
+    @asynccontextmanager
+    async def lifespan(application: FastAPI):
+        """Create the replica pool and start the health checks."""
+        setup_logging()
+        settings = get_settings()
+        router_pool = pool or ReplicaPool(settings.ROUTER_REPLICAS)
+        http_client = client or httpx.AsyncClient(timeout=httpx.Timeout(settings.ROUTER_TIMEOUT_SECONDS))
+        router = ReplicaRouter(
+            router_pool,
+            http_client,
+            retries=settings.ROUTER_RETRIES,
+            health_interval=settings.ROUTER_HEALTH_INTERVAL_SECONDS,
+            health_timeout=settings.ROUTER_HEALTH_TIMEOUT_SECONDS,
+        )
+        application.state.router = router
+        router.start()
+        logger.info(
+            "Router started", policy=router_pool.policy, replicas=[replica.url for replica in router_pool.replicas]
+        )
+        yield
+        await router.stop()
+        if client is None:
+            await http_client.aclose()
+
+    application = FastAPI(
+        title=f"{get_settings().PROJECT_NAME} router",
+        version=get_settings().VERSION,
+        description="Load balancer of the completion API across model replicas",
+        docs_url="/api/docs",
+        openapi_url="/api/openapi.json",
+        lifespan=lifespan,
+    )
+    application.mount("/metrics", make_asgi_app())
+
+    @application.post("/api/complete", response_model=CompletionResponse)
+    async def complete(request: CompletionRequest, http_request: Request) -> Response:
+        """Proxy a completion to the least loaded replica, or the one caching the prompt."""
+        replica, response = await http_request.app.state.router.complete(request)
+        headers: dict[str, Any] = {
+            name: response.headers[name] for name in _FORWARDED_HEADERS if name in response.headers
+        }
+        headers["X-Replica"] = replica.url
+        return Response(
+            content=response.content,
+            status_code=response.status_code,
+            headers=headers,
+            media_type=response.headers.get("content-type"),
+        )
+
+    @application.get("/api/health")
+    async def health(http_request: Request) -> dict:
+        """Healthy while at least one replica is in rotation."""
+        pool_status = http_request.app.state.router.pool.status()
+        if pool_status["available_replicas"] == 0:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="No replica available")
+        return {"status": "healthy", "available_replicas": pool_status["available_replicas"]}
+
+    @application.get("/api/router/status")
+    async def router_status(http_request: Request) -> dict:
+        """Get the routing policy and the load and health of every replica."""
+        return http_request.app.state.router.pool.status()
+
+    return application
+
+
+app = create_router_application()
@@ -0,0 +1,318 @@
+"""Self-tuning of the request parallelism and batch window.
+
+The best ``MAX_PARALLEL_REQUESTS`` and ``BATCH_WINDOW_MS`` depend on the
+hardware, the model and the traffic. The autotuner measures generated tokens
+per second and the p95 end-to-end latency over fixed intervals and adjusts one
+parameter per interval:
+
+- When p95 latency exceeds ``LATENCY_SLO_SECONDS``, parallelism is cut
+  multiplicatively and the batch window halved.
+- When the previous adjustment did not raise throughput by at least
+  ``AUTOTUNE_MIN_GAIN``, it is reverted (hill climbing).
+- Otherwise, when the server is saturated (requests waited for a slot), the
+  next parameter in turn is moved: parallelism doubles until the first revert
+  or SLO breach (slow start), then grows by one; the batch window keeps moving
+  in the direction that last helped.
+
+Batches are generated one at a time on a single thread, so admitting more
+requests only raises throughput by letting them share larger batches. With
+``MAX_BATCH_SIZE`` at 1, neither the parallelism nor the batch window can
+change throughput: both are held, and only SLO breaches cut the parallelism.
+
+Guard rails keep the parallelism within ``AUTOTUNE_MIN_PARALLEL_REQUESTS`` and
+``AUTOTUNE_MAX_PARALLEL_REQUESTS`` (and the memory budget), the batch window
+within ``AUTOTUNE_MAX_BATCH_WINDOW_MS``, and only act on intervals with at
+least ``AUTOTUNE_MIN_SAMPLES`` completed requests.
+"""
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+from app.core.metrics import (
+    AUTOTUNE_BATCH_WINDOW_MS,
+    AUTOTUNE_DECISIONS_TOTAL,
+    AUTOTUNE_MAX_PARALLEL_REQUESTS,
+    AUTOTUNE_P95_LATENCY_SECONDS,
+    AUTOTUNE_TOKENS_PER_SECOND,
+)
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+_PARAMETERS = ("max_parallel_requests", "batch_window_ms")
+# Batch windows move by this factor, and below this value they are set to 0
+_WINDOW_STEP = 1.5
+_MIN_WINDOW_MS = 1.0
+
+
+@dataclass
+class TuningChange:
+    """A parameter change waiting to be evaluated at the end of the next interval."""
+
+    parameter: str
+    previous: float
+    throughput_before: float
+
+
+class ConcurrencyAutotuner:
+    """Adjust the request parallelism and batch window against a latency SLO."""
+
+    def __init__(
+        self,
+        model_service: Any,
+        queue: Any,
+        latency_slo: float = settings.LATENCY_SLO_SECONDS,
+        interval: float = settings.AUTOTUNE_INTERVAL_SECONDS,
+        min_samples: int = settings.AUTOTUNE_MIN_SAMPLES,
+        min_gain: float = settings.AUTOTUNE_MIN_GAIN,
+        decrease_factor: float = settings.AUTOTUNE_DECREASE_FACTOR,
+        min_parallel_requests: int = settings.AUTOTUNE_MIN_PARALLEL_REQUESTS,
+        max_parallel_requests: int = settings.AUTOTUNE_MAX_PARALLEL_REQUESTS,
+        max_batch_window_ms: float = settings.AUTOTUNE_MAX_BATCH_WINDOW_MS,
+    ) -> None:
+        """Initialize the autotuner.
+
+        Args:
+            model_service: Service owning the batch scheduler and the memory budget.
+            queue: The request queue whose parallelism is tuned.
+            latency_slo: Target p95 end-to-end latency, in seconds.
+            interval: Seconds between tuning decisions.
+            min_samples: Completed requests required in an interval to act on it.
+            min_gain: Relative throughput gain required to keep an adjustment.
+            decrease_factor: Factor applied to the parallelism when the SLO is breached.
+            min_parallel_requests: Lower bound of the parallelism.
+            max_parallel_requests: Upper bound of the parallelism, further capped by the memory budget.
+            max_batch_window_ms: Upper bound of the batch window.
+        """
+        self.model_service = model_service
+        self.queue = queue
+        self.latency_slo = latency_slo
+        self.interval = interval
+        self.min_samples = min_samples
+        self.min_gain = min_gain
+        self.decrease_factor = decrease_factor
+        self.min_parallel_requests = max(1, min_parallel_requests)
+        self.max_parallel_requests = max(self.min_parallel_requests, max_parallel_requests)
+        memory_budget = getattr(model_service, "memory_budget", None)
+        if memory_budget is not None:
+            memory_cap = memory_budget.safe_concurrency(model_service.num_beams)
+            self.max_parallel_requests = max(self.min_parallel_requests, min(self.max_parallel_requests, memory_cap))
+        self.max_batch_window_ms = max_batch_window_ms
+
+        self.slow_start = True
+        self.window_direction = 1
+        self.last_decision: Optional[dict] = None
+        self._next_parameter = 0
+        self._pending_change: Optional[TuningChange] = None
+        self._latencies: list[float] = []
+        self._output_tokens = 0
+        self._saturated = False
+        self._interval_start = time.perf_counter()
+        self._task: Optional[asyncio.Task] = None
+        self._export_settings()
+
+    @property
+    def batch_window_ms(self) -> float:
+        """Get the current batch window, in milliseconds."""
+        return self.model_service.batcher.window_seconds * 1000
+
+    @property
+    def batching(self) -> bool:
+        """Whether concurrent requests can share a batch."""
+        return self.model_service.batcher.max_batch_size > 1
+
+    def observe(self, latency_seconds: float, output_tokens: int) -> None:
+        """Record a completed request.
+
+        Args:
+            latency_seconds: End-to-end latency of the request, queue wait included.
+            output_tokens: Number of generated tokens.
+        """
+        self._latencies.append(latency_seconds)
+        self._output_tokens += output_tokens
+        if self.queue.waiting > 0:
+            self._saturated = True
+
+    def _collect(self) -> Optional[dict]:
+        """Summarize the interval that just ended and start a new one; None when it had too few requests."""
+        now = time.perf_counter()
+        latencies, output_tokens, saturated = self._latencies, self._output_tokens, self._saturated
+        elapsed = now - self._interval_start
+        self._latencies, self._output_tokens, self._saturated = [], 0, False
+        self._interval_start = now
+        if len(latencies) < self.min_samples or elapsed <= 0:
+            return None
+        ordered = sorted(latencies)
+        return {
+            "requests": len(ordered),
+            "p95_latency_seconds": ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)],
+            "tokens_per_second": output_tokens / elapsed,
+            "saturated": saturated,
+        }
+
+    async def step(self) -> Optional[dict]:
+        """Make one tuning decision from the interval that just ended.
+
+        Returns:
+            Optional[dict]: The decision, or None when the interval had too few requests.
+        """
+        stats = self._collect()
+        if stats is None:
+            return None
+        AUTOTUNE_P95_LATENCY_SECONDS.set(stats["p95_latency_seconds"])
+        AUTOTUNE_TOKENS_PER_SECOND.set(stats["tokens_per_second"])
+        throughput = stats["tokens_per_second"]
+        pending, self._pending_change = self._pending_change, None
+
+        if stats["p95_latency_seconds"] > self.latency_slo:
+            self.slow_start = False
+            parallel = max(
+                self.min_parallel_requests, math.floor(self.queue.max_parallel_requests * self.decrease_factor)
+            )
+            await self._set_parallel_requests(parallel)
+            if self.batching:
+                self._set_batch_window(self.batch_window_ms / 2)
+            action, parameter = "decrease", "all"
+        elif pending is not None and throughput < pending.throughput_before * (1 + self.min_gain):
+            # The last adjustment did not pay off: go back and stop exploring in that direction
+            if pending.parameter == "max_parallel_requests":
+                self.slow_start = False
+                await self._set_parallel_requests(int(pending.previous))
+            else:
+                self.window_direction = -self.window_direction
+                self._set_batch_window(pending.previous)
+            action, parameter = "revert", pending.parameter
+        elif not stats["saturated"]:
+            # Requests never waited for a slot: more parallelism or batching cannot raise throughput
+            action, parameter = "hold", "all"
+        elif not self.batching:
+            # Generation is serialized and every batch holds one request: neither parameter can raise throughput
+            action, parameter = "hold", "all"
+        else:
+            parameter = _PARAMETERS[self._next_parameter]
+            self._next_parameter = (self._next_parameter + 1) % len(_PARAMETERS)
+            action = await self._explore(parameter, throughput)
+
+        decision = {
+            **stats,
+            "action": action,
+            "parameter": parameter,
+            "max_parallel_requests": self.queue.max_parallel_requests,
+            "batch_window_ms": self.batch_window_ms,
+        }
+        self.last_decision = decision
+        AUTOTUNE_DECISIONS_TOTAL.labels(parameter=parameter, action=action).inc()
+        self._export_settings()
+        logger.info("Autotuner decision", **decision)
+        return decision
+
+    async def _explore(self, parameter: str, throughput: float) -> str:
+        """Move a parameter one step in its exploration direction, remembering how to revert it."""
+        if parameter == "max_parallel_requests":
+            previous = self.queue.max_parallel_requests
+            target = previous * 2 if self.slow_start else previous + 1
+            await self._set_parallel_requests(target)
+            changed = self.queue.max_parallel_requests != previous
+        else:
+            previous = self.batch_window_ms
+            if self.window_direction > 0:
+                target = max(_MIN_WINDOW_MS, previous * _WINDOW_STEP)
+            else:
+                target = previous / _WINDOW_STEP
+            self._set_batch_window(target)
+            changed = self.batch_window_ms != previous
+            if not changed:
+                # Stuck at a bound: explore the other way next time
+                self.window_direction = -self.window_direction
+        if not changed:
+            return "hold"
+        self._pending_change = TuningChange(parameter=parameter, previous=previous, throughput_before=throughput)
+        return "increase" if parameter == "max_parallel_requests" or self.window_direction > 0 else "decrease"
+
+    async def _set_parallel_requests(self, value: int) -> None:
+        """Apply a parallelism limit within the guard rails."""
+        value = min(self.max_parallel_requests, max(self.min_parallel_requests, int(value)))
+        await self.queue.set_max_parallel_requests(value)
+
+    def _set_batch_window(self, value_ms: float) -> None:
+        """Apply a batch window within the guard rails."""
+        value_ms = min(self.max_batch_window_ms, value_ms)
+        if value_ms < _MIN_WINDOW_MS:
+            value_ms = 0.0
+        self.model_service.batcher.window_seconds = value_ms / 1000
+
+    def _export_settings(self) -> None:
+        """Export the current tuned values."""
+        AUTOTUNE_MAX_PARALLEL_REQUESTS.set(self.queue.max_parallel_requests)
+        AUTOTUNE_BATCH_WINDOW_MS.set(self.batch_window_ms)
+
+    async def _run_forever(self) -> None:
+        """Make tuning decisions until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.step()
+            except Exception as e:
+                logger.error("Autotuner step failed", error=str(e))
+
+    def start(self) -> None:
+        """Start the background tuning task."""
+        if self._task is None or self._task.done():
+            self._interval_start = time.perf_counter()
+            self._task = asyncio.create_task(self._run_forever())
+            logger.info(
+                "Autotuner started",
+                interval=self.interval,
+                latency_slo=self.latency_slo,
+                max_parallel_requests=self.queue.max_parallel_requests,
+                batch_window_ms=self.batch_window_ms,
+            )
+
+    async def stop(self) -> None:
+        """Stop the background tuning task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        """Get the tuned values and the last decision."""
+        return {
+            "max_parallel_requests": self.queue.max_parallel_requests,
+            "batch_window_ms": self.batch_window_ms,
+            "latency_slo_seconds": self.latency_slo,
+            "slow_start": self.slow_start,
+            "last_decision": self.last_decision,
+        }
+
+
+# Global autotuner instance
+_autotuner: Optional[ConcurrencyAutotuner] = None
+
+
+def init_autotuner(model_service: Any, queue: Any) -> ConcurrencyAutotuner:
+    """Initialize the global autotuner.
+
+    Args:
+        model_service: Service owning the batch scheduler and the memory budget.
+        queue: The request queue whose parallelism is tuned.
+
+    Returns:
+        ConcurrencyAutotuner: The initialized autotuner.
+    """
+    global _autotuner
+    _autotuner = ConcurrencyAutotuner(model_service, queue)
+    return _autotuner
+
+
+def get_autotuner() -> Optional[ConcurrencyAutotuner]:
+    """Retrieve the global autotuner, if initialized."""
+    return _autotuner
@@ -0,0 +1,35 @@
+"""Inference backends serving the ad copy model."""
+
+from app.services.backends.base import GenerationOutput, GenerationParams, InferenceBackend
+
+
+def get_backend(name: str) -> InferenceBackend:
+    """Create the inference backend with the given name.
+
+    Backends are imported lazily so that optional runtimes are only required when selected.
+
+    Args:
+        name: ``transformers``, ``onnxruntime`` or ``fake``.
+
+    Returns:
+        InferenceBackend: The (not yet loaded) backend.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if name == "transformers":
+        from app.services.backends.transformers_backend import TransformersBackend
+
+        return TransformersBackend()
+    if name == "onnxruntime":
+        from app.services.backends.onnx_backend import OnnxBackend
+
+        return OnnxBackend()
+    if name == "fake":
+        from app.services.backends.fake_backend import FakeBackend
+
+        return FakeBackend()
+    raise ValueError(f"Unknown inference backend: {name}")
+
+
+__all__ = ["GenerationOutput", "GenerationParams", "InferenceBackend", "get_backend"]
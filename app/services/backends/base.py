@@ -0,0 +1,111 @@
+"""Inference backend interface.
+
+``LLMService`` owns the serving concerns (caching, metrics, timings, response
+building) and delegates everything model-specific to an ``InferenceBackend``:
+loading, prompt tokenization, batched generation and decoding.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from app.core.timing import StageTimings
+
+
+@dataclass(frozen=True)
+class GenerationParams:
+    """Decoding parameters of a generate call, hashable so requests can be grouped into batches."""
+
+    max_new_tokens: int
+    temperature: float
+    top_p: float
+    top_k: int
+    do_sample: bool
+    repetition_penalty: float
+    num_beams: int = 1
+    num_return_sequences: int = 1  # Sequences returned per prompt, e.g. sampled candidates to rerank
+
+
+@dataclass
+class GenerationOutput:
+    """Result of generating from a single prompt."""
+
+    token_ids: list[list[int]]  # Newly generated ids of each returned sequence, without prompt or padding
+    input_tokens: int  # Number of prompt tokens, without padding
+    prefill_seconds: float  # Time to the first decoding step
+    decode_seconds: float  # Time from the first decoding step to the end of generation
+    batch_size: int = 1  # Number of prompts in the generate call that produced this output
+    logprobs: Optional[list[float]] = None  # Mean log-probability of the tokens of each sequence, when scored
+
+
+class InferenceBackend(ABC):
+    """A model runtime that can tokenize prompts and generate completions."""
+
+    name: str = "base"
+    supports_beam_search: bool = True
+    supports_adapters: bool = False  # Whether LoRA adapters can be selected per prompt, mixed within a batch
+    max_batch_size: Optional[int] = None  # Cap on the prompts of a generate call, when the backend needs one
+
+    @abstractmethod
+    def load(self) -> None:
+        """Load the model and tokenizer."""
+
+    @abstractmethod
+    def tokenize(self, text: str, tone: Any = None, timings: Optional[StageTimings] = None) -> Any:
+        """Render and tokenize the chat prompt for the given user text and tone.
+
+        Args:
+            text: The normalized user text.
+            tone: Tone for the generated text.
+            timings: Stage timings of the request.
+
+        Returns:
+            Backend-specific prompt inputs accepted by ``generate_batch``.
+        """
+
+    def prompt_length(self, prompt: Any) -> int:
+        """Get the number of tokens of a tokenized prompt.
+
+        Args:
+            prompt: Prompt inputs returned by ``tokenize``.
+
+        Returns:
+            int: The prompt length in tokens.
+        """
+        return len(prompt)
+
+    def kv_cache_bytes_per_token(self) -> Optional[int]:
+        """Get the KV cache memory held by one token of one sequence, once the model is loaded.
+
+        Returns:
+            Optional[int]: The size in bytes, or None when the backend cannot estimate it.
+        """
+        return None
+
+    @abstractmethod
+    def generate_batch(
+        self, prompts: list[Any], params: GenerationParams, adapters: Optional[list[str]] = None
+    ) -> list[GenerationOutput]:
+        """Generate completions for a batch of tokenized prompts.
+
+        This call blocks and is run in a worker thread by ``LLMService``.
+
+        Args:
+            prompts: Prompt inputs returned by ``tokenize``.
+            params: Decoding parameters shared by the batch.
+            adapters: LoRA adapter of each prompt, for backends supporting adapters.
+
+        Returns:
+            list[GenerationOutput]: One output per prompt, in order.
+        """
+
+    @abstractmethod
+    def decode(self, token_ids: list[list[int]]) -> list[str]:
+        """Decode generated token ids into text.
+
+        Args:
+            token_ids: Generated ids of each sequence.
+
+        Returns:
+            list[str]: The decoded texts.
+        """
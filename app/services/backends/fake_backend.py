@@ -0,0 +1,141 @@
+"""Deterministic fake inference backend.
+
+The fake backend needs neither torch nor model weights. Prompts are tokenized
+into word ids and completions are drawn from a small ad vocabulary with a
+generator seeded by the prompt, so the same prompt always gets the same
+completion. Prefill and decode latencies are simulated with configurable
+per-token sleeps, which makes it suitable for load tests and benchmarks of the
+serving path.
+"""
+
+import random
+import time
+import zlib
+from typing import Any, Optional
+
+from app.core.config import get_settings
+from app.core.timing import StageTimings
+from app.services.backends.base import GenerationOutput, GenerationParams, InferenceBackend
+from app.services.prompt_cache import build_prompt
+from app.services.stopping import AdStopRules
+
+settings = get_settings()
+
+_VOCABULARY = (
+    "Discover",
+    "the",
+    "new",
+    "way",
+    "to",
+    "shine",
+    "today",
+    "with",
+    "our",
+    "best",
+    "deal",
+    "ever",
+    "fresh",
+    "bold",
+    "smart",
+    "style",
+    "comfort",
+    "quality",
+    "you",
+    "love",
+    "Shop",
+    "now",
+    "and",
+    "save",
+    "big",
+    "\n",
+    "#AdsGenius",
+    "#Sale",
+)
+
+
+class FakeBackend(InferenceBackend):
+    """Generate deterministic completions with simulated latencies."""
+
+    name = "fake"
+    supports_beam_search = False
+    supports_adapters = True
+
+    def __init__(
+        self,
+        prefill_seconds_per_token: float = settings.FAKE_PREFILL_SECONDS_PER_TOKEN,
+        decode_seconds_per_token: float = settings.FAKE_DECODE_SECONDS_PER_TOKEN,
+        output_tokens: int = settings.FAKE_OUTPUT_TOKENS,
+    ) -> None:
+        """Initialize the fake backend.
+
+        Args:
+            prefill_seconds_per_token: Simulated prefill latency per prompt token.
+            decode_seconds_per_token: Simulated decode latency per new token.
+            output_tokens: Tokens generated per completion, capped by ``max_new_tokens``.
+        """
+        self.prefill_seconds_per_token = prefill_seconds_per_token
+        self.decode_seconds_per_token = decode_seconds_per_token
+        self.output_tokens = output_tokens
+        self.stop_rules = AdStopRules.from_settings()
+
+    def load(self) -> None:
+        """Nothing to load."""
+
+    def tokenize(self, text: str, tone: Any = None, timings: Optional[StageTimings] = None) -> list[int]:
+        """Tokenize the prompt into one id per whitespace-separated word."""
+        timings = timings if timings is not None else StageTimings()
+        with timings.stage("tokenize"):
+            return [zlib.crc32(word.encode("utf-8")) for word in build_prompt(text, tone).split()]
+
+    def _new_tokens(
+        self, prompt: list[int], params: GenerationParams, adapter: Optional[str] = None, sequence: int = 0
+    ) -> list[int]:
+        """Draw the completion of a prompt from a generator seeded by the prompt ids, adapter and sequence index."""
+        seed = f"{adapter}:{prompt}" if sequence == 0 else f"{adapter}:{prompt}:{sequence}"
+        rng = random.Random(zlib.crc32(seed.encode()))
+        length = min(self.output_tokens, params.max_new_tokens)
+        token_ids = [rng.randrange(len(_VOCABULARY)) for _ in range(length)]
+        if self.stop_rules is not None:
+            for index, token_id in enumerate(token_ids):
+                if _VOCABULARY[token_id] == "\n" and self.stop_rules.stop_reason(
+                    self.decode([token_ids[: index + 1]])[0]
+                ):
+                    return token_ids[: index + 1]
+        return token_ids
+
+    def kv_cache_bytes_per_token(self) -> Optional[int]:
+        """Get the simulated KV cache size of one token."""
+        return settings.FAKE_KV_BYTES_PER_TOKEN
+
+    def generate_batch(
+        self, prompts: list[list[int]], params: GenerationParams, adapters: Optional[list[str]] = None
+    ) -> list[GenerationOutput]:
+        """Generate completions, sleeping for the simulated prefill and decode time of the batch.
+
+        Multiple sequences per prompt decode in parallel, like the rows of a batch, and get a pseudo
+        log-probability derived from their ids.
+        """
+        adapters = adapters or [None] * len(prompts)
+        sequences = params.num_return_sequences
+        token_ids = [
+            [self._new_tokens(prompt, params, adapter, sequence) for sequence in range(sequences)]
+            for prompt, adapter in zip(prompts, adapters)
+        ]
+        prefill_seconds = max(len(prompt) for prompt in prompts) * self.prefill_seconds_per_token
+        decode_seconds = max(len(ids) for rows in token_ids for ids in rows) * self.decode_seconds_per_token
+        time.sleep(prefill_seconds + decode_seconds)
+        return [
+            GenerationOutput(
+                token_ids=rows,
+                input_tokens=len(prompt),
+                prefill_seconds=prefill_seconds,
+                decode_seconds=decode_seconds,
+                batch_size=len(prompts),
+                logprobs=[-1 - zlib.crc32(str(ids).encode()) / 2**32 for ids in rows] if sequences > 1 else None,
+            )
+            for prompt, rows in zip(prompts, token_ids)
+        ]
+
+    def decode(self, token_ids: list[list[int]]) -> list[str]:
+        """Join the vocabulary words of each sequence."""
+        return [" ".join(_VOCABULARY[token_id] for token_id in ids).replace(" \n ", "\n") for ids in token_ids]
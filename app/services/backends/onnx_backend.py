@@ -0,0 +1,51 @@
+"""ONNX Runtime inference backend for CPU serving."""
+
+from dataclasses import replace
+from typing import Any, Optional
+
+import torch
+
+from app.core.config import get_settings
+from app.services.backends.base import GenerationOutput, GenerationParams
+from app.services.backends.transformers_backend import TransformersBackend
+from app.services.onnx_generator import OnnxGenerator
+
+settings = get_settings()
+
+
+class OnnxBackend(TransformersBackend):
+    """Serve a model exported with ``python -m app.export_onnx`` through ONNX Runtime.
+
+    Tokenization and decoding are shared with the transformers backend; beam
+    search is not implemented, so requests are served with a single beam.
+    """
+
+    name = "onnxruntime"
+    supports_beam_search = False
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.device = torch.device("cpu")
+        self.generator: Any = None
+
+    def load(self) -> None:
+        """Load the tokenizer saved with the export and the ONNX Runtime session."""
+        self.load_tokenizer(settings.ONNX_MODEL_DIR)
+        self.generator = OnnxGenerator()
+        torch.set_grad_enabled(False)
+
+    def kv_cache_bytes_per_token(self) -> Optional[int]:
+        """Get the KV cache size of one token from the ``past_key_values`` inputs of the exported graph."""
+        return self.generator.kv_cache_bytes_per_token()
+
+    def _run_generate(
+        self, inputs: dict[str, torch.Tensor], generate_kwargs: dict, adapters: Optional[list[str]] = None
+    ) -> tuple[torch.Tensor, dict]:
+        """Run the ONNX Runtime decoding loop."""
+        return self.generator.generate(**inputs, pad_token_id=self.tokenizer.pad_token_id, **generate_kwargs), inputs
+
+    def generate_batch(
+        self, prompts: list[torch.Tensor], params: GenerationParams, adapters: Optional[list[str]] = None
+    ) -> list[GenerationOutput]:
+        """Generate completions with a single beam."""
+        return super().generate_batch(prompts, replace(params, num_beams=1))
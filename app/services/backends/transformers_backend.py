@@ -0,0 +1,327 @@
+"""Transformers inference backend running ``AutoModelForCausalLM.generate``."""
+
+import os
+import threading
+import time
+from typing import Any, Optional
+
+import torch
+from transformers import (  # type: ignore
+    AutoModelForCausalLM,
+    AutoTokenizer,
+    LogitsProcessor,
+    LogitsProcessorList,
+    StoppingCriteriaList,
+)
+from transformers import logging as transformers_logging  # type: ignore
+
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+from app.core.timing import StageTimings
+from app.services.backends.base import GenerationOutput, GenerationParams, InferenceBackend
+from app.services.compilation import CompiledGenerator, served_decodings
+from app.services.lora_adapters import LoraAdapterManager, resolve_adapter
+from app.services.memory_budget import kv_cache_bytes_per_token
+from app.services.prompt_cache import PromptTokenCache
+from app.services.stopping import AdStoppingCriteria, AdStopRules, newline_token_ids
+
+# Configure transformers logging
+transformers_logging.set_verbosity_error()
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+class StepTimer(LogitsProcessor):
+    """Logits processor recording when the first decoding step starts.
+
+    Logits processors run once per decoding step, right after the forward pass,
+    so the first call marks the end of the prompt prefill. It works with both
+    sampling and beam search, unlike streamers.
+    """
+
+    def __init__(self) -> None:
+        self.first_step_at: float | None = None
+        self.steps = 0
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        """Record the step and return the scores unchanged."""
+        if self.first_step_at is None:
+            self.first_step_at = time.perf_counter()
+        self.steps += 1
+        return scores
+
+
+class TokenLogProbs(LogitsProcessor):
+    """Logits processor recording the log-probability of each generated token.
+
+    The token chosen at a step is only known at the next call, through the last
+    column of ``input_ids``, so the distribution of the previous step is kept
+    until then; the last step is resolved from the returned sequences. Only one
+    (rows, vocabulary) tensor is held at a time, unlike ``output_scores``.
+
+    Custom processors run before the sampling warpers, in ``generate`` as in the
+    ONNX generator, so these are log-probabilities under the model distribution
+    (with the repetition penalty), not the temperature-scaled, truncated one.
+    """
+
+    def __init__(self) -> None:
+        self.steps: list[torch.Tensor] = []
+        self._previous: Optional[torch.Tensor] = None
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        """Record the log-probability of the token chosen at the previous step and return the scores unchanged."""
+        if self._previous is not None:
+            self.steps.append(self._previous.gather(1, input_ids[:, -1:]).squeeze(1))
+        self._previous = torch.log_softmax(scores.float(), dim=-1)
+        return scores
+
+    def mean_logprobs(self, new_tokens: torch.Tensor, pad_token_id: Optional[int]) -> list[float]:
+        """Get the mean log-probability of the generated tokens of each row, ignoring padding.
+
+        Args:
+            new_tokens: Generated ids of shape (rows, new tokens).
+            pad_token_id: Padding id filling finished rows, if any.
+
+        Returns:
+            list[float]: The mean log-probability of each row.
+        """
+        steps = list(self.steps)
+        if self._previous is not None and len(steps) < new_tokens.shape[1]:
+            last = new_tokens[:, len(steps) : len(steps) + 1].to(self._previous.device)
+            steps.append(self._previous.gather(1, last).squeeze(1))
+        if not steps:
+            return [0.0] * new_tokens.shape[0]
+        logprobs = torch.stack(steps, dim=1).cpu()
+        mask = torch.ones_like(logprobs, dtype=torch.bool)
+        if pad_token_id is not None:
+            mask = new_tokens[:, : logprobs.shape[1]].cpu() != pad_token_id
+        totals = (logprobs * mask).sum(dim=1)
+        counts = mask.sum(dim=1).clamp(min=1)
+        return (totals / counts).tolist()
+
+
+def strip_padding(ids: list[int], pad_token_id: Optional[int]) -> list[int]:
+    """Remove the padding filling a sequence after it finished.
+
+    Args:
+        ids: Generated ids of a sequence.
+        pad_token_id: Padding id, if any.
+
+    Returns:
+        list[int]: The ids without padding.
+    """
+    if pad_token_id is None:
+        return ids
+    return [token_id for token_id in ids if token_id != pad_token_id]
+
+
+class TransformersBackend(InferenceBackend):
+    """Serve the model with transformers, optionally through a compiled forward."""
+
+    name = "transformers"
+
+    def __init__(self) -> None:
+        self.device = torch.device(settings.DEVICE if torch.cuda.is_available() else "cpu")
+        self.tokenizer: Any = None
+        self.base_model: Any = None
+        self.model: Any = None
+        self.prompt_cache: Optional[PromptTokenCache] = None
+        self.compiled_generator: Optional[CompiledGenerator] = None
+        self.adapter_manager: Optional[LoraAdapterManager] = None
+        self.stop_rules = AdStopRules.from_settings()
+        self.newline_ids: Optional[torch.Tensor] = None
+        # The compiled generator reuses its static KV caches, so compiled generate calls are serialized
+        self._compiled_lock = threading.Lock()
+
+    def load(self) -> None:
+        """Load the tokenizer and the served model, compiling it when enabled."""
+        # Suppress unnecessary warnings during model loading
+        os.environ["TRANSFORMERS_VERBOSITY"] = "error"
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+
+        # Set GPU memory settings if using CUDA
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+            logger.info("Using CUDA device", device=str(self.device))
+
+        self.load_tokenizer(settings.BASE_MODEL)
+
+        logger.info("Loading model", model_name=settings.BASE_MODEL)
+        try:
+            self.base_model = AutoModelForCausalLM.from_pretrained(
+                settings.BASE_MODEL,
+                trust_remote_code=True,
+                low_cpu_mem_usage=True,
+                torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+                device_map="auto",
+                offload_folder=settings.OFFLOAD_DIR,
+            )
+
+            if settings.LORA_ADAPTERS:
+                # Serve every fine-tune as a LoRA adapter on the shared base model
+                self.base_model.to(self.device)
+                self.adapter_manager = LoraAdapterManager(self.base_model)
+                self.supports_adapters = True
+                self.model = self.base_model
+            else:
+                self.model = AutoModelForCausalLM.from_pretrained(
+                    settings.SERVED_MODEL,
+                    trust_remote_code=True,
+                    low_cpu_mem_usage=True,
+                    device_map="auto",
+                )
+                self.model.to(self.device)
+            self.model.eval()
+            logger.info("Model loaded successfully", device=str(self.device))
+        except Exception as e:
+            logger.error("Failed to load model", error=str(e))
+            raise
+
+        torch.set_grad_enabled(False)
+
+        if settings.COMPILE_MODEL and self.adapter_manager is not None:
+            logger.warning("Compiled inference is not supported with LoRA adapters, serving eagerly")
+        elif settings.COMPILE_MODEL:
+            self.compiled_generator = CompiledGenerator(self.model)
+            # Batches would multiply the shapes to compile, so compiled generate calls serve one prompt
+            self.max_batch_size = 1
+            self.compiled_generator.warm_up(self.tokenizer.pad_token_id, served_decodings())
+
+    def load_tokenizer(self, name: str) -> None:
+        """Load the tokenizer and its prompt cache.
+
+        Args:
+            name: Tokenizer name or path.
+        """
+        logger.info("Loading tokenizer", model_name=name)
+        try:
+            self.tokenizer = AutoTokenizer.from_pretrained(
+                name, use_fast=True, progress_bar=True, trust_remote_code=True, timeout=60
+            )
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            self.prompt_cache = PromptTokenCache(self.tokenizer, self.device)
+            if self.stop_rules is not None:
+                self.newline_ids = newline_token_ids(self.tokenizer)
+            logger.info("Tokenizer loaded successfully")
+        except Exception as e:
+            logger.error("Failed to load tokenizer", error=str(e))
+            raise
+
+    def tokenize(self, text: str, tone: Any = None, timings: Optional[StageTimings] = None) -> torch.Tensor:
+        """Get the memoized input ids of the chat prompt, of shape (1, prompt_length)."""
+        return self.prompt_cache.input_ids(text, tone, timings)
+
+    def prompt_length(self, prompt: torch.Tensor) -> int:
+        """Get the number of tokens of a (1, prompt_length) prompt."""
+        return prompt.shape[-1]
+
+    def kv_cache_bytes_per_token(self) -> Optional[int]:
+        """Get the KV cache size of one token from the model config and dtype."""
+        return kv_cache_bytes_per_token(self.model.config, self.model.dtype.itemsize)
+
+    def _batch_inputs(self, prompts: list[torch.Tensor]) -> dict[str, torch.Tensor]:
+        """Left-pad the prompts of a batch to a common length."""
+        if len(prompts) == 1:
+            return {"input_ids": prompts[0], "attention_mask": torch.ones_like(prompts[0])}
+        max_length = max(prompt.shape[1] for prompt in prompts)
+        input_ids = torch.full(
+            (len(prompts), max_length), self.tokenizer.pad_token_id, dtype=torch.long, device=self.device
+        )
+        attention_mask = torch.zeros_like(input_ids)
+        for row, prompt in enumerate(prompts):
+            input_ids[row, max_length - prompt.shape[1] :] = prompt[0]
+            attention_mask[row, max_length - prompt.shape[1] :] = 1
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+    def _generate_kwargs(self, params: GenerationParams, logits_processor: LogitsProcessorList) -> dict:
+        """Build the ``generate`` keyword arguments for the decoding parameters."""
+        return {
+            "max_new_tokens": params.max_new_tokens,
+            "temperature": params.temperature,
+            "num_beams": params.num_beams,
+            "top_p": params.top_p,
+            "top_k": params.top_k,
+            "do_sample": params.do_sample,
+            "repetition_penalty": params.repetition_penalty,
+            "num_return_sequences": params.num_return_sequences,
+            "logits_processor": logits_processor,
+            "stopping_criteria": self._stopping_criteria(),
+        }
+
+    def _stopping_criteria(self) -> StoppingCriteriaList:
+        """Build the ad-aware stopping criteria of a generate call."""
+        if self.stop_rules is None:
+            return StoppingCriteriaList()
+        return StoppingCriteriaList([AdStoppingCriteria(self.tokenizer, self.stop_rules, self.newline_ids)])
+
+    def _run_generate(
+        self, inputs: dict[str, torch.Tensor], generate_kwargs: dict, adapters: Optional[list[str]] = None
+    ) -> tuple[torch.Tensor, dict]:
+        """Run generate on the batch inputs, returning the sequences and the inputs actually used."""
+        if self.adapter_manager is not None:
+            adapters = adapters or [resolve_adapter(None)] * inputs["input_ids"].shape[0]
+            with self.adapter_manager.use(adapters) as model:
+                if hasattr(model, "peft_config"):
+                    # Beam search expands each row into num_beams rows, and sampling into num_return_sequences
+                    # rows, each using the row's adapter
+                    expansion = max(generate_kwargs.get("num_beams", 1), generate_kwargs.get("num_return_sequences", 1))
+                    generate_kwargs = {
+                        **generate_kwargs,
+                        "adapter_names": [name for name in adapters for _ in range(expansion)],
+                    }
+                return model.generate(**inputs, **generate_kwargs), inputs
+        if self.compiled_generator is not None:
+            with self._compiled_lock:
+                return self.compiled_generator.generate(
+                    inputs["input_ids"], self.tokenizer.pad_token_id, inputs["attention_mask"], **generate_kwargs
+                )
+        return self.model.generate(**inputs, **generate_kwargs), inputs
+
+    @torch.no_grad()
+    def generate_batch(
+        self, prompts: list[torch.Tensor], params: GenerationParams, adapters: Optional[list[str]] = None
+    ) -> list[GenerationOutput]:
+        """Generate completions for a batch of prompts with ``model.generate``.
+
+        With ``num_return_sequences`` above 1, the sequences of every prompt come from the same call and are
+        scored with their mean token log-probability.
+        """
+        inputs = self._batch_inputs(prompts)
+        step_timer = StepTimer()
+        processors = LogitsProcessorList([step_timer])
+        token_logprobs = TokenLogProbs() if params.num_return_sequences > 1 else None
+        if token_logprobs is not None:
+            processors.append(token_logprobs)
+        generate_start = time.perf_counter()
+        outputs, inputs = self._run_generate(inputs, self._generate_kwargs(params, processors), adapters)
+        generate_end = time.perf_counter()
+        first_step_at = step_timer.first_step_at or generate_end
+
+        prompt_length = inputs["input_ids"].shape[1]
+        sequences = params.num_return_sequences
+        new_token_ids = outputs[:, prompt_length:]
+        new_tokens = new_token_ids.tolist()
+        logprobs = None
+        if token_logprobs is not None:
+            logprobs = token_logprobs.mean_logprobs(new_token_ids, self.tokenizer.pad_token_id)
+        # Rows of the sequences of a prompt are contiguous
+        return [
+            GenerationOutput(
+                token_ids=[
+                    strip_padding(new_tokens[row], self.tokenizer.pad_token_id)
+                    for row in range(index * sequences, (index + 1) * sequences)
+                ],
+                input_tokens=int(inputs["attention_mask"][index].sum()),
+                prefill_seconds=first_step_at - generate_start,
+                decode_seconds=generate_end - first_step_at,
+                batch_size=len(prompts),
+                logprobs=logprobs[index * sequences : (index + 1) * sequences] if logprobs is not None else None,
+            )
+            for index in range(len(prompts))
+        ]
+
+    def decode(self, token_ids: list[list[int]]) -> list[str]:
+        """Decode generated ids, skipping special tokens."""
+        return self.tokenizer.batch_decode(token_ids, skip_special_tokens=True)
@@ -0,0 +1,137 @@
+"""Micro-batching of concurrent generation requests.
+
+Requests arriving within ``BATCH_WINDOW_MS`` of each other with identical
+decoding parameters share a single ``generate_batch`` call of up to
+``MAX_BATCH_SIZE`` prompts. Backends supporting LoRA adapters batch prompts for
+different adapters together; other backends only batch prompts without one.
+
+Batches share the loaded model, so they are generated one at a time by a
+single worker thread.
+"""
+
+import asyncio
+import contextvars
+import functools
+from collections.abc import Hashable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+from app.services.backends import GenerationOutput, GenerationParams
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class PendingGeneration:
+    """A prompt waiting for its batch to be generated."""
+
+    prompt: Any
+    adapter: Optional[str]
+    future: asyncio.Future
+
+
+class BatchScheduler:
+    """Group concurrent generation requests into batched generate calls."""
+
+    def __init__(
+        self,
+        run_batch: Callable[[list, GenerationParams, Optional[list[str]]], list[GenerationOutput]],
+        mixed_adapters: bool,
+        max_batch_size: int = settings.MAX_BATCH_SIZE,
+        window_ms: float = settings.BATCH_WINDOW_MS,
+    ) -> None:
+        """Initialize the batch scheduler.
+
+        Args:
+            run_batch: Blocking function generating a batch, run in the generation thread.
+            mixed_adapters: Whether prompts for different adapters can share a batch.
+            max_batch_size: Maximum number of prompts per batch.
+            window_ms: Time the first request of a batch waits for others, in milliseconds.
+        """
+        self.run_batch = run_batch
+        self.mixed_adapters = mixed_adapters
+        self.max_batch_size = max(1, max_batch_size)
+        self.window_seconds = window_ms / 1000
+        self._pending: dict[Hashable, list[PendingGeneration]] = {}
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="generate")
+
+    async def submit(self, prompt: Any, params: GenerationParams, adapter: Optional[str] = None) -> GenerationOutput:
+        """Generate a completion for a prompt as part of a batch.
+
+        Args:
+            prompt: Prompt inputs returned by the backend's ``tokenize``.
+            params: Decoding parameters of the request.
+            adapter: LoRA adapter of the request.
+
+        Returns:
+            GenerationOutput: The output for this prompt.
+        """
+        loop = asyncio.get_running_loop()
+        key = (params, None) if self.mixed_adapters else (params, adapter)
+        pending = self._pending.setdefault(key, [])
+        pending.append(PendingGeneration(prompt=prompt, adapter=adapter, future=loop.create_future()))
+        future = pending[-1].future
+
+        if len(pending) >= self.max_batch_size or self.window_seconds <= 0:
+            self._flush(key)
+        elif len(pending) == 1:
+            self._timers[key] = loop.call_later(self.window_seconds, self._flush, key)
+        return await future
+
+    @property
+    def backlog(self) -> int:
+        """Get the number of batches queued for or running in the generation thread."""
+        return len(self._tasks)
+
+    def stats(self) -> dict:
+        """Get the number of pending and running batches."""
+        return {
+            "pending_batches": len(self._pending),
+            "pending_requests": sum(len(batch) for batch in self._pending.values()),
+            "timers": len(self._timers),
+            "running_batches": self.backlog,
+        }
+
+    def _flush(self, key: Hashable) -> None:
+        """Start generating the pending batch for a key."""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        task = asyncio.create_task(self._run(key[0], batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, params: GenerationParams, batch: list[PendingGeneration]) -> None:
+        """Generate a batch in the generation thread and resolve the requests' futures."""
+        # Requests cancelled while waiting for the window are dropped from the batch
+        batch = [item for item in batch if not item.future.done()]
+        if not batch:
+            return
+        adapters = [item.adapter for item in batch]
+        try:
+            # Like asyncio.to_thread, keep the request's logging context in the worker thread
+            call = functools.partial(
+                contextvars.copy_context().run,
+                self.run_batch,
+                [item.prompt for item in batch],
+                params,
+                adapters if any(adapter is not None for adapter in adapters) else None,
+            )
+            outputs = await asyncio.get_running_loop().run_in_executor(self._executor, call)
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+        for item, output in zip(batch, outputs):
+            if not item.future.done():
+                item.future.set_result(output)
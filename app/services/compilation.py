@@ -0,0 +1,215 @@
+"""Compiled inference mode: torch.compile with a static KV cache and length buckets.
+
+In eager mode every decoding step pays Python dispatch overhead. The compiled
+mode compiles the model forward once per input shape, so shapes are kept
+stable: prompts are left-padded to a small set of length buckets and the KV
+cache is a pre-allocated ``StaticCache`` sized for the largest bucket plus the
+maximum number of new tokens. Compiled graphs are also specialized on the
+number of rows a prompt expands to (its beams or sampled candidates), so the
+compiled mode serves one prompt per generate call and every bucket is warmed up
+with every decoding served. Prompts too long for the largest bucket are served
+with the eager forward instead of compiling new shapes. Inductor's caches are
+persisted in ``COMPILE_CACHE_DIR`` so restarts reuse compiled graphs.
+"""
+
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, Optional
+
+import torch
+from transformers import StaticCache  # type: ignore
+
+from app.api.schemas import MAX_CANDIDATES
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+def configure_compile_cache(cache_dir: str = settings.COMPILE_CACHE_DIR) -> None:
+    """Persist the inductor and FX graph caches in the given directory.
+
+    Must be called before the first ``torch.compile`` call.
+
+    Args:
+        cache_dir: Directory holding the compile caches.
+    """
+    os.makedirs(cache_dir, exist_ok=True, mode=0o755)
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.abspath(cache_dir))
+    os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+    os.environ.setdefault("TORCHINDUCTOR_AUTOGRAD_CACHE", "1")
+
+
+def bucket_length(length: int, buckets: list[int]) -> int:
+    """Get the smallest bucket that fits the given length.
+
+    Args:
+        length: Prompt length in tokens.
+        buckets: Sorted bucket lengths.
+
+    Returns:
+        int: The bucket length, or the length itself if it exceeds every bucket.
+    """
+    for bucket in buckets:
+        if length <= bucket:
+            return bucket
+    return length
+
+
+def served_decodings(
+    num_beams: int = settings.DEFAULT_NUM_BEAMS,
+    do_sample: bool = settings.DEFAULT_DO_SAMPLE,
+    max_candidates: int = MAX_CANDIDATES,
+) -> list[dict[str, Any]]:
+    """Get one decoding per number of rows a prompt may expand to.
+
+    Requests are served with the default beams, the reduced beams and greedy decoding of the quality ladder
+    (when load shedding is enabled), or as sampled candidates. The health canary always decodes greedily.
+
+    Args:
+        num_beams: Beams of the default decoding.
+        do_sample: Whether the default decoding samples.
+        max_candidates: Maximum number of candidates of a request.
+
+    Returns:
+        list[dict[str, Any]]: ``generate`` arguments of each decoding, by increasing number of rows.
+    """
+    decodings = {num_beams: {"num_beams": num_beams, "do_sample": do_sample}}
+    if settings.DEGRADATION_ENABLED:
+        reduced_beams = min(num_beams, settings.DEGRADATION_REDUCED_BEAMS)
+        decodings.setdefault(reduced_beams, {"num_beams": reduced_beams, "do_sample": do_sample})
+    decodings.setdefault(1, {"num_beams": 1, "do_sample": False})
+    for candidates in range(2, max_candidates + 1):
+        decodings.setdefault(candidates, {"num_beams": 1, "do_sample": True, "num_return_sequences": candidates})
+    return [decodings[rows] for rows in sorted(decodings)]
+
+
+def pad_to_bucket(
+    input_ids: torch.Tensor,
+    buckets: list[int],
+    pad_token_id: int,
+    attention_mask: Optional[torch.Tensor] = None,
+) -> dict[str, torch.Tensor]:
+    """Left-pad input ids to their length bucket.
+
+    Args:
+        input_ids: Input ids of shape (batch, length).
+        buckets: Sorted bucket lengths.
+        pad_token_id: Id used for padding.
+        attention_mask: Attention mask of already left-padded batches (defaults to all ones).
+
+    Returns:
+        dict: ``input_ids`` and ``attention_mask`` padded to the bucket length.
+    """
+    length = input_ids.shape[1]
+    padding = bucket_length(length, buckets) - length
+    attention_mask = attention_mask if attention_mask is not None else torch.ones_like(input_ids)
+    if padding == 0:
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+    pad_ids = torch.full((input_ids.shape[0], padding), pad_token_id, dtype=input_ids.dtype, device=input_ids.device)
+    return {
+        "input_ids": torch.cat([pad_ids, input_ids], dim=1),
+        "attention_mask": torch.cat([torch.zeros_like(pad_ids), attention_mask], dim=1),
+    }
+
+
+class CompiledGenerator:
+    """Run generation through a compiled forward with reusable static KV caches."""
+
+    def __init__(self, model: Any, buckets: list[int] = settings.COMPILE_BUCKETS) -> None:
+        """Compile the model forward.
+
+        Args:
+            model: The loaded causal LM.
+            buckets: Prompt length buckets.
+        """
+        configure_compile_cache()
+        self.model = model
+        self.buckets = sorted(buckets)
+        self.max_cache_len = self.buckets[-1] + settings.COMPILE_MAX_NEW_TOKENS
+        self._caches: dict[int, StaticCache] = {}
+        self._eager_forward = self.model.forward
+        self.model.forward = torch.compile(self.model.forward, mode=settings.COMPILE_MODE, fullgraph=True)
+        logger.info("Model forward compiled", mode=settings.COMPILE_MODE, buckets=self.buckets)
+
+    def _get_cache(self, batch_size: int) -> StaticCache:
+        """Get the static cache for a batch size, allocating it on first use."""
+        cache = self._caches.get(batch_size)
+        if cache is None:
+            cache = StaticCache(
+                config=self.model.config,
+                max_batch_size=batch_size,
+                max_cache_len=self.max_cache_len,
+                device=self.model.device,
+                dtype=self.model.dtype,
+            )
+            self._caches[batch_size] = cache
+        else:
+            cache.reset()
+        return cache
+
+    @contextmanager
+    def _eager(self) -> Iterator[None]:
+        """Run the model with its uncompiled forward, e.g. for shapes the compiled graphs do not cover."""
+        compiled_forward = self.model.forward
+        self.model.forward = self._eager_forward
+        try:
+            yield
+        finally:
+            self.model.forward = compiled_forward
+
+    def generate(
+        self,
+        input_ids: torch.Tensor,
+        pad_token_id: int,
+        attention_mask: Optional[torch.Tensor] = None,
+        **generate_kwargs: Any,
+    ) -> tuple[torch.Tensor, dict]:
+        """Generate with the prompt padded to its bucket and a static KV cache.
+
+        Prompts longer than the largest bucket, or generations exceeding the cache
+        capacity, are served by the eager forward with a dynamic KV cache, so
+        that their shapes never trigger a recompilation.
+
+        Args:
+            input_ids: Prompt ids of shape (batch, length).
+            pad_token_id: Id used for padding.
+            attention_mask: Attention mask of already left-padded batches.
+            **generate_kwargs: Arguments forwarded to ``model.generate``.
+
+        Returns:
+            tuple: The generated sequences and the padded inputs passed to generate.
+        """
+        inputs = pad_to_bucket(input_ids, self.buckets, pad_token_id, attention_mask)
+        padded_length = inputs["input_ids"].shape[1]
+        max_new_tokens = generate_kwargs.get("max_new_tokens") or 0
+        if padded_length + max_new_tokens > self.max_cache_len:
+            logger.warning("Prompt exceeds compiled buckets, generating eagerly", length=padded_length)
+            with self._eager():
+                return self.model.generate(**inputs, pad_token_id=pad_token_id, **generate_kwargs), inputs
+
+        expansion = max(generate_kwargs.get("num_beams", 1), generate_kwargs.get("num_return_sequences", 1))
+        batch_size = input_ids.shape[0] * expansion
+        outputs = self.model.generate(
+            **inputs,
+            pad_token_id=pad_token_id,
+            past_key_values=self._get_cache(batch_size),
+            **generate_kwargs,
+        )
+        return outputs, inputs
+
+    def warm_up(self, pad_token_id: int, decodings: list[dict[str, Any]]) -> None:
+        """Compile every bucket with every decoding by running short generations on dummy prompts.
+
+        Args:
+            pad_token_id: Id used for padding.
+            decodings: ``generate`` arguments of each decoding served, e.g. from ``served_decodings()``.
+        """
+        for bucket in reversed(self.buckets):
+            dummy_ids = torch.full((1, bucket), pad_token_id, dtype=torch.long, device=self.model.device)
+            for decoding in decodings:
+                logger.info("Warming up compiled bucket", bucket=bucket, **decoding)
+                warm_up_kwargs = {key: value for key, value in decoding.items() if key != "min_new_tokens"}
+                self.generate(dummy_ids, pad_token_id, **{**warm_up_kwargs, "max_new_tokens": 2})
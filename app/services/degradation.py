@@ -0,0 +1,200 @@
+"""Load-shedding quality ladder.
+
+Under queue pressure it is better to serve slightly shorter, greedier ads
+quickly than to let requests time out. The policy maps the request queue depth
+and the recent end-to-end latency to a level of a fixed ladder, each level
+keeping the reductions of the previous ones:
+
+0. ``full``: requested quality,
+1. ``fewer_beams``: beam search capped at ``DEGRADATION_REDUCED_BEAMS`` beams,
+2. ``greedy``: greedy decoding with a single beam,
+3. ``short``: ``max_new_tokens`` scaled by ``DEGRADATION_MAX_NEW_TOKENS_FACTOR``,
+4. ``approximate_cache``: cache misses may be served a completion cached for a
+   prompt with the same words.
+
+The level rises as soon as the queue depth or the recent latency crosses the
+threshold of a higher level. It falls one level per
+``DEGRADATION_COOLDOWN_SECONDS`` the pressure has stayed below the current
+level's thresholds, so the quality does not flap under bursty load, and a
+quiet period between requests still counts in full.
+"""
+
+import math
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+from app.core.metrics import DEGRADATION_LEVEL, DEGRADATION_TRANSITIONS_TOTAL
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class DegradationLevel:
+    """Quality reductions applied at one level of the ladder."""
+
+    level: int
+    name: str
+    max_beams: Optional[int] = None  # Cap on the number of beams, if any
+    greedy: bool = False  # Whether sampling is replaced by greedy decoding
+    max_new_tokens_factor: float = 1.0  # Factor applied to max_new_tokens
+    approximate_cache: bool = False  # Whether cache misses may be served approximate cache hits
+
+    def apply(self, max_new_tokens: int, do_sample: bool, num_beams: int) -> tuple[int, bool, int]:
+        """Apply the reductions to the decoding parameters of a request.
+
+        Args:
+            max_new_tokens: Requested maximum number of new tokens.
+            do_sample: Whether sampling is requested.
+            num_beams: Number of beams the request would be served with.
+
+        Returns:
+            tuple[int, bool, int]: The degraded ``max_new_tokens``, ``do_sample`` and ``num_beams``.
+        """
+        if self.max_beams is not None:
+            num_beams = min(num_beams, self.max_beams)
+        if self.greedy:
+            do_sample, num_beams = False, 1
+        return max(1, int(max_new_tokens * self.max_new_tokens_factor)), do_sample, num_beams
+
+
+def quality_ladder(
+    reduced_beams: int = settings.DEGRADATION_REDUCED_BEAMS,
+    max_new_tokens_factor: float = settings.DEGRADATION_MAX_NEW_TOKENS_FACTOR,
+) -> tuple[DegradationLevel, ...]:
+    """Build the levels of the quality ladder, from full quality to the most degraded."""
+    return (
+        DegradationLevel(0, "full"),
+        DegradationLevel(1, "fewer_beams", max_beams=reduced_beams),
+        DegradationLevel(2, "greedy", greedy=True),
+        DegradationLevel(3, "short", greedy=True, max_new_tokens_factor=max_new_tokens_factor),
+        DegradationLevel(
+            4, "approximate_cache", greedy=True, max_new_tokens_factor=max_new_tokens_factor, approximate_cache=True
+        ),
+    )
+
+
+def approximate_cache_key(text: str, tone: str, adapter: Optional[str] = None) -> list:
+    """Build the cache key shared by prompts made of the same words, ignoring case, order and punctuation.
+
+    Args:
+        text: The normalized user text.
+        tone: Tone of the request.
+        adapter: LoRA adapter of the request.
+
+    Returns:
+        list: The approximate cache key.
+    """
+    words = sorted(set(re.findall(r"\w+", text.lower())))
+    return ["approximate", adapter, tone, " ".join(words)]
+
+
+class DegradationPolicy:
+    """Choose the quality level from the queue depth and the recent latency."""
+
+    def __init__(
+        self,
+        queue_thresholds: list[int] = settings.DEGRADATION_QUEUE_THRESHOLDS,
+        latency_thresholds: list[float] = settings.DEGRADATION_LATENCY_THRESHOLDS,
+        latency_window: int = settings.DEGRADATION_LATENCY_WINDOW,
+        cooldown_seconds: float = settings.DEGRADATION_COOLDOWN_SECONDS,
+        levels: Optional[tuple[DegradationLevel, ...]] = None,
+    ) -> None:
+        """Initialize the policy.
+
+        Args:
+            queue_thresholds: Queued requests at which each level above ``full`` is entered.
+            latency_thresholds: Recent p90 latencies, in seconds, at which each level above ``full`` is entered.
+            latency_window: Number of recent request latencies considered.
+            cooldown_seconds: Time the pressure must stay below the current level before stepping down.
+            levels: The quality ladder, defaulting to ``quality_ladder()``.
+        """
+        self.levels = levels or quality_ladder()
+        self.queue_thresholds = list(queue_thresholds)[: len(self.levels) - 1]
+        self.latency_thresholds = list(latency_thresholds)[: len(self.levels) - 1]
+        self.cooldown_seconds = cooldown_seconds
+        self._latencies: deque = deque(maxlen=latency_window)
+        self.current = self.levels[0]
+        self._calm_since: Optional[float] = None
+        DEGRADATION_LEVEL.set(0)
+
+    def observe_latency(self, seconds: float) -> None:
+        """Record the end-to-end latency of a generated request."""
+        self._latencies.append(seconds)
+
+    def recent_latency(self) -> float:
+        """Get the p90 of the recent request latencies, or 0 without observations."""
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        return ordered[int(0.9 * (len(ordered) - 1))]
+
+    def _pressure_level(self, queue_depth: int, latency: float) -> int:
+        """Get the highest level whose queue or latency threshold is reached."""
+        level = 0
+        for index, threshold in enumerate(self.queue_thresholds, start=1):
+            if queue_depth >= threshold:
+                level = max(level, index)
+        for index, threshold in enumerate(self.latency_thresholds, start=1):
+            if latency >= threshold:
+                level = max(level, index)
+        return level
+
+    def update(self, queue_depth: int) -> DegradationLevel:
+        """Update the level from the current queue depth and return the level to serve a request with.
+
+        Args:
+            queue_depth: Number of requests waiting in the request queue.
+
+        Returns:
+            DegradationLevel: The current level.
+        """
+        latency = self.recent_latency()
+        target = self._pressure_level(queue_depth, latency)
+        now = time.monotonic()
+        if target > self.current.level:
+            self._transition(target, queue_depth, latency)
+            self._calm_since = None
+        elif target < self.current.level:
+            if self._calm_since is None:
+                self._calm_since = now
+            # One level per cooldown elapsed, however few requests arrived meanwhile
+            steps = math.floor((now - self._calm_since) / self.cooldown_seconds) if self.cooldown_seconds > 0 else 1
+            if steps > 0:
+                self._transition(max(target, self.current.level - steps), queue_depth, latency)
+                self._calm_since = (
+                    None if self.current.level == target else self._calm_since + steps * self.cooldown_seconds
+                )
+        else:
+            self._calm_since = None
+        return self.current
+
+    def _transition(self, level: int, queue_depth: int, latency: float) -> None:
+        """Move to another level, logging and counting the transition."""
+        previous = self.current
+        self.current = self.levels[level]
+        DEGRADATION_LEVEL.set(level)
+        DEGRADATION_TRANSITIONS_TOTAL.labels(from_level=previous.name, to_level=self.current.name).inc()
+        log = logger.warning if level > previous.level else logger.info
+        log(
+            "Quality level changed",
+            from_level=previous.name,
+            to_level=self.current.name,
+            queue_depth=queue_depth,
+            p90_latency_seconds=latency,
+        )
+
+    def status(self) -> dict[str, Any]:
+        """Get the current level and the pressure signals."""
+        return {
+            "level": self.current.level,
+            "name": self.current.name,
+            "p90_latency_seconds": self.recent_latency(),
+            "queue_thresholds": self.queue_thresholds,
+            "latency_thresholds": self.latency_thresholds,
+        }
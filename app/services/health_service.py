@@ -0,0 +1,175 @@
+"""Health service running a periodic background canary inference.
+
+Health checks must stay cheap: instead of running a generation on every probe,
+a background task runs a short canary inference on a fixed interval and caches
+its outcome, which the health endpoint then simply reports.
+
+The canary is a few tokens of greedy, single-beam decoding. It still shares
+the generation thread with the requests, so under load it can time out while
+waiting behind queued batches: such a timeout means the replica is busy, not
+broken, and is reported as ``degraded`` rather than ``unhealthy``.
+"""
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+from app.core.metrics import (
+    CANARY_FAILURES_TOTAL,
+    CANARY_LAST_LATENCY_SECONDS,
+    CANARY_LAST_SUCCESS_TIMESTAMP,
+    CANARY_LATENCY_SECONDS,
+)
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class CanaryResult:
+    """Outcome of a single canary inference."""
+
+    ok: bool
+    latency_seconds: float
+    timestamp: float
+    error: Optional[str] = None
+    busy: bool = False
+
+
+class HealthService:
+    """Run canary inferences in the background and cache their last result."""
+
+    def __init__(
+        self,
+        model_service: Any,
+        interval: float = settings.HEALTH_CANARY_INTERVAL,
+        timeout: float = settings.HEALTH_CANARY_TIMEOUT,
+        max_age: float = settings.HEALTH_CANARY_MAX_AGE,
+    ) -> None:
+        """Initialize the health service.
+
+        Args:
+            model_service: Service exposing an async ``run_canary`` method and ``has_backlog``.
+            interval: Seconds between canary inferences.
+            timeout: Seconds before a canary inference is considered failed.
+            max_age: Seconds after which the last result is considered stale.
+        """
+        self.model_service = model_service
+        self.interval = interval
+        self.timeout = timeout
+        self.max_age = max_age
+        self.last_result: Optional[CanaryResult] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_canary(self) -> CanaryResult:
+        """Run a single canary inference and record its outcome.
+
+        Returns:
+            CanaryResult: The outcome of the canary inference.
+        """
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(
+                self.model_service.run_canary(settings.HEALTH_CANARY_PROMPT, settings.HEALTH_CANARY_MAX_NEW_TOKENS),
+                timeout=self.timeout,
+            )
+            latency = time.perf_counter() - start
+            result = CanaryResult(ok=True, latency_seconds=latency, timestamp=time.time())
+            CANARY_LAST_SUCCESS_TIMESTAMP.set(result.timestamp)
+        except asyncio.TimeoutError as e:
+            latency = time.perf_counter() - start
+            # Timing out behind queued work is load, not a failure of the model
+            busy = self.model_service.has_backlog()
+            result = CanaryResult(
+                ok=False, latency_seconds=latency, timestamp=time.time(), error=str(e) or "Timed out", busy=busy
+            )
+            if busy:
+                logger.warning("Canary inference timed out behind queued generations", latency_seconds=latency)
+            else:
+                CANARY_FAILURES_TOTAL.inc()
+                logger.error("Canary inference timed out", latency_seconds=latency)
+        except Exception as e:
+            latency = time.perf_counter() - start
+            result = CanaryResult(ok=False, latency_seconds=latency, timestamp=time.time(), error=str(e))
+            CANARY_FAILURES_TOTAL.inc()
+            logger.error("Canary inference failed", error=str(e), latency_seconds=latency)
+
+        CANARY_LATENCY_SECONDS.observe(result.latency_seconds)
+        CANARY_LAST_LATENCY_SECONDS.set(result.latency_seconds)
+        self.last_result = result
+        return result
+
+    async def _run_forever(self) -> None:
+        """Run canary inferences until cancelled."""
+        while True:
+            await self.run_canary()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the background canary task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_forever())
+            logger.info("Health canary started", interval=self.interval)
+
+    async def stop(self) -> None:
+        """Stop the background canary task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        """Get the cached model health status.
+
+        Returns:
+            dict: The status (``starting``, ``healthy``, ``degraded`` or ``unhealthy``) and the last canary
+            result.
+        """
+        result = self.last_result
+        if result is None:
+            return {"status": "starting", "canary": None}
+
+        age = time.time() - result.timestamp
+        if age > self.max_age:
+            status = "unhealthy"
+        elif result.ok:
+            status = "healthy"
+        else:
+            status = "degraded" if result.busy else "unhealthy"
+        return {
+            "status": status,
+            "canary": {**asdict(result), "age_seconds": age},
+        }
+
+
+# Global health service instance
+_health_service: Optional[HealthService] = None
+
+
+def init_health_service(model_service: Any) -> HealthService:
+    """Initialize the global health service.
+
+    Args:
+        model_service: Service exposing an async ``run_canary`` method and ``has_backlog``.
+
+    Returns:
+        HealthService: The initialized health service.
+    """
+    global _health_service
+    _health_service = HealthService(model_service)
+    return _health_service
+
+
+def get_health_service() -> Optional[HealthService]:
+    """Retrieve the global health service, if the canary is enabled.
+
+    Returns:
+        Optional[HealthService]: The health service or None when not initialized.
+    """
+    return _health_service
@@ -0,0 +1,121 @@
+"""Adaptive ``max_new_tokens`` from historical output lengths.
+
+Clients ask for far more tokens than ads actually use. The predictor keeps the
+most recent output lengths per (tone, prompt-length bucket) and predicts a
+high percentile of them, with a safety margin. The prediction caps generation
+and feeds token cost estimates, so batch padding and KV cache sizing follow
+real lengths rather than the requested maximum.
+
+Completions cut by a predicted cap are censored observations (the ad would
+have been longer), so they are recorded as twice the cap: frequent truncations
+quickly raise the prediction again.
+"""
+
+import math
+from collections import deque
+from typing import Any
+
+from app.core.config import get_settings
+from app.core.metrics import (
+    LENGTH_PREDICTION_RATIO,
+    LENGTH_PREDICTION_TRUNCATIONS_TOTAL,
+    PREDICTED_OUTPUT_TOKENS,
+)
+
+settings = get_settings()
+
+# Upper bounds of the prompt-length buckets, in tokens
+PROMPT_LENGTH_BUCKETS = (32, 64, 128, 256, 512, 1024)
+# Predictions are rounded up to a multiple of this so that similar requests share batches
+_ROUNDING = 16
+
+
+def prompt_length_bucket(input_tokens: int) -> int:
+    """Get the prompt-length bucket of a prompt.
+
+    Args:
+        input_tokens: Number of prompt tokens.
+
+    Returns:
+        int: The bucket upper bound, or 0 for prompts longer than every bucket.
+    """
+    for bucket in PROMPT_LENGTH_BUCKETS:
+        if input_tokens <= bucket:
+            return bucket
+    return 0
+
+
+class OutputLengthPredictor:
+    """Predict output lengths from running per-(tone, prompt-length bucket) statistics."""
+
+    def __init__(
+        self,
+        history_size: int = settings.LENGTH_HISTORY_SIZE,
+        min_samples: int = settings.LENGTH_MIN_SAMPLES,
+        percentile: float = settings.LENGTH_PERCENTILE,
+        margin: float = settings.LENGTH_MARGIN,
+    ) -> None:
+        """Initialize the predictor.
+
+        Args:
+            history_size: Number of recent output lengths kept per key.
+            min_samples: Number of observations required before predicting for a key.
+            percentile: Percentile of the recent output lengths to predict.
+            margin: Multiplier applied to the percentile.
+        """
+        self.history_size = history_size
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.margin = margin
+        self._lengths: dict[tuple[str, int], deque] = {}
+
+    def predict(self, tone: str, input_tokens: int, requested: int) -> int:
+        """Predict the effective token limit of a request.
+
+        Args:
+            tone: Tone of the request.
+            input_tokens: Number of prompt tokens.
+            requested: ``max_new_tokens`` requested by the client.
+
+        Returns:
+            int: The predicted limit, never above ``requested``; ``requested`` until enough lengths are known.
+        """
+        lengths = self._lengths.get((tone, prompt_length_bucket(input_tokens)))
+        if lengths is None or len(lengths) < self.min_samples:
+            return requested
+        ordered = sorted(lengths)
+        value = ordered[min(len(ordered) - 1, math.ceil(self.percentile / 100 * len(ordered)) - 1)]
+        predicted = math.ceil(value * self.margin / _ROUNDING) * _ROUNDING
+        return max(1, min(requested, predicted))
+
+    def observe(self, labels: dict, input_tokens: int, output_tokens: int, predicted: int, requested: int) -> None:
+        """Record the actual output length of a completion.
+
+        Args:
+            labels: Metric labels of the request, including its tone.
+            input_tokens: Number of prompt tokens.
+            output_tokens: Number of generated tokens.
+            predicted: Effective token limit the completion was generated with.
+            requested: ``max_new_tokens`` requested by the client.
+        """
+        PREDICTED_OUTPUT_TOKENS.labels(**labels).observe(predicted)
+        LENGTH_PREDICTION_RATIO.labels(**labels).observe(output_tokens / predicted)
+        truncated = predicted < requested and output_tokens >= predicted
+        if truncated:
+            LENGTH_PREDICTION_TRUNCATIONS_TOTAL.labels(**labels).inc()
+        elif output_tokens >= requested:
+            # Cut by the client's own limit: the true length is unknown, so it says nothing about the distribution
+            return
+        key = (labels["tone"], prompt_length_bucket(input_tokens))
+        lengths = self._lengths.setdefault(key, deque(maxlen=self.history_size))
+        lengths.append(min(requested, 2 * predicted) if truncated else output_tokens)
+
+    def stats(self) -> dict[str, Any]:
+        """Get the number of observations and current percentile per key."""
+        return {
+            f"{tone}/{bucket or 'max'}": {
+                "samples": len(lengths),
+                "predicted": self.predict(tone, bucket or PROMPT_LENGTH_BUCKETS[-1] + 1, 1_000_000),
+            }
+            for (tone, bucket), lengths in self._lengths.items()
+        }
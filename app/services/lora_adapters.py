@@ -0,0 +1,148 @@
+"""Multi-LoRA serving on a single shared base model.
+
+Instead of deploying one merged model per fine-tune, the base model is loaded
+once and LoRA adapters are attached to it on demand. Adapters are loaded lazily
+on first use and the least recently used ones are unloaded when the adapters'
+weights exceed ``LORA_MEMORY_BUDGET_MB``. Prompts for different adapters can
+share a generate call: PEFT routes each row of the batch through its own
+adapter (``adapter_names``), with ``__base__`` selecting the bare base model.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, Optional
+
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+from app.core.metrics import LORA_ADAPTER_EVENTS_TOTAL, LORA_ADAPTER_MEMORY_BYTES
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+BASE_ADAPTER = "__base__"
+
+
+class UnknownAdapterError(ValueError):
+    """Raised when a request names an adapter that is not configured."""
+
+
+def resolve_adapter(name: Optional[str], adapters: dict[str, str] = settings.LORA_ADAPTERS) -> Optional[str]:
+    """Resolve the adapter serving a request.
+
+    Args:
+        name: Adapter named by the request, if any.
+        adapters: Configured adapters.
+
+    Returns:
+        Optional[str]: The adapter name, ``BASE_ADAPTER`` for the bare base model, or None when adapters are disabled.
+
+    Raises:
+        UnknownAdapterError: If the adapter is not configured.
+    """
+    if not adapters:
+        if name:
+            raise UnknownAdapterError("LoRA adapters are not enabled on this replica")
+        return None
+    name = name or settings.DEFAULT_ADAPTER or BASE_ADAPTER
+    if name != BASE_ADAPTER and name not in adapters:
+        raise UnknownAdapterError(f"Unknown adapter: {name}")
+    return name
+
+
+class LoraAdapterManager:
+    """Load LoRA adapters onto a shared base model on demand, evicting the least recently used."""
+
+    def __init__(
+        self,
+        base_model: Any,
+        adapters: dict[str, str] = settings.LORA_ADAPTERS,
+        memory_budget_mb: float = settings.LORA_MEMORY_BUDGET_MB,
+    ) -> None:
+        """Initialize the adapter manager.
+
+        Args:
+            base_model: The loaded base causal LM.
+            adapters: Adapter name -> LoRA weights path or hub id.
+            memory_budget_mb: Memory available for loaded adapter weights, in MiB.
+        """
+        self.model = base_model
+        self.adapters = adapters
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self._loaded: OrderedDict[str, int] = OrderedDict()  # Adapter name -> weight bytes, in LRU order
+        # Adapter loading and eviction mutate the model, so they never overlap with a generate call
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def use(self, names: list[str]) -> Iterator[Any]:
+        """Hold the model with the given adapters loaded for the duration of a generate call.
+
+        Args:
+            names: Adapter of each row of the batch.
+
+        Yields:
+            The PEFT model (or the base model when only ``BASE_ADAPTER`` is used).
+        """
+        with self._lock:
+            required = {name for name in names if name != BASE_ADAPTER}
+            for name in required:
+                if name in self._loaded:
+                    self._loaded.move_to_end(name)
+                else:
+                    self._load(name)
+            self._evict(keep=required)
+            yield self.model
+
+    def _load(self, name: str) -> None:
+        """Attach an adapter to the model."""
+        from peft import PeftModel  # type: ignore
+
+        logger.info("Loading LoRA adapter", adapter=name, weights=self.adapters[name])
+        if isinstance(self.model, PeftModel):
+            self.model.load_adapter(self.adapters[name], adapter_name=name)
+        else:
+            self.model = PeftModel.from_pretrained(self.model, self.adapters[name], adapter_name=name)
+        self.model.eval()
+        self._loaded[name] = self._adapter_bytes(name)
+        LORA_ADAPTER_EVENTS_TOTAL.labels(event="load").inc()
+        LORA_ADAPTER_MEMORY_BYTES.set(sum(self._loaded.values()))
+
+    def _evict(self, keep: set[str]) -> None:
+        """Unload least recently used adapters until the loaded weights fit in the memory budget."""
+        while sum(self._loaded.values()) > self.memory_budget_bytes:
+            # PEFT keeps at least one adapter attached, and adapters of the current batch must stay loaded
+            candidates = [name for name in self._loaded if name not in keep]
+            if not candidates or len(self._loaded) == 1:
+                logger.warning(
+                    "LoRA adapters exceed the memory budget",
+                    loaded_bytes=sum(self._loaded.values()),
+                    budget_bytes=self.memory_budget_bytes,
+                )
+                break
+            name = candidates[0]
+            self.model.delete_adapter(name)
+            del self._loaded[name]
+            if self.model.active_adapter == name:
+                # Rows are routed with adapter_names, but PEFT still requires a valid active adapter
+                self.model.set_adapter(next(iter(self._loaded)))
+            LORA_ADAPTER_EVENTS_TOTAL.labels(event="evict").inc()
+            logger.info("Evicted LoRA adapter", adapter=name)
+        LORA_ADAPTER_MEMORY_BYTES.set(sum(self._loaded.values()))
+
+    def _adapter_bytes(self, name: str) -> int:
+        """Get the memory used by an adapter's weights."""
+        return sum(
+            parameter.numel() * parameter.element_size()
+            for parameter_name, parameter in self.model.named_parameters()
+            if f".{name}." in parameter_name
+        )
+
+    def stats(self) -> dict:
+        """Get the loaded adapters and their memory use."""
+        return {
+            "configured": sorted(self.adapters),
+            "loaded": dict(self._loaded),
+            "loaded_bytes": sum(self._loaded.values()),
+            "budget_bytes": self.memory_budget_bytes,
+        }
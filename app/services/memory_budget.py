@@ -0,0 +1,227 @@
+"""Memory-budgeted admission of generation requests.
+
+The KV cache dominates the memory growth of generation: every token in flight
+(prompt and new tokens, for each beam) holds a key and a value vector per layer.
+At startup, once the model is loaded, the service measures the memory still
+available to the worker, keeps ``MEMORY_HEADROOM`` of it free for activations
+and allocator slack, and divides the rest by the per-token KV cache footprint
+of the model. The result is the number of tokens that may be in flight at once.
+
+Each request reserves its worst-case token count (prompt length plus its
+predicted ``max_new_tokens``, times the number of beams) before generating.
+Requests that do not fit wait for others to finish, up to
+``MEMORY_ADMISSION_TIMEOUT``; requests larger than the whole budget are
+refused. The safe batch size and parallelism are derived from the budget and a
+reference request, and cap ``MAX_BATCH_SIZE`` and ``MAX_PARALLEL_REQUESTS``.
+"""
+
+import asyncio
+import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+from app.core.metrics import MEMORY_ADMISSION_WAIT_SECONDS, MEMORY_BUDGET_TOKENS, MEMORY_RESERVED_TOKENS
+from app.core.thread_plan import workers_per_node
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+class MemoryBudgetExceededError(RuntimeError):
+    """Raised when a request cannot be given the memory for its KV cache."""
+
+
+def kv_cache_bytes_per_token(config: Any, dtype_bytes: int) -> int:
+    """Get the KV cache footprint of one token from a transformers model config.
+
+    Layers with a sliding window are counted as full attention layers, so the
+    footprint is an upper bound for models mixing local and global attention.
+
+    Args:
+        config: The model config.
+        dtype_bytes: Size of a cache element, in bytes.
+
+    Returns:
+        int: Bytes of keys and values stored per token, over all layers.
+    """
+    config = getattr(config, "text_config", None) or config
+    num_heads = config.num_attention_heads
+    num_kv_heads = getattr(config, "num_key_value_heads", None) or num_heads
+    head_dim = getattr(config, "head_dim", None) or config.hidden_size // num_heads
+    return 2 * config.num_hidden_layers * num_kv_heads * head_dim * dtype_bytes
+
+
+def _read_int(path: str) -> Optional[int]:
+    """Read an integer from a file, or None when missing or unlimited."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def available_host_memory_bytes() -> int:
+    """Get the host memory available to the process, within its cgroup limit when it has one."""
+    candidates = []
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    candidates.append(int(line.split()[1]) * 1024)
+                    break
+    except (OSError, ValueError):
+        pass
+    for limit_path, usage_path in (
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes"),
+    ):
+        limit, usage = _read_int(limit_path), _read_int(usage_path)
+        # cgroup v1 reports "no limit" as a huge page-aligned number
+        if limit is not None and usage is not None and limit < 1 << 60:
+            candidates.append(max(0, limit - usage))
+            break
+    if not candidates:
+        candidates.append(os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE"))
+    return min(candidates)
+
+
+def available_memory_bytes(device: Any = None) -> int:
+    """Get the memory available for the KV cache of this worker.
+
+    Args:
+        device: Device the model runs on; CUDA devices report their free memory, others the host memory.
+
+    Returns:
+        int: Available bytes, split evenly between the inference workers of the node.
+    """
+    if getattr(device, "type", device) == "cuda":
+        import torch
+
+        free_bytes, _ = torch.cuda.mem_get_info(device)
+    else:
+        free_bytes = available_host_memory_bytes()
+    return free_bytes // workers_per_node()
+
+
+class MemoryBudget:
+    """Token budget of the KV cache, reserved by requests while they generate."""
+
+    def __init__(
+        self,
+        bytes_per_token: int,
+        available_bytes: int,
+        headroom: float = settings.MEMORY_HEADROOM,
+        admission_timeout: float = settings.MEMORY_ADMISSION_TIMEOUT,
+        reference_request_tokens: int = settings.MEMORY_REFERENCE_PROMPT_TOKENS + settings.DEFAULT_MAX_NEW_TOKENS,
+    ) -> None:
+        """Initialize the budget.
+
+        Args:
+            bytes_per_token: KV cache footprint of one token.
+            available_bytes: Memory available for the KV cache, before headroom.
+            headroom: Fraction of the available memory kept free.
+            admission_timeout: Seconds a request may wait for memory before being rejected.
+            reference_request_tokens: Tokens of a typical request (one beam), used to derive the safe batch size.
+        """
+        self.bytes_per_token = max(1, bytes_per_token)
+        self.available_bytes = available_bytes
+        self.headroom = headroom
+        self.admission_timeout = admission_timeout
+        self.reference_request_tokens = reference_request_tokens
+        self.max_tokens = max(0, int(available_bytes * (1 - headroom)) // self.bytes_per_token)
+        self.reserved_tokens = 0
+        self.waiting = 0
+        self._condition = asyncio.Condition()
+        MEMORY_BUDGET_TOKENS.set(self.max_tokens)
+
+    @staticmethod
+    def request_tokens(input_tokens: int, max_new_tokens: int, num_beams: int = 1) -> int:
+        """Get the worst-case number of KV cache tokens of a request."""
+        return (input_tokens + max_new_tokens) * max(1, num_beams)
+
+    def safe_concurrency(self, num_beams: int = 1) -> int:
+        """Get the number of reference requests whose KV caches fit in the budget at once (at least 1)."""
+        return max(1, self.max_tokens // (self.reference_request_tokens * max(1, num_beams)))
+
+    @asynccontextmanager
+    async def reserve(self, tokens: int) -> AsyncIterator[float]:
+        """Reserve KV cache tokens for the duration of a generation, waiting for them to be free.
+
+        Args:
+            tokens: Tokens to reserve, from ``request_tokens``.
+
+        Yields:
+            float: Seconds spent waiting for the reservation.
+
+        Raises:
+            MemoryBudgetExceededError: If the request exceeds the budget or waited past the admission timeout.
+        """
+        if tokens > self.max_tokens:
+            raise MemoryBudgetExceededError(
+                f"Request needs {tokens} KV cache tokens, more than the budget of {self.max_tokens}"
+            )
+        wait_start = time.perf_counter()
+        async with self._condition:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self.reserved_tokens + tokens <= self.max_tokens),
+                    self.admission_timeout,
+                )
+            except asyncio.TimeoutError:
+                raise MemoryBudgetExceededError(
+                    f"Timed out after {self.admission_timeout}s waiting for {tokens} KV cache tokens"
+                ) from None
+            finally:
+                self.waiting -= 1
+            self.reserved_tokens += tokens
+        waited = time.perf_counter() - wait_start
+        MEMORY_RESERVED_TOKENS.set(self.reserved_tokens)
+        MEMORY_ADMISSION_WAIT_SECONDS.observe(waited)
+        try:
+            yield waited
+        finally:
+            async with self._condition:
+                self.reserved_tokens -= tokens
+                self._condition.notify_all()
+            MEMORY_RESERVED_TOKENS.set(self.reserved_tokens)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the budget and its current usage as a JSON-serializable dict."""
+        return {
+            "bytes_per_token": self.bytes_per_token,
+            "available_bytes": self.available_bytes,
+            "headroom": self.headroom,
+            "max_tokens": self.max_tokens,
+            "reserved_tokens": self.reserved_tokens,
+            "waiting_requests": self.waiting,
+            "reference_request_tokens": self.reference_request_tokens,
+        }
+
+
+def create_memory_budget(backend: Any) -> Optional[MemoryBudget]:
+    """Measure the memory left after loading the model and build the budget of this worker.
+
+    Args:
+        backend: The loaded inference backend.
+
+    Returns:
+        Optional[MemoryBudget]: The budget, or None when disabled or the backend cannot estimate its KV cache.
+    """
+    if not settings.MEMORY_BUDGET_ENABLED:
+        return None
+    bytes_per_token = backend.kv_cache_bytes_per_token()
+    if bytes_per_token is None:
+        logger.warning("Backend does not report its KV cache size, memory budget disabled", backend=backend.name)
+        return None
+    if settings.MEMORY_BUDGET_MB > 0:
+        available_bytes = int(settings.MEMORY_BUDGET_MB * 1024 * 1024)
+    else:
+        available_bytes = available_memory_bytes(getattr(backend, "device", None))
+    budget = MemoryBudget(bytes_per_token, available_bytes)
+    logger.info("Memory budget computed", **budget.as_dict())
+    return budget
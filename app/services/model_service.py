@@ -1,24 +1,43 @@
 """LLM service class for loading and generating completions."""
 
-import os
+import time
 import warnings
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
-import numexpr as ne  # type: ignore
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer, logging  # type: ignore
+from pydantic import ValidationError
 
 from app.api.schemas import CompletionMetadata, CompletionResponse, Tone
 from app.core.app_logging import get_logger
 from app.core.config import get_settings
+from app.core.metrics import (
+    BATCH_SIZE,
+    CACHE_REQUESTS_TOTAL,
+    DECODE_SECONDS,
+    INPUT_TOKENS,
+    MODEL_LOAD_SECONDS,
+    OUTPUT_TOKENS,
+    PREFILL_SECONDS,
+    QUEUE_WAIT_SECONDS,
+    TOKENS_PER_SECOND,
+    decoding_profile,
+)
+from app.core.profiling import get_profiler
+from app.core.thread_plan import configure_threads
+from app.core.timing import StageTimings
+from app.services.autotuner import get_autotuner
+from app.services.backends import GenerationOutput, GenerationParams, get_backend
+from app.services.batching import BatchScheduler
+from app.services.degradation import DegradationLevel, DegradationPolicy, approximate_cache_key, quality_ladder
+from app.services.length_predictor import OutputLengthPredictor
+from app.services.lora_adapters import resolve_adapter
+from app.services.memory_budget import MemoryBudget, create_memory_budget
+from app.services.prompt_cache import build_prompt, normalize_text
 from app.services.redis_service import RedisService
+from app.services.reranker import CandidateReranker
 
-# Configure transformers logging
-logging.set_verbosity_error()
 warnings.filterwarnings("ignore")
 
-# Configure NumExpr threads
-ne.set_num_threads(ne.detect_number_of_cores())
-
 logger = get_logger(__name__)
 settings = get_settings()
 
@@ -28,14 +47,14 @@ class LLMService:
 
     _instance = None
     redis_service = RedisService()
+
     def __new__(cls):
         """Singleton pattern for LLMService."""
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance.device = torch.device(settings.DEVICE if torch.cuda.is_available() else "cpu")
-            cls._instance.tokenizer = None
-            cls._instance.model = None
-            print("Loading model")
+            # Thread pools must be sized before the backend runs its first operation
+            configure_threads()
+            cls._instance.backend = get_backend(settings.INFERENCE_BACKEND)
             cls._instance.load_model()
         return cls._instance
 
@@ -45,7 +64,7 @@ class LLMService:
 
     # @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     def load_model(self):
-        """Load LLM model and tokenizer with retry logic.
+        """Load the inference backend's model and tokenizer.
 
         Args:
             self: The LLMService instance
@@ -57,71 +76,93 @@ class LLMService:
             Exception: If the model fails to load
         """
         try:
-            logger.info("Loading LLM model and tokenizer", model_name=settings.BASE_MODEL)
+            load_start = time.perf_counter()
+            logger.info("Loading LLM model and tokenizer", backend=self.backend.name, model_name=settings.BASE_MODEL)
+            self.backend.load()
+            self.length_predictor = OutputLengthPredictor()
+            self.degradation = DegradationPolicy() if settings.DEGRADATION_ENABLED else None
+            self.reranker = CandidateReranker()
+            # Measured once the weights are loaded, so only memory left for the KV cache is budgeted
+            self.memory_budget = create_memory_budget(self.backend)
+            max_batch_size = settings.MAX_BATCH_SIZE
+            if self.backend.max_batch_size is not None:
+                max_batch_size = min(max_batch_size, self.backend.max_batch_size)
+            if self.memory_budget is not None:
+                max_batch_size = min(max_batch_size, self.memory_budget.safe_concurrency(self.num_beams))
+            self.batcher = BatchScheduler(
+                self._generate, mixed_adapters=self.backend.supports_adapters, max_batch_size=max_batch_size
+            )
+            load_seconds = time.perf_counter() - load_start
+            MODEL_LOAD_SECONDS.set(load_seconds)
+            logger.info("Model initialization complete", backend=self.backend.name, load_seconds=load_seconds)
 
-            # Suppress unnecessary warnings during model loading
-            os.environ["TRANSFORMERS_VERBOSITY"] = "error"
-            os.environ["TOKENIZERS_PARALLELISM"] = "true"
+        except Exception as e:
+            logger.error("Critical failure in model loading", error=str(e))
+            raise RuntimeError(f"Failed to initialize model: {str(e)}")
 
-            # Set GPU memory settings if using CUDA
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-                logger.info("Using CUDA device", device=str(self.device))
+    @property
+    def num_beams(self) -> int:
+        """Get the number of beams requests are served with."""
+        # Backends without beam search (ONNX Runtime, fake) are served with a single beam
+        return settings.DEFAULT_NUM_BEAMS if self.backend.supports_beam_search else 1
+
+    def max_parallel_requests(self) -> int:
+        """Get the number of requests that may be processed in parallel, capped by the memory budget."""
+        if self.memory_budget is None:
+            return settings.MAX_PARALLEL_REQUESTS
+        return min(settings.MAX_PARALLEL_REQUESTS, self.memory_budget.safe_concurrency(self.num_beams))
+
+    def cache_sizes(self) -> dict:
+        """Get the sizes of the in-process caches and queues, to watch for unbounded growth."""
+        sizes: dict = {
+            "length_predictor_keys": len(self.length_predictor.stats()),
+            "batcher": self.batcher.stats(),
+        }
+        prompt_cache = getattr(self.backend, "prompt_cache", None)
+        if prompt_cache is not None:
+            sizes["prompt_cache_entries"] = prompt_cache.stats()["entries"]
+        adapter_manager = getattr(self.backend, "adapter_manager", None)
+        if adapter_manager is not None:
+            sizes["lora_adapters_loaded"] = len(adapter_manager.stats()["loaded"])
+        if self.memory_budget is not None:
+            sizes["memory_reserved_tokens"] = self.memory_budget.reserved_tokens
+            sizes["memory_waiting_requests"] = self.memory_budget.waiting
+        return sizes
+
+    @asynccontextmanager
+    async def _reserve_memory(self, tokens: int, timings: StageTimings) -> AsyncIterator[None]:
+        """Hold KV cache memory for a generation, when a memory budget is enforced.
 
-            logger.info("Loading tokenizer", model_name=settings.BASE_MODEL)
-            try:
-                self.tokenizer = AutoTokenizer.from_pretrained(
-                    settings.BASE_MODEL, use_fast=True, progress_bar=True, trust_remote_code=True, timeout=60
-                )
-                if self.tokenizer.pad_token is None:
-                    self.tokenizer.pad_token = self.tokenizer.eos_token
-                logger.info("Tokenizer loaded successfully")
-            except Exception as e:
-                logger.error("Failed to load tokenizer", error=str(e))
-                raise
-
-            logger.info("Loading model", model_name=settings.BASE_MODEL)
-            try:
-                self._base_model = AutoModelForCausalLM.from_pretrained(
-                    settings.BASE_MODEL,
-                    trust_remote_code=True,
-                    low_cpu_mem_usage=True,
-                    torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-                    device_map="auto",
-                    offload_folder=settings.OFFLOAD_DIR,
-                )
+        Args:
+            tokens: Worst-case KV cache tokens of the request
+            timings: Stage timings receiving the time spent waiting for memory
 
-                # # Create offload directory if it doesn't exist
-                # os.makedirs(settings.OFFLOAD_DIR, exist_ok=True)
-                # from peft import PeftModel
-                # self.model = PeftModel.from_pretrained(
-                #     self._base_model,
-                #     settings.LORA_WEIGHTS,
-                #     torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-                #     device_map="auto",
-                #     offload_folder=settings.OFFLOAD_DIR,
-                # )
-                self.model = AutoModelForCausalLM.from_pretrained(
-                    "wassim249/ads-genius-gemma-3-1b-it-finetuned-merged",
-                    trust_remote_code=True,
-                    low_cpu_mem_usage=True,
-                    device_map="auto",
-                )
-                self.model.to(self.device)
-                self.model.eval()
-                logger.info("Model loaded successfully", device=str(self.device))
-            except Exception as e:
-                logger.error("Failed to load model", error=str(e))
-                raise
+        Raises:
+            MemoryBudgetExceededError: If the memory cannot be reserved
+        """
+        if self.memory_budget is None:
+            yield
+            return
+        async with self.memory_budget.reserve(tokens) as waited:
+            timings.record("memory_wait", waited)
+            yield
+
+    def _generate(
+        self, prompts: list, params: GenerationParams, adapters: list[str] | None = None
+    ) -> list[GenerationOutput]:
+        """Run a blocking batched generation, under the torch profiler when the request is captured.
 
-            torch.set_grad_enabled(False)
-            logger.info("Model initialization complete", device=str(self.device))
+        Args:
+            prompts: Prompt inputs returned by the backend's ``tokenize``
+            params: Decoding parameters shared by the batch
+            adapters: LoRA adapter of each prompt
 
-        except Exception as e:
-            logger.error("Critical failure in model loading", error=str(e))
-            raise RuntimeError(f"Failed to initialize model: {str(e)}")
+        Returns:
+            list[GenerationOutput]: One output per prompt
+        """
+        with get_profiler().profile_model():
+            return self.backend.generate_batch(prompts, params, adapters)
 
-    @torch.no_grad()
     async def get_completion(
         self,
         text: str,
@@ -132,6 +173,14 @@ class LLMService:
         do_sample: bool | None = None,
         repetition_penalty: float | None = None,
         tone: str | None = None,
+        use_cache: bool = True,
+        queue_wait_seconds: float | None = None,
+        timings: StageTimings | None = None,
+        include_timings: bool = False,
+        adapter: str | None = None,
+        adaptive_max_new_tokens: bool = True,
+        queue_depth: int | None = None,
+        num_candidates: int = 1,
     ) -> CompletionResponse:
         """Get LLM completions by appending predictions at the end of the text.
 
@@ -144,10 +193,19 @@ class LLMService:
             do_sample: Whether to use sampling vs greedy decoding
             repetition_penalty: Penalty for repeating tokens
             tone: Tone for the generated text
+            use_cache: Whether to read from and write to the Redis completion cache
+            queue_wait_seconds: Time the request spent in the request queue, recorded as a metric
+            timings: Stage timings of the request, filled in with each serving stage
+            include_timings: Whether to include the stage timings in the response metadata
+            adapter: LoRA adapter to generate with, defaulting to ``DEFAULT_ADAPTER``
+            adaptive_max_new_tokens: Whether to cap max_new_tokens at the predicted output length
+            queue_depth: Requests waiting in the request queue, driving the load-shedding quality ladder
+            num_candidates: Completions sampled in the same generate call and returned reranked, best first
 
         Returns:
             CompletionResponse with generated text and metadata
         """
+        started_at = time.perf_counter()
         try:
             # Use provided values or defaults from settings
             max_new_tokens = max_new_tokens or settings.DEFAULT_MAX_NEW_TOKENS
@@ -157,66 +215,306 @@ class LLMService:
             do_sample = do_sample if do_sample is not None else settings.DEFAULT_DO_SAMPLE
             repetition_penalty = repetition_penalty or settings.DEFAULT_REPETITION_PENALTY
             tone = tone or Tone.PROFESSIONAL
+            timings = timings if timings is not None else StageTimings()
+            adapter = resolve_adapter(adapter, settings.LORA_ADAPTERS if self.backend.supports_adapters else {})
+            num_beams = self.num_beams
+            # Under queue pressure, trade quality for latency
+            degradation = self._quality_level(queue_depth)
+            max_new_tokens, do_sample, num_beams = degradation.apply(max_new_tokens, do_sample, num_beams)
+            num_candidates, do_sample, num_beams = self._candidate_decoding(
+                num_candidates, degradation, do_sample, num_beams
+            )
+            # A cached completion is a single candidate; multi-candidate requests always generate
+            use_cache = use_cache and num_candidates == 1
+            labels = {
+                "tone": tone.value if isinstance(tone, Tone) else str(tone),
+                "profile": decoding_profile(do_sample, num_beams),
+            }
+            if queue_wait_seconds is not None:
+                QUEUE_WAIT_SECONDS.labels(**labels).observe(queue_wait_seconds)
+                timings.record("queue_wait", queue_wait_seconds)
 
             # Incorporate tone into the prompt if provided
-            if tone:
-                prompt = f"Create an ad copy in a {tone} tone for the following:\n\n{text}"
-            else:
-                prompt = f"Create an ad copy for the following:\n\n{text}"
+            text = normalize_text(text)
+            prompt = build_prompt(text, tone)
+            # Completions of different adapters are cached separately
+            cache_key = prompt if adapter is None else [adapter, prompt]
+
+            approximate_key = approximate_cache_key(text, labels["tone"], adapter)
 
             # Check if the prompt is already cached in Redis
-            cached_completion = await self.redis_service.get_completion(prompt)
-            if cached_completion:
+            cached, served_level = None, quality_ladder()[0]
+            if use_cache:
+                with timings.stage("cache_lookup"):
+                    cached, served_level = await self._lookup_cache(cache_key, approximate_key, degradation)
+            if cached:
                 return CompletionResponse(
-                    completions=[cached_completion],
-                    metadata=CompletionMetadata(input_tokens=len(prompt), output_tokens=len(cached_completion)),
+                    completions=[cached["completion"]],
+                    metadata=CompletionMetadata(
+                        **{
+                            **cached["metadata"],
+                            "cached": True,
+                            "degradation_level": served_level.level,
+                            "degradation": served_level.name,
+                            "timings": timings.as_milliseconds() if include_timings else None,
+                        }
+                    ),
                 )
 
-            messages = [{"role": "user", "content": [{"type": "text", "text": prompt}]}]
-
-            text = self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-
-            # Tokenize input
-            inputs = self.tokenizer(
-                [text],
-                return_tensors="pt",
-                max_length=max_new_tokens,
-                truncation=True,
-                padding=True,
-            )
-            inputs = inputs.to(self.device)
-            # Get model predictions
-            outputs = self.model.generate(
-                **inputs,
-                max_new_tokens=max_new_tokens,
+            # Render and tokenize the chat prompt, memoized per (tone, text)
+            prompt_inputs = self.backend.tokenize(text, tone, timings)
+            # Cap generation at the output length predicted for similar requests
+            input_tokens = self.backend.prompt_length(prompt_inputs)
+            effective_max_new_tokens = max_new_tokens
+            if adaptive_max_new_tokens and settings.ADAPTIVE_MAX_NEW_TOKENS:
+                effective_max_new_tokens = self.length_predictor.predict(labels["tone"], input_tokens, max_new_tokens)
+            params = GenerationParams(
+                max_new_tokens=effective_max_new_tokens,
                 temperature=temperature,
-                num_beams=5,
                 top_p=top_p,
                 top_k=top_k,
                 do_sample=do_sample,
                 repetition_penalty=repetition_penalty,
+                num_beams=num_beams,
+                num_return_sequences=num_candidates,
+            )
+            # Wait for KV cache memory, then generate in a worker thread, batched with concurrent requests
+            # sharing the decoding parameters
+            request_tokens = MemoryBudget.request_tokens(
+                input_tokens, effective_max_new_tokens, max(num_beams, num_candidates)
+            )
+            async with self._reserve_memory(request_tokens, timings):
+                submitted_at = time.perf_counter()
+                output = await self.batcher.submit(prompt_inputs, params, adapter)
+            generation_time = output.prefill_seconds + output.decode_seconds
+            timings.record("batch_wait", max(0.0, time.perf_counter() - submitted_at - generation_time))
+            timings.record("prefill", output.prefill_seconds)
+            timings.record("decode", output.decode_seconds)
+            token_counts = {
+                "input_tokens": output.input_tokens,
+                "output_tokens": sum(len(ids) for ids in output.token_ids),
+                "generation_time_seconds": generation_time,
+                "tokens_per_second": None,
+            }
+            if generation_time > 0:
+                token_counts["tokens_per_second"] = token_counts["output_tokens"] / generation_time
+            self._record_generation_metrics(labels, token_counts, output.batch_size, timings)
+            self.length_predictor.observe(
+                labels,
+                token_counts["input_tokens"],
+                max(len(ids) for ids in output.token_ids),
+                effective_max_new_tokens,
+                max_new_tokens,
             )
+            token_counts["max_new_tokens"] = effective_max_new_tokens
+            if adapter is not None:
+                token_counts["adapter"] = adapter
 
             # Decode the generated tokens
-            completions = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
-            print(completions)
-            if "\nmodel\n" in completions[0]:
-                completions[0] = completions[0].split("\nmodel\n")[-1]
-            # Cache the completion in Redis
-            await self.redis_service.set_completion(prompt, completions[0])
+            with timings.stage("detokenize"):
+                # Early stopping leaves the line break that completed the ad copy
+                completions = [completion.rstrip() for completion in self.backend.decode(output.token_ids)]
+            completions, scores = self._rerank(completions, output.logprobs, timings)
+            if queue_wait_seconds is not None:
+                self._observe_latency(queue_wait_seconds + time.perf_counter() - started_at, token_counts)
+            # Cache the completion in Redis; degraded completions are not cached so full quality returns with load
+            if use_cache and degradation.level == 0:
+                with timings.stage("cache_write"):
+                    await self._store_completion(cache_key, approximate_key, completions[0], token_counts)
 
             return CompletionResponse(
                 completions=completions,
+                scores=scores,
                 metadata=CompletionMetadata(
-                    input_tokens=inputs["input_ids"].shape[1],
-                    output_tokens=outputs.shape[1],
+                    **token_counts,
+                    num_candidates=num_candidates,
+                    degradation_level=degradation.level,
+                    degradation=degradation.name,
+                    timings=timings.as_milliseconds() if include_timings else None,
                 ),
             )
         except Exception as e:
             logger.error("Error in model inference", error=str(e))
             raise
 
+    async def run_canary(self, text: str, max_new_tokens: int) -> int:
+        """Generate a short greedy completion to check the model serves.
+
+        The canary decodes with a single beam and bypasses the completion cache, the request metrics and
+        the output length predictor, so that it neither loads the server nor skews its statistics.
+
+        Args:
+            text: Input text of the canary
+            max_new_tokens: Maximum number of new tokens to generate
+
+        Returns:
+            int: Number of generated tokens
+        """
+        timings = StageTimings()
+        prompt_inputs = self.backend.tokenize(normalize_text(text), Tone.PROFESSIONAL, timings)
+        params = GenerationParams(
+            max_new_tokens=max_new_tokens,
+            temperature=1.0,
+            top_p=1.0,
+            top_k=0,
+            do_sample=False,
+            repetition_penalty=1.0,
+            num_beams=1,
+        )
+        request_tokens = MemoryBudget.request_tokens(self.backend.prompt_length(prompt_inputs), max_new_tokens, 1)
+        async with self._reserve_memory(request_tokens, timings):
+            output = await self.batcher.submit(prompt_inputs, params)
+        return sum(len(ids) for ids in output.token_ids)
+
+    def has_backlog(self) -> bool:
+        """Whether a generation waits behind other work.
+
+        Returns:
+            bool: True if more than one batch is queued for or running in the generation thread, or if
+            requests are waiting for KV cache memory
+        """
+        memory_waiting = self.memory_budget.waiting if self.memory_budget is not None else 0
+        return self.batcher.backlog > 1 or memory_waiting > 0
+
+    def _observe_latency(self, latency_seconds: float, token_counts: dict) -> None:
+        """Feed the end-to-end latency of a generated request to the load-shedding policy and the autotuner."""
+        if self.degradation is not None:
+            self.degradation.observe_latency(latency_seconds)
+        autotuner = get_autotuner()
+        if autotuner is not None:
+            autotuner.observe(latency_seconds, token_counts["output_tokens"])
+
+    @staticmethod
+    def _candidate_decoding(
+        num_candidates: int, degradation: DegradationLevel, do_sample: bool, num_beams: int
+    ) -> tuple[int, bool, int]:
+        """Get the number of candidates to generate and the decoding they are generated with.
+
+        Candidates are sampled, since the beams of a beam search are near-duplicates of each other. Levels of
+        the quality ladder replacing sampling by greedy decoding serve a single candidate.
+
+        Args:
+            num_candidates: Requested number of candidates
+            degradation: Quality level the request is served at
+            do_sample: Whether sampling is used for a single completion
+            num_beams: Number of beams used for a single completion
+
+        Returns:
+            tuple[int, bool, int]: The number of candidates, ``do_sample`` and ``num_beams``
+        """
+        if num_candidates <= 1 or degradation.greedy:
+            return 1, do_sample, num_beams
+        return num_candidates, True, 1
+
+    def _rerank(
+        self, completions: list[str], logprobs: list[float] | None, timings: StageTimings
+    ) -> tuple[list[str], list[float] | None]:
+        """Sort candidate completions by reranking score, best first.
+
+        Args:
+            completions: Decoded candidates
+            logprobs: Mean token log-probability of each candidate, if scored
+            timings: Stage timings receiving the reranking time
+
+        Returns:
+            tuple: The sorted completions and their scores, or the single completion and None
+        """
+        if len(completions) < 2:
+            return completions, None
+        with timings.stage("rerank"):
+            ranked = self.reranker.rank(completions, logprobs)
+        return [candidate.text for candidate in ranked], [round(candidate.score, 4) for candidate in ranked]
+
+    def _quality_level(self, queue_depth: int | None) -> DegradationLevel:
+        """Get the quality level to serve a request at, full quality unless the queue is under pressure."""
+        if self.degradation is None or queue_depth is None:
+            return quality_ladder()[0]
+        return self.degradation.update(queue_depth)
+
+    async def _lookup_cache(
+        self, cache_key: str | list, approximate_key: list, degradation: DegradationLevel
+    ) -> tuple[dict | None, DegradationLevel]:
+        """Look up a cached completion, falling back to an approximate hit when the quality level allows it.
+
+        Args:
+            cache_key: Exact cache key of the request
+            approximate_key: Cache key shared by prompts with the same words
+            degradation: Quality level the request is served at
+
+        Returns:
+            tuple: The cached entry, if any, and the quality level it is served at
+        """
+        cached = self._servable_entry(await self.redis_service.get_completion(cache_key))
+        CACHE_REQUESTS_TOTAL.labels(tier="redis", result="hit" if cached else "miss").inc()
+        if cached or not degradation.approximate_cache:
+            return cached, quality_ladder()[0]
+        # Under heavy load, a completion for a prompt with the same words is good enough
+        cached = self._servable_entry(await self.redis_service.get_completion(approximate_key))
+        CACHE_REQUESTS_TOTAL.labels(tier="approximate", result="hit" if cached else "miss").inc()
+        return cached, degradation
+
+    @staticmethod
+    def _servable_entry(entry: dict | None) -> dict | None:
+        """Get a cached entry if a response can be built from it.
+
+        Entries whose completion or metadata do not validate, e.g. written without token counts, are treated
+        as cache misses and regenerated.
+
+        Args:
+            entry: Cached entry with ``completion`` and ``metadata`` keys, if any
+
+        Returns:
+            dict | None: The entry, or None when it is missing or malformed
+        """
+        if entry is None:
+            return None
+        try:
+            if not isinstance(entry["completion"], str):
+                raise TypeError("Cached completion is not a string")
+            CompletionMetadata.model_validate(entry.get("metadata"))
+        except (TypeError, ValidationError) as e:
+            logger.warning("Ignoring malformed cache entry", error=str(e))
+            return None
+        return entry
+
+    async def _store_completion(
+        self, cache_key: str | list, approximate_key: list, completion: str, token_counts: dict
+    ) -> None:
+        """Cache a completion, also under its approximate key when the quality ladder may serve it.
+
+        Args:
+            cache_key: Exact cache key of the request
+            approximate_key: Cache key shared by prompts with the same words
+            completion: The completion to cache
+            token_counts: Token counts and generation timings of the completion
+        """
+        await self.redis_service.set_completion(cache_key, completion, token_counts)
+        if self.degradation is not None:
+            await self.redis_service.set_completion(approximate_key, completion, token_counts)
+
+    @staticmethod
+    def _record_generation_metrics(labels: dict, token_counts: dict, batch_size: int, timings: StageTimings) -> None:
+        """Record Prometheus metrics for a single generate call.
+
+        Args:
+            labels: Metric labels (tone and decoding profile)
+            token_counts: Token counts and generation timings of the call
+            batch_size: Number of sequences passed to generate
+            timings: Stage timings holding the prefill and decode durations
+        """
+        BATCH_SIZE.labels(**labels).observe(batch_size)
+        INPUT_TOKENS.labels(**labels).observe(token_counts["input_tokens"])
+        OUTPUT_TOKENS.labels(**labels).observe(token_counts["output_tokens"])
+        PREFILL_SECONDS.labels(**labels).observe(timings.stages["prefill"])
+        DECODE_SECONDS.labels(**labels).observe(timings.stages["decode"])
+        if token_counts["tokens_per_second"] is not None:
+            TOKENS_PER_SECOND.labels(**labels).observe(token_counts["tokens_per_second"])
+
 
 def get_model_service() -> LLMService:
-    """Get the singleton instance of LLMService."""
+    """Get the singleton instance of LLMService.
+
+    The first call loads the model. The application makes this call at startup,
+    so importing the API modules loads no model.
+    """
     return LLMService()
@@ -0,0 +1,200 @@
+"""ONNX Runtime generation backend for CPU serving.
+
+The served model is exported to ONNX with KV-cache inputs and outputs
+(``python -m app.export_onnx``). ``OnnxGenerator`` then runs the decoding loop
+itself: one prefill pass over the prompt, followed by one single-token pass per
+new token feeding back the ``present.*`` cache outputs. Logits are processed with
+the same transformers logits processors as ``model.generate`` (repetition
+penalty, temperature, top-k, top-p), so sampling behaves identically.
+
+Beam search is not implemented: requests are served with a single beam.
+"""
+
+import os
+from typing import Any, Optional, Union
+
+import numpy as np
+import torch
+from transformers import (  # type: ignore
+    GenerationConfig,
+    LogitsProcessorList,
+    RepetitionPenaltyLogitsProcessor,
+    StoppingCriteriaList,
+    TemperatureLogitsWarper,
+    TopKLogitsWarper,
+    TopPLogitsWarper,
+)
+
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+_ONNX_TO_NUMPY_DTYPES = {"tensor(float)": np.float32, "tensor(float16)": np.float16}
+
+
+class OnnxGenerator:
+    """Autoregressive generation over an ONNX decoder exported with KV cache."""
+
+    def __init__(self, model_dir: str = settings.ONNX_MODEL_DIR, num_threads: int = settings.ONNX_NUM_THREADS) -> None:
+        """Create the ONNX Runtime session.
+
+        Args:
+            model_dir: Directory containing ``model.onnx``.
+            num_threads: Intra-op threads for ONNX Runtime (0 lets ONNX Runtime decide).
+        """
+        import onnxruntime as ort  # type: ignore
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.output_names = [node.name for node in self.session.get_outputs()]
+        self.past_inputs = [node for node in self.session.get_inputs() if node.name.startswith("past_key_values")]
+        try:
+            self.generation_config = GenerationConfig.from_pretrained(model_dir)
+        except OSError:
+            self.generation_config = GenerationConfig()
+        logger.info("ONNX model loaded", model_dir=model_dir, cache_tensors=len(self.past_inputs))
+
+    def kv_cache_bytes_per_token(self) -> int:
+        """Get the size of the cache tensors of one token, summed over the key and value inputs."""
+        total = 0
+        for node in self.past_inputs:
+            _, num_heads, _, head_dim = node.shape
+            total += num_heads * head_dim * np.dtype(_ONNX_TO_NUMPY_DTYPES.get(node.type, np.float32)).itemsize
+        return total
+
+    def _empty_past(self, batch_size: int) -> dict[str, np.ndarray]:
+        """Build an empty KV cache for the prefill pass."""
+        past = {}
+        for node in self.past_inputs:
+            # Shape is (batch, num_kv_heads, past_length, head_dim) with symbolic batch and length
+            _, num_heads, _, head_dim = node.shape
+            dtype = _ONNX_TO_NUMPY_DTYPES.get(node.type, np.float32)
+            past[node.name] = np.zeros((batch_size, num_heads, 0, head_dim), dtype=dtype)
+        return past
+
+    def _forward(
+        self, input_ids: np.ndarray, attention_mask: np.ndarray, past: dict[str, np.ndarray]
+    ) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """Run one decoder pass and return the last-position logits and the updated cache."""
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask, **past}
+        if "position_ids" in self.input_names:
+            position_ids = np.cumsum(attention_mask, axis=-1) - 1
+            position_ids[attention_mask == 0] = 1
+            feeds["position_ids"] = position_ids[:, -input_ids.shape[1] :]
+
+        outputs = dict(zip(self.output_names, self.session.run(None, feeds)))
+        present = {
+            name.replace("present", "past_key_values", 1): value
+            for name, value in outputs.items()
+            if name.startswith("present")
+        }
+        return outputs["logits"][:, -1, :], present
+
+    @staticmethod
+    def _build_processors(
+        temperature: float,
+        top_k: int,
+        top_p: float,
+        repetition_penalty: float,
+        do_sample: bool,
+        logits_processor: Optional[LogitsProcessorList],
+    ) -> LogitsProcessorList:
+        """Build the logits processors in the same order as ``model.generate``."""
+        processors = LogitsProcessorList()
+        if repetition_penalty and repetition_penalty != 1.0:
+            processors.append(RepetitionPenaltyLogitsProcessor(penalty=repetition_penalty))
+        if logits_processor:
+            processors.extend(logits_processor)
+        if do_sample:
+            if temperature and temperature != 1.0:
+                processors.append(TemperatureLogitsWarper(temperature))
+            if top_k and top_k > 0:
+                processors.append(TopKLogitsWarper(top_k=top_k, min_tokens_to_keep=1))
+            if top_p and top_p < 1.0:
+                processors.append(TopPLogitsWarper(top_p=top_p, min_tokens_to_keep=1))
+        return processors
+
+    def generate(
+        self,
+        input_ids: torch.Tensor,
+        attention_mask: torch.Tensor,
+        max_new_tokens: int,
+        eos_token_id: Optional[Union[int, list[int]]] = None,
+        pad_token_id: Optional[int] = None,
+        temperature: float = 1.0,
+        top_k: int = 0,
+        top_p: float = 1.0,
+        do_sample: bool = False,
+        repetition_penalty: float = 1.0,
+        logits_processor: Optional[LogitsProcessorList] = None,
+        stopping_criteria: Optional[StoppingCriteriaList] = None,
+        num_return_sequences: int = 1,
+        **_: Any,
+    ) -> torch.Tensor:
+        """Generate new tokens following the ``model.generate`` contract.
+
+        Args:
+            input_ids: Prompt ids of shape (batch, length).
+            attention_mask: Attention mask of the prompt.
+            max_new_tokens: Maximum number of new tokens to generate.
+            eos_token_id: Id(s) ending a sequence, defaulting to the exported generation config.
+            pad_token_id: Id filling finished sequences, defaulting to the exported generation config.
+            temperature: Sampling temperature.
+            top_k: Top-k sampling parameter.
+            top_p: Nucleus sampling parameter.
+            do_sample: Whether to sample rather than decode greedily.
+            repetition_penalty: Penalty for repeating tokens.
+            logits_processor: Additional logits processors, run after the repetition penalty.
+            stopping_criteria: Criteria finishing individual sequences before ``max_new_tokens``.
+            num_return_sequences: Sequences generated per prompt, on contiguous rows.
+            **_: Unsupported ``generate`` arguments (such as ``num_beams``), ignored.
+
+        Returns:
+            torch.Tensor: Prompt and generated ids of shape (batch * num_return_sequences, length + new tokens).
+        """
+        if num_return_sequences > 1:
+            input_ids = input_ids.repeat_interleave(num_return_sequences, dim=0)
+            attention_mask = attention_mask.repeat_interleave(num_return_sequences, dim=0)
+        processors = self._build_processors(temperature, top_k, top_p, repetition_penalty, do_sample, logits_processor)
+        eos_token_id = eos_token_id if eos_token_id is not None else self.generation_config.eos_token_id
+        pad_token_id = pad_token_id if pad_token_id is not None else self.generation_config.pad_token_id
+        eos_ids = torch.tensor(
+            [eos_token_id] if isinstance(eos_token_id, int) else eos_token_id or [], dtype=torch.long
+        )
+        sequences = input_ids.cpu()
+        mask = attention_mask.cpu().numpy().astype(np.int64)
+        past = self._empty_past(sequences.shape[0])
+        step_ids = sequences.numpy().astype(np.int64)
+        finished = torch.zeros(sequences.shape[0], dtype=torch.bool)
+        fill_id = pad_token_id if pad_token_id is not None else (int(eos_ids[0]) if len(eos_ids) else None)
+
+        for _ in range(max_new_tokens):
+            logits, past = self._forward(step_ids, mask, past)
+            scores = processors(sequences, torch.from_numpy(logits.astype(np.float32)))
+            if do_sample:
+                next_tokens = torch.multinomial(torch.softmax(scores, dim=-1), num_samples=1).squeeze(1)
+            else:
+                next_tokens = torch.argmax(scores, dim=-1)
+            if fill_id is not None:
+                next_tokens = torch.where(finished, torch.full_like(next_tokens, fill_id), next_tokens)
+
+            sequences = torch.cat([sequences, next_tokens[:, None]], dim=-1)
+            if len(eos_ids):
+                finished |= torch.isin(next_tokens, eos_ids)
+            if stopping_criteria:
+                finished |= stopping_criteria(sequences, scores)
+            if bool(finished.all()):
+                break
+            step_ids = next_tokens[:, None].numpy().astype(np.int64)
+            mask = np.concatenate([mask, np.ones((mask.shape[0], 1), dtype=np.int64)], axis=-1)
+
+        return sequences
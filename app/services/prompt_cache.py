@@ -0,0 +1,188 @@
+"""Memoized chat-template rendering and tokenization of prompts.
+
+Every prompt is the tone preamble followed by the user text, wrapped in the
+chat template. The template parts around the user text only depend on the
+tone, so they are rendered and tokenized once per tone and concatenated with
+the tokenized user text. Complete token sequences are additionally kept in a
+bounded LRU cache keyed by the rendered tone and the normalized text.
+"""
+
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Optional
+
+from app.api.schemas import Tone
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+from app.core.metrics import CACHE_REQUESTS_TOTAL, PROMPT_CACHE_ENTRIES, PROMPT_CACHE_SECONDS_SAVED_TOTAL
+from app.core.timing import StageTimings
+
+if TYPE_CHECKING:
+    import torch
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# Placeholder substituted for the user text when rendering the per-tone template parts
+_USER_TEXT_PLACEHOLDER = "USER_TEXT"
+# Text used to check that split tokenization matches tokenizing the full rendered prompt
+_PROBE_TEXT = "a reusable water bottle that keeps drinks cold for 24 hours."
+
+
+def normalize_text(text: str) -> str:
+    """Normalize user text so equivalent prompts share cache entries.
+
+    Args:
+        text: The user text.
+
+    Returns:
+        str: The NFC-normalized text without surrounding whitespace.
+    """
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def tone_label(tone: Any = None) -> str:
+    """Get the tone as written in the prompt.
+
+    Args:
+        tone: Tone for the generated text, a ``Tone`` or a string.
+
+    Returns:
+        str: The tone value, or an empty string without a tone.
+    """
+    if not tone:
+        return ""
+    return tone.value if isinstance(tone, Tone) else str(tone)
+
+
+def build_prompt(text: str, tone: Any = None) -> str:
+    """Build the instruction prompt for the given user text and tone.
+
+    Args:
+        text: The (normalized) user text.
+        tone: Tone for the generated text.
+
+    Returns:
+        str: The prompt sent to the model as the user message.
+    """
+    label = tone_label(tone)
+    if label:
+        return f"Create an ad copy in a {label} tone for the following:\n\n{text}"
+    return f"Create an ad copy for the following:\n\n{text}"
+
+
+class PromptTokenCache:
+    """Bounded LRU cache from (rendered tone, normalized text) to ready-to-use input ids."""
+
+    def __init__(self, tokenizer: Any, device: "torch.device", max_entries: int = settings.PROMPT_CACHE_SIZE) -> None:
+        """Initialize the prompt cache.
+
+        Args:
+            tokenizer: The model tokenizer.
+            device: Device on which the input ids are placed.
+            max_entries: Maximum number of cached token sequences (0 disables the LRU cache).
+        """
+        self.tokenizer = tokenizer
+        self.device = device
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str], torch.Tensor] = OrderedDict()
+        # Per-tone (prefix ids, suffix ids), or None when split tokenization is not exact for this tokenizer
+        self._template_parts: dict[str, Optional[tuple[list[int], list[int]]]] = {}
+        self._avg_miss_seconds = 0.0
+
+    def input_ids(self, text: str, tone: Any = None, timings: Optional[StageTimings] = None) -> "torch.Tensor":
+        """Get the input ids of the chat prompt for the given user text and tone.
+
+        Args:
+            text: The normalized user text.
+            tone: Tone for the generated text.
+            timings: Stage timings of the request.
+
+        Returns:
+            torch.Tensor: Input ids of shape (1, prompt_length) on the cache device.
+        """
+        key = (tone_label(tone), text)
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS_TOTAL.labels(tier="prompt", result="hit").inc()
+            PROMPT_CACHE_SECONDS_SAVED_TOTAL.inc(self._avg_miss_seconds)
+            return cached
+
+        # Imported here so that building prompts does not pull in torch
+        import torch
+
+        start = time.perf_counter()
+        input_ids = torch.tensor([self._encode(text, tone, timings)], dtype=torch.long, device=self.device)
+        elapsed = time.perf_counter() - start
+        self.misses += 1
+        self._avg_miss_seconds += (elapsed - self._avg_miss_seconds) / min(self.misses, 100)
+        CACHE_REQUESTS_TOTAL.labels(tier="prompt", result="miss").inc()
+
+        if self.max_entries > 0:
+            self._entries[key] = input_ids
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            PROMPT_CACHE_ENTRIES.set(len(self._entries))
+        return input_ids
+
+    def stats(self) -> dict:
+        """Get the cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "seconds_saved": self.hits * self._avg_miss_seconds,
+        }
+
+    def _render(self, text: str, tone: Any) -> str:
+        """Render the full chat prompt for the given user text and tone."""
+        messages = [{"role": "user", "content": [{"type": "text", "text": build_prompt(text, tone)}]}]
+        return self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+
+    def _tokenize(self, text: str, add_special_tokens: bool = False) -> list[int]:
+        """Tokenize a string into a list of ids."""
+        return self.tokenizer(text, add_special_tokens=add_special_tokens)["input_ids"]
+
+    def _encode(self, text: str, tone: Any, timings: Optional[StageTimings]) -> list[int]:
+        """Encode the chat prompt, reusing the per-tone template parts when possible."""
+        timings = timings if timings is not None else StageTimings()
+        with timings.stage("chat_template"):
+            parts = self._get_template_parts(tone)
+            rendered = self._render(text, tone) if parts is None else None
+
+        with timings.stage("tokenize"):
+            if parts is None:
+                return self._tokenize(rendered)
+            prefix_ids, suffix_ids = parts
+            return prefix_ids + self._tokenize(text) + suffix_ids
+
+    def _get_template_parts(self, tone: Any) -> Optional[tuple[list[int], list[int]]]:
+        """Get the tokenized template parts around the user text for a tone.
+
+        The parts are only used if concatenating them with a tokenized probe text
+        yields exactly the ids of the fully rendered and tokenized prompt.
+        """
+        tone_key = tone_label(tone)
+        if tone_key in self._template_parts:
+            return self._template_parts[tone_key]
+
+        parts = None
+        rendered = self._render(_USER_TEXT_PLACEHOLDER, tone)
+        if rendered.count(_USER_TEXT_PLACEHOLDER) == 1:
+            prefix, suffix = rendered.split(_USER_TEXT_PLACEHOLDER)
+            candidate = (self._tokenize(prefix), self._tokenize(suffix))
+            split_ids = candidate[0] + self._tokenize(_PROBE_TEXT) + candidate[1]
+            if split_ids == self._tokenize(self._render(_PROBE_TEXT, tone)):
+                parts = candidate
+
+        if parts is None:
+            logger.info("Split prompt tokenization is not exact, rendering full prompts", tone=tone_key)
+        self._template_parts[tone_key] = parts
+        return parts
@@ -3,6 +3,7 @@
 import hashlib
 import json
 import os
+from typing import Optional
 
 from redis.asyncio import Redis
 from redis.exceptions import ConnectionError
@@ -35,27 +36,53 @@ class RedisService:
             logger.error(f"Error initializing Redis connection: {e}")
             raise e
 
-    async def set_completion(self, args: dict, completion: str):
+    @staticmethod
+    def cache_key(args: dict) -> str:
+        """Hash the arguments of a completion request into its Redis key.
+
+        Args:
+            args: Dictionary of arguments used for the completion request
+
+        Returns:
+            The hex SHA-256 digest of the JSON-serialized arguments
+        """
+        return hashlib.sha256(json.dumps(args).encode()).hexdigest()
+
+    async def set_completion(self, args: dict, completion: str, metadata: Optional[dict] = None):
         """Store a model completion in Redis cache.
 
+        The completion is stored together with its token accounting so cache hits
+        can report the same metadata without re-tokenizing.
+
         Args:
             args: Dictionary of arguments used for the completion request
             completion: The generated completion text to cache
+            metadata: Token counts and generation timings of the completion
 
         Returns:
             None
         """
-        key = hashlib.sha256(json.dumps(args).encode()).hexdigest()
-        await self.redis.set(key, completion)
+        key = self.cache_key(args)
+        await self.redis.set(key, json.dumps({"completion": completion, "metadata": metadata or {}}))
 
-    async def get_completion(self, args: dict):
+    async def get_completion(self, args: dict) -> Optional[dict]:
         """Retrieve a cached completion from Redis.
 
         Args:
             args: Dictionary of arguments used for the completion request
 
         Returns:
-            The cached completion if found, otherwise None
+            The cached entry with ``completion`` and ``metadata`` keys if found, otherwise None.
+            Entries written before metadata was cached are treated as misses.
         """
-        key = hashlib.sha256(json.dumps(args).encode()).hexdigest()
-        return await self.redis.get(key)
+        key = self.cache_key(args)
+        value = await self.redis.get(key)
+        if value is None:
+            return None
+        try:
+            entry = json.loads(value)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        if not isinstance(entry, dict) or "completion" not in entry:
+            return None
+        return entry
@@ -0,0 +1,230 @@
+"""Replica selection for the request router.
+
+The pool tracks, for every model replica, the completions the router has in
+flight (count and estimated tokens) and the ``X-Queue-Size`` /
+``X-Active-Requests`` last reported by the replica. A replica is chosen by:
+
+- ``least_tokens``: fewest outstanding tokens, so long generations weigh more
+  than short ones,
+- ``power_of_two``: the shorter queue of two replicas drawn at random, which
+  avoids herding onto one replica from stale load reports,
+- ``round_robin``: in turn, as a baseline.
+
+With affinity, identical prompts go to the same replica (rendezvous hashing,
+so only the prompts of a replica that leaves the pool move), keeping its
+prompt and completion caches warm, unless that replica is more than
+``ROUTER_AFFINITY_MAX_LOAD`` times busier than the average.
+
+Replicas failing ``ROUTER_EJECT_FAILURES`` times in a row are ejected for
+``ROUTER_EJECT_SECONDS``; failed health checks take replicas out of rotation
+until they pass again.
+"""
+
+import hashlib
+import itertools
+import random
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.app_logging import get_logger
+from app.core.config import get_settings
+from app.core.metrics import ROUTER_AFFINITY_TOTAL, ROUTER_OUTSTANDING_TOKENS, ROUTER_REPLICA_AVAILABLE
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+POLICIES = ("least_tokens", "power_of_two", "round_robin")
+
+
+@dataclass
+class Replica:
+    """Load and health of a model replica, as seen by the router."""
+
+    url: str
+    outstanding_requests: int = 0
+    outstanding_tokens: int = 0
+    queue_size: int = 0  # Last X-Queue-Size reported by the replica
+    active_requests: int = 0  # Last X-Active-Requests reported by the replica
+    healthy: bool = True  # Result of the last health check
+    ejected_until: float = 0.0
+    consecutive_failures: int = 0
+    requests: int = 0
+    failures: int = 0
+
+    def available(self, now: float) -> bool:
+        """Whether the replica is in rotation."""
+        return self.healthy and now >= self.ejected_until
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting or running on the replica: its last report, or the router's in-flight ones if more."""
+        return max(self.queue_size + self.active_requests, self.outstanding_requests)
+
+    def as_dict(self, now: float) -> dict:
+        """Get the replica state."""
+        return {
+            "url": self.url,
+            "available": self.available(now),
+            "healthy": self.healthy,
+            "ejected_seconds_left": max(0.0, self.ejected_until - now),
+            "outstanding_requests": self.outstanding_requests,
+            "outstanding_tokens": self.outstanding_tokens,
+            "queue_size": self.queue_size,
+            "active_requests": self.active_requests,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+def _rendezvous_score(key: str, url: str) -> int:
+    """Hash weight of a replica for a key; the replica with the highest weight owns the key."""
+    return int.from_bytes(hashlib.blake2b(f"{key}|{url}".encode(), digest_size=8).digest(), "big")
+
+
+class ReplicaPool:
+    """Choose replicas by load and prompt affinity, and eject failing ones."""
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        policy: str = settings.ROUTER_POLICY,
+        affinity: bool = settings.ROUTER_AFFINITY_ENABLED,
+        affinity_max_load: float = settings.ROUTER_AFFINITY_MAX_LOAD,
+        eject_failures: int = settings.ROUTER_EJECT_FAILURES,
+        eject_seconds: float = settings.ROUTER_EJECT_SECONDS,
+    ) -> None:
+        """Initialize the pool.
+
+        Args:
+            urls: Base URLs of the replicas.
+            policy: ``least_tokens``, ``power_of_two`` or ``round_robin``.
+            affinity: Whether identical prompts are sent to the same replica.
+            affinity_max_load: Load of the affinity replica, relative to the average, above which it is bypassed.
+            eject_failures: Consecutive failures after which a replica is ejected.
+            eject_seconds: Time an ejected replica stays out of rotation.
+
+        Raises:
+            ValueError: If no replica is given or the policy is unknown.
+        """
+        if not urls:
+            raise ValueError("The router needs at least one replica")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown routing policy: {policy} (expected one of {', '.join(POLICIES)})")
+        self.replicas = [Replica(url=url.rstrip("/")) for url in urls]
+        self.policy = policy
+        self.affinity = affinity
+        self.affinity_max_load = affinity_max_load
+        self.eject_failures = max(1, eject_failures)
+        self.eject_seconds = eject_seconds
+        self._round_robin = itertools.count()
+        for replica in self.replicas:
+            ROUTER_REPLICA_AVAILABLE.labels(replica=replica.url).set(1)
+
+    def _load(self, replica: Replica) -> int:
+        """Load compared between replicas by the policy."""
+        return replica.outstanding_tokens if self.policy == "least_tokens" else replica.queue_depth
+
+    def choose(self, affinity_key: Optional[str] = None, exclude: Sequence[Replica] = ()) -> Optional[Replica]:
+        """Choose the replica for a request.
+
+        Args:
+            affinity_key: Key of the prompt, for affinity; None to balance on load only.
+            exclude: Replicas already tried for the request.
+
+        Returns:
+            Optional[Replica]: The replica, or None when no replica is available.
+        """
+        now = time.monotonic()
+        candidates = [replica for replica in self.replicas if replica.available(now) and replica not in exclude]
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+
+        if self.affinity and affinity_key is not None:
+            owner = max(candidates, key=lambda replica: _rendezvous_score(affinity_key, replica.url))
+            mean_load = sum(self._load(replica) for replica in candidates) / len(candidates)
+            # The bound keeps a hot prompt from piling onto its replica; the margin lets idle pools keep affinity
+            if self._load(owner) <= self.affinity_max_load * mean_load + self._affinity_margin():
+                ROUTER_AFFINITY_TOTAL.labels(result="hit").inc()
+                return owner
+            ROUTER_AFFINITY_TOTAL.labels(result="overloaded").inc()
+
+        if self.policy == "round_robin":
+            return candidates[next(self._round_robin) % len(candidates)]
+        if self.policy == "power_of_two":
+            first, second = random.sample(candidates, 2)
+            return first if first.queue_depth <= second.queue_depth else second
+        return min(candidates, key=lambda replica: (replica.outstanding_tokens, replica.queue_depth, random.random()))
+
+    def _affinity_margin(self) -> int:
+        """Absolute load allowed above the bound: one request, in the unit of the policy's load."""
+        if self.policy != "least_tokens":
+            return 1
+        in_flight = sum(replica.outstanding_requests for replica in self.replicas)
+        tokens = sum(replica.outstanding_tokens for replica in self.replicas)
+        return tokens // in_flight if in_flight else 1
+
+    def acquire(self, replica: Replica, tokens: int) -> None:
+        """Count a request sent to a replica.
+
+        Args:
+            replica: The replica.
+            tokens: Estimated tokens of the request.
+        """
+        replica.outstanding_requests += 1
+        replica.outstanding_tokens += tokens
+        replica.requests += 1
+        ROUTER_OUTSTANDING_TOKENS.labels(replica=replica.url).set(replica.outstanding_tokens)
+
+    def release(self, replica: Replica, tokens: int) -> None:
+        """Count a request to a replica as finished.
+
+        Args:
+            replica: The replica.
+            tokens: Estimated tokens of the request.
+        """
+        replica.outstanding_requests -= 1
+        replica.outstanding_tokens -= tokens
+        ROUTER_OUTSTANDING_TOKENS.labels(replica=replica.url).set(replica.outstanding_tokens)
+
+    def observe(self, replica: Replica, headers: Mapping[str, str]) -> None:
+        """Record the queue depth reported in the response headers of a replica."""
+        try:
+            replica.queue_size = int(headers.get("x-queue-size", replica.queue_size))
+            replica.active_requests = int(headers.get("x-active-requests", replica.active_requests))
+        except ValueError:
+            pass
+
+    def record_success(self, replica: Replica) -> None:
+        """Reset the failure count of a replica."""
+        replica.consecutive_failures = 0
+
+    def record_failure(self, replica: Replica) -> None:
+        """Count a failed request, ejecting the replica after too many in a row."""
+        replica.failures += 1
+        replica.consecutive_failures += 1
+        if replica.consecutive_failures >= self.eject_failures:
+            replica.ejected_until = time.monotonic() + self.eject_seconds
+            replica.consecutive_failures = 0
+            ROUTER_REPLICA_AVAILABLE.labels(replica=replica.url).set(0)
+            logger.warning("Replica ejected", replica=replica.url, seconds=self.eject_seconds)
+
+    def set_health(self, replica: Replica, healthy: bool) -> None:
+        """Record the result of a health check."""
+        if healthy != replica.healthy:
+            logger.warning("Replica health changed", replica=replica.url, healthy=healthy)
+        replica.healthy = healthy
+        ROUTER_REPLICA_AVAILABLE.labels(replica=replica.url).set(int(replica.available(time.monotonic())))
+
+    def status(self) -> dict:
+        """Get the policy and the state of every replica."""
+        now = time.monotonic()
+        return {
+            "policy": self.policy,
+            "affinity": self.affinity,
+            "available_replicas": sum(replica.available(now) for replica in self.replicas),
+            "replicas": [replica.as_dict(now) for replica in self.replicas],
+        }
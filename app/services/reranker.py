@@ -0,0 +1,135 @@
+"""Cheap reranking of the candidate completions of a request.
+
+Candidates are sampled in one generate call and ranked without another model
+pass. Each candidate gets a weighted sum of:
+
+- its likelihood: the mean log-probability of its tokens, from generation,
+- its length: minus the log-ratio distance of its word count to
+  ``RERANK_TARGET_WORDS``, penalizing truncated and rambling ads alike,
+- its format: the share of checks passed (ends on a complete sentence or a
+  hashtag line, no repeated lines).
+
+Candidates are then picked greedily by that score minus
+``RERANK_DIVERSITY_PENALTY`` times their largest word overlap (Jaccard) with
+the candidates already picked, so near-duplicates sink to the end.
+"""
+
+import math
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Characters ending a complete sentence
+_SENTENCE_END = (".", "!", "?", "…", '"', ")")
+_WORD = re.compile(r"[\w#']+")
+
+
+@dataclass(frozen=True)
+class RankedCandidate:
+    """A candidate completion with the parts of its score."""
+
+    text: str
+    score: float  # Final score, after the diversity penalty
+    likelihood: float  # Mean token log-probability (0 when not scored)
+    length: float  # Length score, at most 0
+    format: float  # Share of format checks passed, between 0 and 1
+    overlap: float  # Largest word overlap with a better-ranked candidate, between 0 and 1
+
+
+def format_score(text: str) -> float:
+    """Get the share of format checks an ad passes.
+
+    Args:
+        text: The candidate completion.
+
+    Returns:
+        float: Between 0 (empty or broken) and 1.
+    """
+    lines = [line.strip() for line in text.strip().split("\n") if line.strip()]
+    if not lines:
+        return 0.0
+    last = lines[-1]
+    complete = last.endswith(_SENTENCE_END) or all(word.startswith("#") for word in last.split())
+    distinct_lines = len({line.lower() for line in lines}) / len(lines)
+    return (float(complete) + distinct_lines) / 2
+
+
+def length_score(words: int, target_words: int) -> float:
+    """Get minus the log-ratio distance of a word count to the target (0 when the target is disabled)."""
+    if target_words <= 0:
+        return 0.0
+    return -abs(math.log((words + 1) / (target_words + 1)))
+
+
+def word_overlap(first: set[str], second: set[str]) -> float:
+    """Get the Jaccard similarity of two word sets."""
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+class CandidateReranker:
+    """Rank candidate completions by likelihood, length, format and diversity."""
+
+    def __init__(
+        self,
+        likelihood_weight: float = settings.RERANK_LIKELIHOOD_WEIGHT,
+        length_weight: float = settings.RERANK_LENGTH_WEIGHT,
+        target_words: int = settings.RERANK_TARGET_WORDS,
+        format_weight: float = settings.RERANK_FORMAT_WEIGHT,
+        diversity_penalty: float = settings.RERANK_DIVERSITY_PENALTY,
+    ) -> None:
+        """Initialize the reranker.
+
+        Args:
+            likelihood_weight: Weight of the mean token log-probability.
+            length_weight: Weight of the length score.
+            target_words: Preferred length of a candidate, in words (0 disables the length score).
+            format_weight: Weight of the format score.
+            diversity_penalty: Penalty per unit of word overlap with better-ranked candidates.
+        """
+        self.likelihood_weight = likelihood_weight
+        self.length_weight = length_weight
+        self.target_words = target_words
+        self.format_weight = format_weight
+        self.diversity_penalty = diversity_penalty
+
+    def rank(self, texts: Sequence[str], logprobs: Optional[Sequence[float]] = None) -> list[RankedCandidate]:
+        """Rank candidate completions, best first.
+
+        Args:
+            texts: The candidate completions.
+            logprobs: Mean token log-probability of each candidate, if scored during generation.
+
+        Returns:
+            list[RankedCandidate]: The candidates with their scores, best first.
+        """
+        words = [set(_WORD.findall(text.lower())) for text in texts]
+        parts = []
+        for index, text in enumerate(texts):
+            likelihood = logprobs[index] if logprobs is not None else 0.0
+            length = length_score(len(text.split()), self.target_words)
+            fmt = format_score(text)
+            base = self.likelihood_weight * likelihood + self.length_weight * length + self.format_weight * fmt
+            parts.append((base, likelihood, length, fmt))
+
+        ranked: list[RankedCandidate] = []
+        picked: list[int] = []
+        remaining = list(range(len(texts)))
+        while remaining:
+            best, best_score, best_overlap = remaining[0], -math.inf, 0.0
+            for index in remaining:
+                overlap = max((word_overlap(words[index], words[other]) for other in picked), default=0.0)
+                score = parts[index][0] - self.diversity_penalty * overlap
+                if score > best_score:
+                    best, best_score, best_overlap = index, score, overlap
+            _, likelihood, length, fmt = parts[best]
+            ranked.append(RankedCandidate(texts[best], best_score, likelihood, length, fmt, best_overlap))
+            picked.append(best)
+            remaining.remove(best)
+        return ranked
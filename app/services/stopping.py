@@ -0,0 +1,122 @@
+"""Ad-aware early stopping of generation.
+
+Ad copy has a recognizable end: a line of hashtags, a call-to-action line, a
+run of blank lines after the body, or a fixed number of paragraphs. Generating
+past that point only produces tokens that are thrown away, so generation stops
+as soon as the completed lines of a sequence match one of the rules.
+
+Rules are evaluated on complete lines only, and only at steps where the new
+token contains a line break, so the per-step cost is a single ``isin`` check.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import torch
+from transformers import StoppingCriteria  # type: ignore
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class AdStopRules:
+    """Rules deciding that generated ad copy is complete."""
+
+    hashtag_line: bool = True  # Stop after a line made only of hashtags
+    cta_markers: tuple[str, ...] = ()  # Stop after a line containing one of these markers (case-insensitive)
+    max_blank_lines: int = 0  # Stop after this many consecutive blank lines (0 disables)
+    max_paragraphs: int = 0  # Stop after this many paragraphs (0 disables)
+
+    @classmethod
+    def from_settings(cls) -> Optional["AdStopRules"]:
+        """Build the rules from the settings, or None when early stopping is disabled."""
+        if not settings.STOPPING_ENABLED:
+            return None
+        return cls(
+            hashtag_line=settings.STOP_AFTER_HASHTAG_LINE,
+            cta_markers=tuple(marker.lower() for marker in settings.STOP_CTA_MARKERS),
+            max_blank_lines=settings.STOP_MAX_BLANK_LINES,
+            max_paragraphs=settings.STOP_MAX_PARAGRAPHS,
+        )
+
+    def stop_reason(self, text: str) -> Optional[str]:
+        """Check the complete lines of generated text against the rules.
+
+        Args:
+            text: Generated text so far; the part after the last line break is ignored.
+
+        Returns:
+            Optional[str]: The rule that matched (``hashtags``, ``cta``, ``blank_lines`` or ``paragraphs``), if any.
+        """
+        lines = text.split("\n")[:-1]
+        blank_run = 0
+        paragraphs = 0
+        in_paragraph = False
+        for line in lines:
+            stripped = line.strip()
+            if not stripped:
+                blank_run += 1
+                if in_paragraph:
+                    in_paragraph = False
+                    paragraphs += 1
+                    if self.max_paragraphs and paragraphs >= self.max_paragraphs:
+                        return "paragraphs"
+                if self.max_blank_lines and blank_run >= self.max_blank_lines and paragraphs:
+                    return "blank_lines"
+                continue
+            blank_run = 0
+            in_paragraph = True
+            if self.hashtag_line and all(word.startswith("#") for word in stripped.split()):
+                return "hashtags"
+            if self.cta_markers and any(marker in stripped.lower() for marker in self.cta_markers):
+                return "cta"
+        return None
+
+
+def newline_token_ids(tokenizer: Any) -> torch.Tensor:
+    """Get the ids of every token whose text contains a line break.
+
+    Args:
+        tokenizer: The model tokenizer.
+
+    Returns:
+        torch.Tensor: The token ids.
+    """
+    ids = [
+        token_id
+        for token, token_id in tokenizer.get_vocab().items()
+        # Plain text, byte-level BPE ("Ċ") and SentencePiece byte fallback spellings of "\n"
+        if "\n" in token or "Ċ" in token or token == "<0x0A>"
+    ]
+    return torch.tensor(sorted(ids), dtype=torch.long)
+
+
+class AdStoppingCriteria(StoppingCriteria):
+    """Stop each sequence once its generated text forms complete ad copy."""
+
+    def __init__(self, tokenizer: Any, rules: AdStopRules, newline_ids: torch.Tensor) -> None:
+        """Initialize the stopping criteria.
+
+        Args:
+            tokenizer: Tokenizer used to decode the generated ids.
+            rules: Ad copy completion rules.
+            newline_ids: Ids of the tokens containing a line break.
+        """
+        self.tokenizer = tokenizer
+        self.rules = rules
+        self.newline_ids = newline_ids
+        # Length of the (possibly padded) prompt, known at the first call made after the first new token
+        self.prompt_length: Optional[int] = None
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs: Any) -> torch.BoolTensor:
+        """Flag the sequences whose last token completed a line matching a rule."""
+        if self.prompt_length is None:
+            self.prompt_length = input_ids.shape[1] - 1
+        done = torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+        completed_line = torch.isin(input_ids[:, -1], self.newline_ids.to(input_ids.device))
+        for row in completed_line.nonzero().flatten().tolist():
+            text = self.tokenizer.decode(input_ids[row, self.prompt_length :], skip_special_tokens=True)
+            done[row] = self.rules.stop_reason(text) is not None
+        return done
@@ -0,0 +1 @@
+"""Benchmarks for the Ads Genius AI service."""
@@ -0,0 +1,95 @@
+"""Benchmark eager vs compiled (static KV cache, bucketed) generation throughput.
+
+Usage:
+    python -m benchmarks.compile_benchmark --model wassim249/ads-genius-gemma-3-1b-it-finetuned-merged
+"""
+
+import argparse
+import json
+import time
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer  # type: ignore
+
+from app.services.compilation import CompiledGenerator
+
+PROMPTS = [
+    "a reusable water bottle that keeps drinks cold for 24 hours",
+    "an online banking service focused on personalized customer service",
+    "a language learning app with five-minute daily lessons and a streak system",
+    "handmade leather wallets with RFID protection and a lifetime warranty",
+]
+
+
+def encode(tokenizer, prompt: str) -> torch.Tensor:
+    """Render and tokenize a prompt with the chat template."""
+    messages = [
+        {"role": "user", "content": [{"type": "text", "text": f"Create an ad copy for the following:\n\n{prompt}"}]}
+    ]
+    text = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+    return tokenizer(text, return_tensors="pt", add_special_tokens=False)["input_ids"]
+
+
+def run(generate, prompts: list[torch.Tensor], repeats: int) -> dict:
+    """Time generation over the prompts and return throughput statistics."""
+    latencies = []
+    new_tokens = 0
+    for _ in range(repeats):
+        for input_ids in prompts:
+            start = time.perf_counter()
+            new_tokens += generate(input_ids)
+            latencies.append(time.perf_counter() - start)
+    total = sum(latencies)
+    return {
+        "requests": len(latencies),
+        "new_tokens": new_tokens,
+        "tokens_per_second": new_tokens / total if total else 0.0,
+        "mean_latency_seconds": total / len(latencies),
+    }
+
+
+def main() -> None:
+    """Run the eager and compiled benchmarks and print a JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True, help="Model name or path")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--num-beams", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    torch.set_grad_enabled(False)
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    model = AutoModelForCausalLM.from_pretrained(args.model).eval()
+    prompts = [encode(tokenizer, prompt) for prompt in PROMPTS]
+    # min_new_tokens keeps the decode length fixed so both modes generate the same number of tokens
+    generate_kwargs = {
+        "max_new_tokens": args.max_new_tokens,
+        "min_new_tokens": args.max_new_tokens,
+        "num_beams": args.num_beams,
+        "do_sample": False,
+    }
+
+    def eager(input_ids: torch.Tensor) -> int:
+        outputs = model.generate(input_ids, attention_mask=torch.ones_like(input_ids), **generate_kwargs)
+        return outputs.shape[1] - input_ids.shape[1]
+
+    report = {"eager": run(eager, prompts, args.repeats)}
+
+    compile_start = time.perf_counter()
+    generator = CompiledGenerator(model)
+    generator.warm_up(tokenizer.pad_token_id, [generate_kwargs])
+    report["compile_warm_up_seconds"] = time.perf_counter() - compile_start
+
+    def compiled(input_ids: torch.Tensor) -> int:
+        outputs, inputs = generator.generate(input_ids, tokenizer.pad_token_id, **generate_kwargs)
+        return outputs.shape[1] - inputs["input_ids"].shape[1]
+
+    report["compiled"] = run(compiled, prompts, args.repeats)
+    report["speedup"] = report["compiled"]["tokens_per_second"] / report["eager"]["tokens_per_second"]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Import-time benchmark of the service entry points, with stored baselines.
+
+Each module is imported in a fresh interpreter under ``python -X importtime``
+(``--repeats`` times, the median is kept). The report gives the cumulative
+import time of the module, the modules with the largest self time, and which
+heavy dependencies (torch, transformers, numpy, langchain, ...) the import
+pulled in. Importing the API must stay cheap: the model and its runtimes are
+only loaded at application startup.
+
+``run`` prints the results and saves them with ``--save``; ``compare`` runs the
+imports again (or loads ``--current``) and flags modules whose import time grew
+by over ``--threshold`` or that now pull in a heavy dependency, exiting with
+status 1.
+
+Usage:
+    python -m benchmarks.import_time run --save benchmarks/baselines/import_time.json
+    python -m benchmarks.import_time compare --baseline benchmarks/baselines/import_time.json
+    python -m benchmarks.import_time run --module cli --path data
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Optional
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "import_time.json")
+DEFAULT_MODULES = ["app.main"]
+# Top-level packages that should only be imported when a model or client is actually used
+HEAVY_MODULES = (
+    "torch",
+    "transformers",
+    "tokenizers",
+    "numpy",
+    "numexpr",
+    "onnxruntime",
+    "peft",
+    "langchain_core",
+    "langchain_openai",
+    "openai",
+)
+
+
+def parse_importtime(output: str) -> list[dict[str, Any]]:
+    """Parse the ``-X importtime`` report of an interpreter.
+
+    Args:
+        output: Standard error of the interpreter.
+
+    Returns:
+        list[dict[str, Any]]: Imported modules in import order, with self and cumulative times in milliseconds.
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        entries.append(
+            {"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000}
+        )
+    return entries
+
+
+def measure_import(module: str, path: Optional[str]) -> list[dict[str, Any]]:
+    """Import a module in a fresh interpreter and parse its import times.
+
+    Args:
+        module: Module to import.
+        path: Directory prepended to ``PYTHONPATH``, for entry points outside the package root.
+
+    Returns:
+        list[dict[str, Any]]: Imported modules with their self and cumulative times.
+
+    Raises:
+        RuntimeError: If the import fails.
+    """
+    env = dict(os.environ)
+    if path:
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.abspath(path), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        raise RuntimeError(f"Importing {module} failed: {error}")
+    return parse_importtime(result.stderr)
+
+
+def benchmark_module(module: str, path: Optional[str], repeats: int, top: int) -> dict[str, Any]:
+    """Benchmark the import of a module.
+
+    Args:
+        module: Module to import.
+        path: Directory prepended to ``PYTHONPATH``.
+        repeats: Number of fresh interpreters to import the module in.
+        top: Number of modules with the largest self time to report.
+
+    Returns:
+        dict[str, Any]: Median and minimum import time, slowest modules and heavy dependencies imported.
+    """
+    runs = []
+    for _ in range(repeats):
+        entries = measure_import(module, path)
+        total = next((entry["cumulative_ms"] for entry in entries if entry["module"] == module), None)
+        if total is None:
+            total = sum(entry["self_ms"] for entry in entries)
+        runs.append((total, entries))
+    totals = [total for total, _ in runs]
+    median_total = statistics.median(totals)
+    # Report the slowest modules of the run closest to the median
+    _, entries = min(runs, key=lambda run: abs(run[0] - median_total))
+    imported = {entry["module"].split(".")[0] for entry in entries}
+    return {
+        "import_ms": median_total,
+        "min_import_ms": min(totals),
+        "modules_imported": len(entries),
+        "heavy_modules": sorted(name for name in HEAVY_MODULES if name in imported),
+        "slowest": sorted(entries, key=lambda entry: entry["self_ms"], reverse=True)[:top],
+    }
+
+
+def run_imports(args: argparse.Namespace) -> dict[str, Any]:
+    """Benchmark the selected modules and return the results."""
+    from benchmarks.stage_benchmark import environment
+
+    results = {}
+    for module in args.module or DEFAULT_MODULES:
+        results[module] = benchmark_module(module, args.path, args.repeats, args.top)
+        heavy = ", ".join(results[module]["heavy_modules"]) or "none"
+        print(f"{module:>20}: {results[module]['import_ms']:9.1f} ms, heavy: {heavy}", file=sys.stderr, flush=True)
+    return {"environment": environment(), "modules": results}
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[dict[str, Any]]:
+    """Compare import times against a baseline.
+
+    Args:
+        baseline: Baseline results.
+        current: Current results.
+        threshold: Relative increase of the import time flagged as a regression.
+
+    Returns:
+        list[dict[str, Any]]: Per-module ratios and newly imported heavy dependencies, with a ``regression`` flag.
+    """
+    rows = []
+    for module, result in current["modules"].items():
+        reference = baseline["modules"].get(module)
+        if reference is None:
+            continue
+        time_ratio = result["import_ms"] / reference["import_ms"] if reference["import_ms"] else None
+        new_heavy = sorted(set(result["heavy_modules"]) - set(reference["heavy_modules"]))
+        rows.append(
+            {
+                "module": module,
+                "baseline_import_ms": reference["import_ms"],
+                "import_ms": result["import_ms"],
+                "time_ratio": time_ratio,
+                "new_heavy_modules": new_heavy,
+                "regression": bool(new_heavy) or (time_ratio is not None and time_ratio > 1 + threshold),
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    """Run the import-time benchmark, or compare it against a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Run the import-time benchmark")
+    compare_parser = subparsers.add_parser("compare", help="Compare against a baseline")
+    for subparser in (run_parser, compare_parser):
+        subparser.add_argument("--module", action="append", help="Module to import (repeatable, default: app.main)")
+        subparser.add_argument("--path", default=None, help="Directory prepended to PYTHONPATH")
+        subparser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per module")
+        subparser.add_argument("--top", type=int, default=15, help="Slowest modules to report")
+    run_parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, default=None, help="Save as a baseline")
+    compare_parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results")
+    compare_parser.add_argument("--current", default=None, help="Current results (default: run the imports)")
+    compare_parser.add_argument("--threshold", type=float, default=0.25, help="Relative regression threshold")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_imports(args)
+        if args.save:
+            os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+            with open(args.save, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+        print(json.dumps(results, indent=2))
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        args.module = args.module or list(baseline["modules"])
+        current = run_imports(args)
+    rows = compare(baseline, current, args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        heavy = f", new heavy imports: {', '.join(row['new_heavy_modules'])}" if row["new_heavy_modules"] else ""
+        print(f"{row['module']:>20}: {row['time_ratio']:.2f}x{heavy}  {flag}")
+    if any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
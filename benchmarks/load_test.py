@@ -0,0 +1,286 @@
+"""HTTP load test of the completion API.
+
+The load test drives ``POST /api/complete`` with prompts and ``max_new_tokens``
+drawn from a prompt file, either:
+
+- closed loop: ``--concurrency`` clients each sending their next request as
+  soon as the previous one completes, or
+- open loop: requests arriving as a Poisson process at ``--rate`` requests per
+  second, regardless of how fast they complete.
+
+By default the application runs in-process (``app.main:app`` over an ASGI
+transport) with the deterministic fake backend and an in-memory Redis
+stand-in, so results are comparable across serving changes on any Linux box
+without weights, GPU or network. ``--url`` targets a running server instead.
+
+The JSON report gives throughput, p50/p95/p99 latency and queue wait (from the
+``Server-Timing`` header), the cache hit rate and error counts.
+
+The prompt file holds one prompt per line, either plain text or a JSON object
+with ``text`` and optional ``max_new_tokens``, ``tone`` and ``weight``.
+
+Usage:
+    python -m benchmarks.load_test --mode closed --concurrency 16 --duration 30
+    python -m benchmarks.load_test --mode open --rate 20 --duration 30 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from typing import Any, Optional
+
+DEFAULT_PROMPT_FILE = os.path.join(os.path.dirname(__file__), "prompts.jsonl")
+
+
+def percentile(values: list[float], q: float) -> Optional[float]:
+    """Get the q-th percentile of the values (nearest rank), or None without values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def summarize(values: list[float]) -> dict[str, Optional[float]]:
+    """Get the mean, p50, p95, p99 and maximum of the values."""
+    return {
+        "mean": statistics.fmean(values) if values else None,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+def load_prompts(path: str) -> list[dict[str, Any]]:
+    """Load the request mix from a prompt file.
+
+    Args:
+        path: File with one plain-text prompt or JSON object per line.
+
+    Returns:
+        list[dict[str, Any]]: Request specs with ``text`` and optional ``max_new_tokens``, ``tone`` and ``weight``.
+    """
+    prompts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            prompts.append(json.loads(line) if line.startswith("{") else {"text": line})
+    if not prompts:
+        raise ValueError(f"No prompts in {path}")
+    return prompts
+
+
+def server_timing(header: Optional[str], name: str) -> Optional[float]:
+    """Get the duration of a ``Server-Timing`` entry, in seconds."""
+    for entry in (header or "").split(","):
+        parts = entry.strip().split(";")
+        if parts[0] == name:
+            for part in parts[1:]:
+                if part.startswith("dur="):
+                    return float(part[4:]) / 1000
+    return None
+
+
+class LoadTest:
+    """Send completion requests and collect their outcomes."""
+
+    def __init__(
+        self,
+        client: Any,
+        prompts: list[dict[str, Any]],
+        max_new_tokens: list[int],
+        unique_fraction: float,
+        seed: int,
+    ) -> None:
+        """Initialize the load test.
+
+        Args:
+            client: ``httpx.AsyncClient`` bound to the application.
+            prompts: Request specs from the prompt file.
+            max_new_tokens: Values drawn for prompts that do not set ``max_new_tokens``.
+            unique_fraction: Fraction of requests made unique, so that they miss the completion cache.
+            seed: Seed of the request mix.
+        """
+        self.client = client
+        self.prompts = prompts
+        self.weights = [float(prompt.get("weight", 1.0)) for prompt in prompts]
+        self.max_new_tokens = max_new_tokens
+        self.unique_fraction = unique_fraction
+        self.sent = 0
+        self.random = random.Random(seed)
+        self.results: list[dict[str, Any]] = []
+
+    def next_request(self) -> dict[str, Any]:
+        """Draw the body of the next request from the mix."""
+        prompt = self.random.choices(self.prompts, weights=self.weights)[0]
+        body = {key: value for key, value in prompt.items() if key != "weight"}
+        body.setdefault("max_new_tokens", self.random.choice(self.max_new_tokens))
+        self.sent += 1
+        if self.random.random() < self.unique_fraction:
+            body["text"] = f"{body['text']} (offer {self.sent})"
+        return body
+
+    async def send(self, record: bool = True) -> dict[str, Any]:
+        """Send one request and record its outcome.
+
+        Args:
+            record: Whether to keep the outcome for the report.
+
+        Returns:
+            dict[str, Any]: The outcome: status, latency, queue wait and, on success, cache and token details.
+        """
+        body = self.next_request()
+        start = time.perf_counter()
+        result: dict[str, Any] = {"max_new_tokens": body["max_new_tokens"]}
+        try:
+            response = await self.client.post("/api/complete", json=body)
+            result["status"] = response.status_code
+            result["queue_wait"] = server_timing(response.headers.get("server-timing"), "queue_wait")
+            if response.status_code == 200:
+                metadata = response.json()["metadata"]
+                result["cached"] = metadata.get("cached", False)
+                result["output_tokens"] = metadata.get("output_tokens", 0)
+                result["degradation"] = metadata.get("degradation", "full")
+        except Exception as e:
+            result["status"] = type(e).__name__
+        result["latency"] = time.perf_counter() - start
+        if record:
+            self.results.append(result)
+        return result
+
+    async def closed_loop(self, concurrency: int, duration: float, max_requests: Optional[int]) -> None:
+        """Run clients sending back-to-back requests until the duration or request count is reached."""
+        deadline = time.perf_counter() + duration
+        sent = 0
+
+        async def client() -> None:
+            nonlocal sent
+            while time.perf_counter() < deadline and (max_requests is None or sent < max_requests):
+                sent += 1
+                await self.send()
+
+        await asyncio.gather(*[client() for _ in range(concurrency)])
+
+    async def open_loop(self, rate: float, duration: float, max_requests: Optional[int]) -> None:
+        """Start requests at Poisson arrival times, then wait for the outstanding ones."""
+        deadline = time.perf_counter() + duration
+        tasks = []
+        while time.perf_counter() < deadline and (max_requests is None or len(tasks) < max_requests):
+            tasks.append(asyncio.create_task(self.send()))
+            await asyncio.sleep(self.random.expovariate(rate))
+        await asyncio.gather(*tasks)
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        """Aggregate the recorded outcomes."""
+        ok = [result for result in self.results if result["status"] == 200]
+        generated = [result for result in ok if not result["cached"]]
+        return {
+            "requests": len(self.results),
+            "successful": len(ok),
+            "errors": dict(Counter(str(result["status"]) for result in self.results if result["status"] != 200)),
+            "duration_seconds": elapsed,
+            "throughput_rps": len(ok) / elapsed if elapsed > 0 else None,
+            "output_tokens_per_second": sum(result["output_tokens"] for result in generated) / elapsed
+            if elapsed > 0
+            else None,
+            "latency_seconds": summarize([result["latency"] for result in ok]),
+            "generated_latency_seconds": summarize([result["latency"] for result in generated]),
+            "queue_wait_seconds": summarize(
+                [result["queue_wait"] for result in ok if result["queue_wait"] is not None]
+            ),
+            "cache_hit_rate": (len(ok) - len(generated)) / len(ok) if ok else None,
+            "degradation": dict(Counter(result["degradation"] for result in ok)),
+        }
+
+
+def configure_stub_environment(args: argparse.Namespace) -> None:
+    """Point the in-process application at the fake backend before its settings are loaded."""
+    os.environ.setdefault("INFERENCE_BACKEND", args.backend)
+    os.environ.setdefault("DEVICE", "cpu")
+    os.environ.setdefault("HEALTH_CANARY_ENABLED", "false")
+    if args.decode_ms_per_token is not None:
+        os.environ["FAKE_DECODE_SECONDS_PER_TOKEN"] = str(args.decode_ms_per_token / 1000)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the load test against the in-process application or ``--url``."""
+    import httpx
+
+    prompts = load_prompts(args.prompts)
+    max_new_tokens = [int(value) for value in args.max_new_tokens.split(",")]
+    timeout = httpx.Timeout(args.timeout)
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=timeout)
+        lifespan = None
+    else:
+        configure_stub_environment(args)
+        from app.main import app
+        from benchmarks.stubs import use_in_memory_redis
+
+        use_in_memory_redis()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test", timeout=timeout)
+        lifespan = app.router.lifespan_context(app)
+
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            load_test = LoadTest(client, prompts, max_new_tokens, args.unique_fraction, args.seed)
+            for _ in range(args.warmup):
+                await load_test.send(record=False)
+            start = time.perf_counter()
+            if args.mode == "closed":
+                await load_test.closed_loop(args.concurrency, args.duration, args.requests)
+            else:
+                await load_test.open_loop(args.rate, args.duration, args.requests)
+            elapsed = time.perf_counter() - start
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output",) and value is not None}
+    return {"config": config, **load_test.report(elapsed)}
+
+
+def main() -> None:
+    """Run the load test and print (and optionally save) the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed", help="Closed or open loop")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clients in closed loop")
+    parser.add_argument("--rate", type=float, default=10.0, help="Arrival rate in open loop, in requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to send requests for")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many requests")
+    parser.add_argument("--warmup", type=int, default=2, help="Unrecorded requests sent first")
+    parser.add_argument("--prompts", default=DEFAULT_PROMPT_FILE, help="Prompt file (text or JSON lines)")
+    parser.add_argument("--max-new-tokens", default="32,64", help="Comma-separated values drawn per request")
+    parser.add_argument(
+        "--unique-fraction", type=float, default=0.9, help="Fraction of requests made unique to miss the cache"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the request mix")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Request timeout, in seconds")
+    parser.add_argument("--url", default=None, help="Base URL of a running server (default: in-process app)")
+    parser.add_argument("--backend", default="fake", help="Inference backend of the in-process app")
+    parser.add_argument(
+        "--decode-ms-per-token", type=float, default=None, help="Simulated decode latency of the fake backend"
+    )
+    parser.add_argument("--output", default=None, help="File to write the JSON report to")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(rendered)
+    print(rendered)
+
+
+if __name__ == "__main__":
+    main()
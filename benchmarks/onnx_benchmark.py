@@ -0,0 +1,63 @@
+"""Check ONNX Runtime parity with transformers and compare their latency.
+
+Greedy decoding must produce identical token ids on both backends; the script
+exits with a non-zero status otherwise. Latency is then measured for both.
+
+Usage:
+    python -m app.export_onnx --model <model> --output onnx_model
+    python -m benchmarks.onnx_benchmark --model <model> --onnx-dir onnx_model
+"""
+
+import argparse
+import json
+import sys
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer  # type: ignore
+
+from app.services.onnx_generator import OnnxGenerator
+from benchmarks.compile_benchmark import PROMPTS, encode, run
+
+
+def main() -> int:
+    """Run the parity check and latency comparison and print a JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True, help="Model name or path exported to ONNX")
+    parser.add_argument("--onnx-dir", required=True, help="Directory produced by app.export_onnx")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    torch.set_grad_enabled(False)
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForCausalLM.from_pretrained(args.model).eval()
+    onnx_generator = OnnxGenerator(args.onnx_dir)
+    prompts = [encode(tokenizer, prompt) for prompt in PROMPTS]
+    generate_kwargs = {"max_new_tokens": args.max_new_tokens, "do_sample": False, "repetition_penalty": 1.1}
+
+    def transformers_generate(input_ids: torch.Tensor) -> torch.Tensor:
+        return model.generate(input_ids, attention_mask=torch.ones_like(input_ids), num_beams=1, **generate_kwargs)
+
+    def onnx_generate(input_ids: torch.Tensor) -> torch.Tensor:
+        return onnx_generator.generate(input_ids, torch.ones_like(input_ids), **generate_kwargs)
+
+    mismatches = []
+    for prompt, input_ids in zip(PROMPTS, prompts):
+        expected = transformers_generate(input_ids)[0].tolist()
+        actual = onnx_generate(input_ids)[0].tolist()
+        if expected != actual:
+            mismatches.append({"prompt": prompt, "transformers": expected, "onnxruntime": actual})
+
+    report = {
+        "parity": not mismatches,
+        "mismatches": mismatches,
+        "transformers": run(lambda ids: transformers_generate(ids).shape[1] - ids.shape[1], prompts, args.repeats),
+        "onnxruntime": run(lambda ids: onnx_generate(ids).shape[1] - ids.shape[1], prompts, args.repeats),
+    }
+    report["speedup"] = report["onnxruntime"]["tokens_per_second"] / report["transformers"]["tokens_per_second"]
+    print(json.dumps(report, indent=2))
+    return 0 if report["parity"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Benchmark of the request router against local stub replicas.
+
+Each routing configuration (policy, with or without prompt affinity) is run
+against fresh in-process stub replicas (``benchmarks.stubs.create_stub_replica``),
+some of them slower than the others, over ASGI transports: no network, model
+or GPU is needed. Prompts repeat, so affinity shows up as replica cache hits.
+With ``--fail-replica``, one replica starts failing halfway through the run, to
+check that it is ejected and its traffic moves to the others.
+
+The JSON report gives, per configuration, the latency percentiles, throughput,
+cache hit rate, errors and the share of requests served by each replica.
+
+Usage:
+    python -m benchmarks.router_benchmark --replicas 4 --slow-replicas 1 --requests 400
+    python -m benchmarks.router_benchmark --policies power_of_two --fail-replica 0 --output router.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+from typing import Any
+
+from benchmarks.load_test import DEFAULT_PROMPT_FILE, load_prompts, summarize
+
+
+async def run_configuration(args: argparse.Namespace, policy: str, affinity: bool) -> dict[str, Any]:
+    """Route a workload through one routing configuration.
+
+    Args:
+        args: Benchmark arguments.
+        policy: Routing policy.
+        affinity: Whether prompt affinity is enabled.
+
+    Returns:
+        dict[str, Any]: Latency, throughput, cache hit rate, errors and per-replica share.
+    """
+    import httpx
+
+    from app.router import create_router_application
+    from app.services.replica_pool import ReplicaPool
+    from benchmarks.stubs import create_stub_replica
+
+    replicas = {}
+    for index in range(args.replicas):
+        slowdown = args.slow_factor if index >= args.replicas - args.slow_replicas else 1.0
+        replicas[f"http://replica-{index}"] = create_stub_replica(
+            decode_seconds_per_token=args.decode_ms_per_token / 1000 * slowdown,
+            max_parallel_requests=args.replica_parallelism,
+        )
+    replica_client = httpx.AsyncClient(
+        mounts={url: httpx.ASGITransport(app=replica) for url, replica in replicas.items()},
+        timeout=httpx.Timeout(args.timeout),
+    )
+    pool = ReplicaPool(list(replicas), policy=policy, affinity=affinity)
+    router_app = create_router_application(pool=pool, client=replica_client)
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=router_app), base_url="http://router", timeout=httpx.Timeout(args.timeout)
+    )
+
+    prompts = load_prompts(args.prompts)
+    max_new_tokens = [int(value) for value in args.max_new_tokens.split(",")]
+    rng = random.Random(args.seed)
+    results: list[dict[str, Any]] = []
+    sent = 0
+
+    async def send() -> None:
+        nonlocal sent
+        sent += 1
+        if args.fail_replica is not None and sent == args.requests // 2:
+            replicas[f"http://replica-{args.fail_replica}"].state.failing = True
+        prompt = rng.choice(prompts)
+        text = prompt["text"] if rng.random() >= args.unique_fraction else f"{prompt['text']} (offer {sent})"
+        body = {"text": text, "tone": prompt.get("tone", "professional"), "max_new_tokens": rng.choice(max_new_tokens)}
+        start = time.perf_counter()
+        result: dict[str, Any] = {}
+        try:
+            response = await client.post("/api/complete", json=body)
+            result["status"] = response.status_code
+            result["replica"] = response.headers.get("x-replica")
+            result["cached"] = response.status_code == 200 and response.json()["metadata"]["cached"]
+        except Exception as e:
+            result["status"] = type(e).__name__
+        result["latency"] = time.perf_counter() - start
+        results.append(result)
+
+    async def worker() -> None:
+        while sent < args.requests:
+            await send()
+
+    lifespan = router_app.router.lifespan_context(router_app)
+    async with replica_client, client:
+        await lifespan.__aenter__()
+        try:
+            start = time.perf_counter()
+            await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+            elapsed = time.perf_counter() - start
+            pool_status = pool.status()
+        finally:
+            await lifespan.__aexit__(None, None, None)
+
+    ok = [result for result in results if result["status"] == 200]
+    served = Counter(result["replica"] for result in ok)
+    return {
+        "policy": policy,
+        "affinity": affinity,
+        "requests": len(results),
+        "successful": len(ok),
+        "errors": dict(Counter(str(result["status"]) for result in results if result["status"] != 200)),
+        "throughput_rps": len(ok) / elapsed if elapsed > 0 else None,
+        "latency_seconds": summarize([result["latency"] for result in ok]),
+        "cache_hit_rate": sum(result["cached"] for result in ok) / len(ok) if ok else None,
+        "replica_share": {url: served[url] / len(ok) if ok else 0.0 for url in replicas},
+        "ejected_replicas": [replica["url"] for replica in pool_status["replicas"] if not replica["available"]],
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run every routing configuration and collect their reports."""
+    configurations = []
+    for policy in args.policies.split(","):
+        for affinity in {"on": [True], "off": [False], "both": [False, True]}[args.affinity]:
+            report = await run_configuration(args, policy, affinity)
+            configurations.append(report)
+            print(
+                f"{policy:>13} affinity={'on ' if affinity else 'off'}: "
+                f"p50 {report['latency_seconds']['p50'] or 0:.3f}s, p95 {report['latency_seconds']['p95'] or 0:.3f}s, "
+                f"{report['throughput_rps'] or 0:.1f} req/s, cache hits {report['cache_hit_rate'] or 0:.0%}, "
+                f"errors {sum(report['errors'].values())}",
+                flush=True,
+            )
+    config = {key: value for key, value in vars(args).items() if key != "output" and value is not None}
+    return {"config": config, "configurations": configurations}
+
+
+def main() -> None:
+    """Run the router benchmark and print (and optionally save) the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--policies", default="round_robin,least_tokens,power_of_two", help="Policies to compare")
+    parser.add_argument("--affinity", choices=("on", "off", "both"), default="both", help="Prompt affinity")
+    parser.add_argument("--replicas", type=int, default=4, help="Stub replicas")
+    parser.add_argument("--slow-replicas", type=int, default=1, help="Replicas slower than the others")
+    parser.add_argument("--slow-factor", type=float, default=3.0, help="Slowdown of the slow replicas")
+    parser.add_argument("--replica-parallelism", type=int, default=4, help="Completions each replica runs at once")
+    parser.add_argument("--decode-ms-per-token", type=float, default=1.0, help="Simulated decode time per token")
+    parser.add_argument("--requests", type=int, default=400, help="Requests per configuration")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--prompts", default=DEFAULT_PROMPT_FILE, help="Prompt file (text or JSON lines)")
+    parser.add_argument("--max-new-tokens", default="16,64,256", help="Comma-separated values drawn per request")
+    parser.add_argument("--unique-fraction", type=float, default=0.3, help="Fraction of requests made unique")
+    parser.add_argument("--fail-replica", type=int, default=None, help="Replica failing from halfway through")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the request mix")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Request timeout, in seconds")
+    parser.add_argument("--output", default=None, help="File to write the JSON report to")
+    args = parser.parse_args()
+
+    # Health checks often enough to see the failing replica within the run
+    os.environ.setdefault("ROUTER_HEALTH_INTERVAL_SECONDS", "0.5")
+    os.environ.setdefault("LOG_CONSOLE", "false")
+    report = asyncio.run(run(args))
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(rendered)
+    print(rendered)
+
+
+if __name__ == "__main__":
+    main()
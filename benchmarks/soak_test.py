@@ -0,0 +1,281 @@
+"""Long-run soak test of the serving stack, watching memory for leaks.
+
+The application runs in-process (``app.main:app`` over an ASGI transport, with
+the fake backend and a bounded in-memory Redis stand-in by default) under a
+closed-loop synthetic load for ``--duration`` seconds. Every ``--interval``
+seconds it takes a memory snapshot (``app.core.memory_snapshot``, the same one
+``GET /api/admin/memory`` returns): RSS, the Python heap traced by
+``tracemalloc``, live torch tensors and the sizes of the in-process caches.
+
+Samples taken during ``--warmup`` are reported but not used as the baseline,
+so caches filling up to their bounds are not mistaken for leaks. The JSON
+report holds the time series, the growth of each metric since the baseline
+(and its rate per hour), the allocation sites whose memory grew the most, and
+caches that grew at every sample. The run fails (exit status 1) when RSS or
+heap growth exceeds ``--max-rss-growth`` / ``--max-heap-growth`` (and
+``--min-growth-bytes``, as bounded caches keep filling on short runs), or the
+live tensor count grows by more than ``--max-tensor-growth``.
+
+Usage:
+    python -m benchmarks.soak_test --duration 3600 --interval 60 --output soak.json
+    INFERENCE_BACKEND=transformers python -m benchmarks.soak_test --backend transformers --duration 1800
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Optional
+
+from benchmarks.load_test import DEFAULT_PROMPT_FILE, LoadTest, configure_stub_environment, load_prompts
+
+
+def flatten(values: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    """Flatten nested numeric values into dotted names."""
+    flat: dict[str, float] = {}
+    for key, value in values.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def growth(samples: list[dict[str, Any]], key: str) -> Optional[dict[str, Any]]:
+    """Get the growth of a metric from the first to the last sample, and its least-squares rate.
+
+    Args:
+        samples: Post-warmup samples, with ``elapsed_seconds`` and the metric.
+        key: Name of the metric.
+
+    Returns:
+        Optional[dict[str, Any]]: Baseline and final values, absolute and relative growth and rate per hour,
+        or None without values.
+    """
+    points = [(sample["elapsed_seconds"], sample[key]) for sample in samples if sample.get(key) is not None]
+    if not points:
+        return None
+    baseline, final = points[0][1], points[-1][1]
+    rate = None
+    if len(points) > 1:
+        mean_t = sum(t for t, _ in points) / len(points)
+        mean_v = sum(v for _, v in points) / len(points)
+        variance = sum((t - mean_t) ** 2 for t, _ in points)
+        if variance > 0:
+            rate = sum((t - mean_t) * (v - mean_v) for t, v in points) / variance * 3600
+    return {
+        "baseline": baseline,
+        "final": final,
+        "growth": final - baseline,
+        "relative_growth": (final - baseline) / baseline if baseline else None,
+        "rate_per_hour": rate,
+    }
+
+
+def monotonic_caches(samples: list[dict[str, Any]]) -> list[str]:
+    """Get the caches whose size grew at every post-warmup sample, a typical sign of a leak."""
+    if len(samples) < 3:
+        return []
+    series: dict[str, list[float]] = {}
+    for sample in samples:
+        for name, value in sample["caches"].items():
+            series.setdefault(name, []).append(value)
+    return sorted(
+        name
+        for name, values in series.items()
+        if len(values) == len(samples) and all(later > earlier for earlier, later in zip(values, values[1:]))
+    )
+
+
+class SoakTest:
+    """Drive load against the application and sample its memory."""
+
+    def __init__(self, load_test: LoadTest, model_service: Any, queue: Any, top: int) -> None:
+        """Initialize the soak test.
+
+        Args:
+            load_test: Load generator bound to the application.
+            model_service: The application's model service.
+            queue: The application's request queue.
+            top: Number of allocation sites reported.
+        """
+        self.load_test = load_test
+        self.model_service = model_service
+        self.queue = queue
+        self.top = top
+        self.outcomes: Counter = Counter()
+        self.samples: list[dict[str, Any]] = []
+        self.start = time.perf_counter()
+
+    async def client(self, deadline: float) -> None:
+        """Send back-to-back requests until the deadline, counting the outcomes only."""
+        while time.perf_counter() < deadline:
+            result = await self.load_test.send(record=False)
+            self.outcomes[str(result["status"])] += 1
+
+    def sample(self, warmup: bool) -> dict[str, Any]:
+        """Take a memory snapshot and add it to the time series."""
+        from app.core.memory_snapshot import memory_snapshot
+
+        snapshot = memory_snapshot(self.model_service, self.queue, top=0)
+        tensors = snapshot["tensors"] or {}
+        sample = {
+            "elapsed_seconds": time.perf_counter() - self.start,
+            "warmup": warmup,
+            "requests": sum(self.outcomes.values()),
+            "errors": sum(count for status, count in self.outcomes.items() if status != "200"),
+            "rss_bytes": snapshot["rss_bytes"],
+            "heap_bytes": snapshot["python_heap"].get("traced_bytes"),
+            "tensors": tensors.get("tensors"),
+            "tensor_bytes": tensors.get("bytes"),
+            "gc_objects": snapshot["gc"]["objects"],
+            "caches": flatten(snapshot["caches"]),
+        }
+        self.samples.append(sample)
+        print(
+            f"[{sample['elapsed_seconds']:8.1f}s] requests {sample['requests']:>8}, "
+            f"rss {(sample['rss_bytes'] or 0) / 2**20:8.1f} MiB, heap {(sample['heap_bytes'] or 0) / 2**20:8.1f} MiB, "
+            f"tensors {sample['tensors']}, objects {sample['gc_objects']}{' (warmup)' if warmup else ''}",
+            file=sys.stderr,
+            flush=True,
+        )
+        return sample
+
+
+def evaluate(samples: list[dict[str, Any]], args: argparse.Namespace) -> tuple[dict[str, Any], list[str]]:
+    """Compute the growth of the post-warmup samples and check it against the thresholds.
+
+    Returns:
+        tuple[dict[str, Any], list[str]]: Growth per metric, and the threshold violations.
+    """
+    steady = [sample for sample in samples if not sample["warmup"]]
+    metrics = {key: growth(steady, key) for key in ("rss_bytes", "heap_bytes", "tensors", "tensor_bytes", "gc_objects")}
+    failures = []
+    checks = (("rss_bytes", args.max_rss_growth), ("heap_bytes", args.max_heap_growth))
+    for key, limit in checks:
+        result = metrics[key]
+        if result is None or result["relative_growth"] is None or result["growth"] <= args.min_growth_bytes:
+            continue
+        if result["relative_growth"] > limit:
+            failures.append(f"{key} grew by {result['relative_growth']:.1%} (limit {limit:.1%})")
+    tensors = metrics["tensors"]
+    if tensors is not None and tensors["growth"] > args.max_tensor_growth:
+        failures.append(f"live tensors grew by {tensors['growth']} (limit {args.max_tensor_growth})")
+    return metrics, failures
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the soak test against the in-process application."""
+    import httpx
+
+    configure_stub_environment(args)
+    from app.core.queue import get_queue
+    from app.main import app
+    from app.services.model_service import get_model_service
+    from benchmarks.stubs import use_in_memory_redis
+
+    use_in_memory_redis(args.redis_max_entries)
+    prompts = load_prompts(args.prompts)
+    max_new_tokens = [int(value) for value in args.max_new_tokens.split(",")]
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://soak-test", timeout=httpx.Timeout(args.timeout)
+    )
+    lifespan = app.router.lifespan_context(app)
+
+    async with client:
+        await lifespan.__aenter__()
+        try:
+            if args.trace_frames > 0:
+                tracemalloc.start(args.trace_frames)
+            load_test = LoadTest(client, prompts, max_new_tokens, args.unique_fraction, args.seed)
+            soak = SoakTest(load_test, get_model_service(), get_queue(), args.top)
+            deadline = soak.start + args.duration
+            clients = [asyncio.create_task(soak.client(deadline)) for _ in range(args.concurrency)]
+            baseline_heap: Optional[tracemalloc.Snapshot] = None
+            soak.sample(warmup=args.warmup > 0)
+            while time.perf_counter() < deadline:
+                await asyncio.sleep(min(args.interval, max(0.0, deadline - time.perf_counter())))
+                warmup = time.perf_counter() - soak.start < args.warmup
+                soak.sample(warmup)
+                if not warmup and baseline_heap is None and tracemalloc.is_tracing():
+                    baseline_heap = tracemalloc.take_snapshot()
+            await asyncio.gather(*clients)
+            allocation_growth = []
+            if baseline_heap is not None:
+                final_heap = tracemalloc.take_snapshot()
+                allocation_growth = [
+                    {
+                        "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                        "growth_bytes": stat.size_diff,
+                        "bytes": stat.size,
+                        "blocks": stat.count,
+                    }
+                    for stat in final_heap.compare_to(baseline_heap, "lineno")[: args.top]
+                    if stat.size_diff > 0
+                ]
+        finally:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            await lifespan.__aexit__(None, None, None)
+
+    metrics, failures = evaluate(soak.samples, args)
+    steady = [sample for sample in soak.samples if not sample["warmup"]]
+    config = {key: value for key, value in vars(args).items() if key != "output" and value is not None}
+    return {
+        "config": config,
+        "passed": not failures,
+        "failures": failures,
+        "requests": dict(soak.outcomes),
+        "growth": metrics,
+        "monotonic_caches": monotonic_caches(steady),
+        "allocation_growth": allocation_growth,
+        "samples": soak.samples,
+    }
+
+
+def main() -> None:
+    """Run the soak test, print (and optionally save) the JSON report and fail on memory growth."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=600.0, help="Seconds to run the load for")
+    parser.add_argument("--interval", type=float, default=30.0, help="Seconds between memory samples")
+    parser.add_argument("--warmup", type=float, default=60.0, help="Seconds before the baseline sample")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--prompts", default=DEFAULT_PROMPT_FILE, help="Prompt file (text or JSON lines)")
+    parser.add_argument("--max-new-tokens", default="32,64", help="Comma-separated values drawn per request")
+    parser.add_argument("--unique-fraction", type=float, default=0.9, help="Fraction of requests made unique")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the request mix")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Request timeout, in seconds")
+    parser.add_argument("--backend", default="fake", help="Inference backend of the in-process app")
+    parser.add_argument(
+        "--decode-ms-per-token", type=float, default=None, help="Simulated decode latency of the fake backend"
+    )
+    parser.add_argument("--redis-max-entries", type=int, default=10000, help="Keys kept by the Redis stand-in")
+    parser.add_argument("--trace-frames", type=int, default=1, help="tracemalloc frames (0 disables heap tracing)")
+    parser.add_argument("--top", type=int, default=15, help="Allocation sites reported")
+    parser.add_argument("--max-rss-growth", type=float, default=0.1, help="Allowed relative RSS growth")
+    parser.add_argument("--max-heap-growth", type=float, default=0.1, help="Allowed relative Python heap growth")
+    parser.add_argument(
+        "--min-growth-bytes", type=int, default=4 * 2**20, help="Growth too small to fail the run, in bytes"
+    )
+    parser.add_argument("--max-tensor-growth", type=int, default=0, help="Allowed growth of the live tensor count")
+    parser.add_argument("--output", default=None, help="File to write the JSON report to")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(rendered)
+    print(rendered)
+    for failure in report["failures"]:
+        print(f"FAILED: {failure}", file=sys.stderr)
+    if not report["passed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
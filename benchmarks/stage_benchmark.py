@@ -0,0 +1,308 @@
+"""Micro-benchmarks of the ``LLMService.get_completion`` pipeline stages, with stored baselines.
+
+Each stage is timed in rounds of calibrated iteration counts (median time per
+operation over the rounds) and traced once with ``tracemalloc`` for the Python
+memory it allocates (peak and net bytes per operation; native allocations, such
+as torch tensor storage, are not traced).
+
+Stages:
+
+- ``build_prompt``: instruction prompt building,
+- ``cache_key``: Redis cache key hashing of a request,
+- ``cache_entry_serialization``: JSON round trip of a cached completion entry,
+- ``redis_round_trip``: ``RedisService`` write and read against an in-memory stand-in,
+- ``chat_template``: chat template rendering (``--model``),
+- ``tokenize``: prompt tokenization without memoization (``--model``),
+- ``prompt_cache_hit``: memoized prompt lookup (``--model``),
+- ``generate``: greedy generation of ``--new-tokens`` tokens with a small local model (``--model``),
+- ``batch_decode``: decoding a batch of generated sequences (``--model``).
+
+``run`` prints the results and saves them with ``--save``; ``compare`` runs the
+stages again (or loads ``--current``) and flags stages slower or allocating
+more than the baseline by over ``--threshold``, exiting with status 1.
+
+Usage:
+    python -m benchmarks.stage_benchmark run --model /path/to/tiny-model --save benchmarks/baselines/stages.json
+    python -m benchmarks.stage_benchmark compare --model /path/to/tiny-model --baseline benchmarks/baselines/stages.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "stages.json")
+TEXT = "handmade leather wallets with RFID protection and a lifetime warranty"
+TONE = "persuasive"
+
+
+@dataclass
+class Stage:
+    """A pipeline stage to benchmark."""
+
+    name: str
+    op: Callable[[], Any]  # One operation; a coroutine function for async stages
+    is_async: bool = False
+    max_iterations: Optional[int] = None  # Cap on iterations per round, for slow stages
+
+
+def _time_iterations(stage: Stage, iterations: int, loop: asyncio.AbstractEventLoop) -> float:
+    """Time a number of consecutive operations of a stage, in seconds."""
+    if stage.is_async:
+
+        async def run() -> float:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                await stage.op()
+            return time.perf_counter() - start
+
+        return loop.run_until_complete(run())
+    start = time.perf_counter()
+    for _ in range(iterations):
+        stage.op()
+    return time.perf_counter() - start
+
+
+def _trace_allocations(stage: Stage, loop: asyncio.AbstractEventLoop) -> dict[str, int]:
+    """Measure the Python memory allocated by one operation of a stage."""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        _time_iterations(stage, 1, loop)
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"alloc_peak_bytes": peak - before, "alloc_net_bytes": after - before}
+
+
+def benchmark_stage(stage: Stage, rounds: int, min_round_seconds: float, loop: asyncio.AbstractEventLoop) -> dict:
+    """Benchmark a stage.
+
+    Args:
+        stage: The stage.
+        rounds: Number of timed rounds.
+        min_round_seconds: Minimum duration of a round, used to calibrate the iterations per round.
+        loop: Event loop running async stages.
+
+    Returns:
+        dict: Median and minimum time per operation, iterations per round and allocations per operation.
+    """
+    # Warm up, then double the iterations until a round is long enough
+    _time_iterations(stage, 1, loop)
+    iterations = 1
+    while (stage.max_iterations is None or iterations < stage.max_iterations) and _time_iterations(
+        stage, iterations, loop
+    ) < min_round_seconds:
+        iterations *= 2
+    if stage.max_iterations is not None:
+        iterations = min(iterations, stage.max_iterations)
+
+    per_op = [_time_iterations(stage, iterations, loop) / iterations for _ in range(rounds)]
+    return {
+        "ns_per_op": statistics.median(per_op) * 1e9,
+        "min_ns_per_op": min(per_op) * 1e9,
+        "iterations": iterations,
+        **_trace_allocations(stage, loop),
+    }
+
+
+def model_free_stages() -> list[Stage]:
+    """Build the stages that need no model."""
+    from app.services.prompt_cache import build_prompt
+    from app.services.redis_service import RedisService
+    from benchmarks.stubs import InMemoryRedis
+
+    prompt = build_prompt(TEXT, TONE)
+    metadata = {"input_tokens": 42, "output_tokens": 64, "generation_time_seconds": 1.5, "tokens_per_second": 42.7}
+    entry = {"completion": "Carry less, worry less. " * 8, "metadata": metadata}
+    redis_service = RedisService()
+    redis_service.redis = InMemoryRedis()
+
+    async def redis_round_trip() -> None:
+        await redis_service.set_completion(prompt, entry["completion"], metadata)
+        await redis_service.get_completion(prompt)
+
+    return [
+        Stage("build_prompt", lambda: build_prompt(TEXT, TONE)),
+        Stage("cache_key", lambda: RedisService.cache_key(["retail", prompt])),
+        Stage("cache_entry_serialization", lambda: json.loads(json.dumps(entry))),
+        Stage("redis_round_trip", redis_round_trip, is_async=True),
+    ]
+
+
+def model_stages(model_name: str, new_tokens: int, batch_size: int) -> list[Stage]:
+    """Build the stages that need a tokenizer and a (small) model.
+
+    Args:
+        model_name: Model name or local path.
+        new_tokens: Tokens generated per ``generate`` operation.
+        batch_size: Sequences decoded per ``batch_decode`` operation.
+
+    Returns:
+        list[Stage]: The stages.
+    """
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer  # type: ignore
+
+    from app.services.prompt_cache import PromptTokenCache
+
+    torch.set_grad_enabled(False)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(model_name).eval()
+    device = torch.device("cpu")
+    uncached = PromptTokenCache(tokenizer, device, max_entries=0)
+    cached = PromptTokenCache(tokenizer, device)
+    input_ids = cached.input_ids(TEXT, TONE)
+    attention_mask = torch.ones_like(input_ids)
+
+    def generate() -> torch.Tensor:
+        return model.generate(
+            input_ids,
+            attention_mask=attention_mask,
+            max_new_tokens=new_tokens,
+            min_new_tokens=new_tokens,
+            do_sample=False,
+            pad_token_id=tokenizer.pad_token_id or tokenizer.eos_token_id,
+        )
+
+    sequences = generate()[:, input_ids.shape[1] :].tolist() * batch_size
+
+    return [
+        Stage("chat_template", lambda: uncached._render(TEXT, TONE)),
+        Stage("tokenize", lambda: uncached._encode(TEXT, TONE, None)),
+        Stage("prompt_cache_hit", lambda: cached.input_ids(TEXT, TONE)),
+        Stage("generate", generate, max_iterations=8),
+        Stage("batch_decode", lambda: tokenizer.batch_decode(sequences, skip_special_tokens=True)),
+    ]
+
+
+def environment() -> dict[str, Any]:
+    """Describe the machine and library versions the results were measured with."""
+    info: dict[str, Any] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+    for module in ("torch", "transformers", "tokenizers"):
+        try:
+            info[module] = __import__(module).__version__
+        except ImportError:
+            info[module] = None
+    return info
+
+
+def run_stages(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the selected stages and return the results."""
+    os.environ.setdefault("DEVICE", "cpu")
+    stages = model_free_stages()
+    if args.model:
+        stages += model_stages(args.model, args.new_tokens, args.batch_size)
+    if args.stages:
+        selected = set(args.stages.split(","))
+        stages = [stage for stage in stages if stage.name in selected]
+
+    loop = asyncio.new_event_loop()
+    results = {}
+    try:
+        for stage in stages:
+            results[stage.name] = benchmark_stage(stage, args.rounds, args.min_round_seconds, loop)
+            print(
+                f"{stage.name:>26}: {results[stage.name]['ns_per_op'] / 1000:12.2f} us/op, "
+                f"{results[stage.name]['alloc_peak_bytes']:>10} B peak",
+                file=sys.stderr,
+                flush=True,
+            )
+    finally:
+        loop.close()
+    return {"environment": environment(), "model": args.model, "stages": results}
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[dict[str, Any]]:
+    """Compare results against a baseline.
+
+    Args:
+        baseline: Baseline results.
+        current: Current results.
+        threshold: Relative increase of time or peak allocations flagged as a regression.
+
+    Returns:
+        list[dict[str, Any]]: Per-stage ratios, with a ``regression`` flag.
+    """
+    rows = []
+    for name, result in current["stages"].items():
+        reference = baseline["stages"].get(name)
+        if reference is None:
+            continue
+        time_ratio = result["ns_per_op"] / reference["ns_per_op"] if reference["ns_per_op"] else None
+        alloc_ratio = (
+            result["alloc_peak_bytes"] / reference["alloc_peak_bytes"] if reference["alloc_peak_bytes"] > 0 else None
+        )
+        rows.append(
+            {
+                "stage": name,
+                "baseline_ns_per_op": reference["ns_per_op"],
+                "ns_per_op": result["ns_per_op"],
+                "time_ratio": time_ratio,
+                "alloc_ratio": alloc_ratio,
+                "regression": any(ratio is not None and ratio > 1 + threshold for ratio in (time_ratio, alloc_ratio)),
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    """Run the stage benchmarks, or compare them against a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Run the stage benchmarks")
+    compare_parser = subparsers.add_parser("compare", help="Compare against a baseline")
+    for subparser in (run_parser, compare_parser):
+        subparser.add_argument("--model", default=None, help="Small local model for the model stages")
+        subparser.add_argument("--stages", default=None, help="Comma-separated stages to run (default: all)")
+        subparser.add_argument("--rounds", type=int, default=5, help="Timed rounds per stage")
+        subparser.add_argument("--min-round-seconds", type=float, default=0.2, help="Minimum duration of a round")
+        subparser.add_argument("--new-tokens", type=int, default=16, help="Tokens per generate operation")
+        subparser.add_argument("--batch-size", type=int, default=8, help="Sequences per batch_decode operation")
+    run_parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, default=None, help="Save as a baseline")
+    compare_parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results")
+    compare_parser.add_argument("--current", default=None, help="Current results (default: run the stages)")
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="Relative regression threshold")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_stages(args)
+        if args.save:
+            os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+            with open(args.save, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+        print(json.dumps(results, indent=2))
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        args.model = args.model or baseline.get("model")
+        current = run_stages(args)
+    rows = compare(baseline, current, args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        alloc = f"{row['alloc_ratio']:.2f}x" if row["alloc_ratio"] is not None else "n/a"
+        print(f"{row['stage']:>26}: time {row['time_ratio']:.2f}x, alloc {alloc}  {flag}")
+    if any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Local stand-ins for the external services of the serving path, so benchmarks run offline."""
+
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class InMemoryRedis:
+    """Minimal asyncio Redis client keeping values in a dict.
+
+    It implements the commands used by ``RedisService``, so completions still go
+    through the service's key hashing and JSON serialization. With
+    ``max_entries``, the least recently used keys are evicted like with a Redis
+    ``maxmemory`` policy, so long runs do not grow the stand-in without bound.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        self.store: OrderedDict[str, bytes] = OrderedDict()
+        self.max_entries = max_entries
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get the value of a key."""
+        value = self.store.get(key)
+        if value is not None:
+            self.store.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str | bytes) -> bool:
+        """Set the value of a key."""
+        self.store[key] = value.encode() if isinstance(value, str) else value
+        self.store.move_to_end(key)
+        if self.max_entries is not None and len(self.store) > self.max_entries:
+            self.store.popitem(last=False)
+        return True
+
+
+def use_in_memory_redis(max_entries: Optional[int] = None) -> InMemoryRedis:
+    """Replace the Redis client of the model service with an in-memory stand-in.
+
+    Args:
+        max_entries: Keys kept before evicting the least recently used ones (None keeps all).
+
+    Returns:
+        InMemoryRedis: The stand-in, to inspect or clear its contents.
+    """
+    from app.services.model_service import LLMService
+
+    redis = InMemoryRedis(max_entries)
+    LLMService.redis_service.redis = redis
+    return redis
+
+
+def create_stub_replica(
+    decode_seconds_per_token: float = 0.001,
+    max_parallel_requests: int = 4,
+    cache_hit_seconds: float = 0.002,
+) -> Any:
+    """Create a model replica stand-in answering ``/api/complete`` and ``/api/health``.
+
+    The stub serves ``max_parallel_requests`` completions at a time, each taking
+    ``max_new_tokens * decode_seconds_per_token``, except prompts it has already
+    answered, which it serves from its local cache. Like the real service, it
+    reports its load in ``X-Queue-Size`` and ``X-Active-Requests``. Setting
+    ``app.state.failing`` makes it answer 500 and fail its health checks.
+
+    Args:
+        decode_seconds_per_token: Simulated decode time per generated token.
+        max_parallel_requests: Completions generated concurrently.
+        cache_hit_seconds: Time to answer a prompt already seen.
+
+    Returns:
+        FastAPI: The stub replica application.
+    """
+    import asyncio
+
+    from fastapi import FastAPI, HTTPException, Response
+
+    from app.api.schemas import CompletionRequest
+
+    app = FastAPI()
+    app.state.failing = False
+    app.state.served = 0
+    slots = asyncio.Semaphore(max_parallel_requests)
+    load = {"queued": 0, "active": 0}
+    seen: set[tuple[Optional[str], str]] = set()
+
+    @app.middleware("http")
+    async def add_queue_headers(request, call_next):
+        response = await call_next(request)
+        response.headers["X-Queue-Size"] = str(load["queued"])
+        response.headers["X-Active-Requests"] = str(load["active"])
+        return response
+
+    @app.post("/api/complete")
+    async def complete(request: CompletionRequest, response: Response) -> dict:
+        if app.state.failing:
+            raise HTTPException(status_code=500, detail="Stub replica failure")
+        key = (request.tone.value if request.tone else None, request.text)
+        cached = key in seen
+        load["queued"] += 1
+        async with slots:
+            load["queued"] -= 1
+            load["active"] += 1
+            try:
+                if cached:
+                    await asyncio.sleep(cache_hit_seconds)
+                else:
+                    await asyncio.sleep((request.max_new_tokens or 0) * decode_seconds_per_token)
+            finally:
+                load["active"] -= 1
+        seen.add(key)
+        app.state.served += 1
+        output_tokens = 0 if cached else request.max_new_tokens
+        return {
+            "completions": [f"Stub ad copy for: {request.text}"],
+            "metadata": {"input_tokens": len(request.text) // 4, "output_tokens": output_tokens, "cached": cached},
+        }
+
+    @app.get("/api/health")
+    async def health() -> dict:
+        if app.state.failing:
+            raise HTTPException(status_code=503, detail="Service unhealthy")
+        return {"status": "healthy"}
+
+    return app
@@ -0,0 +1,140 @@
+"""Benchmark node throughput and tail latency for different worker thread layouts.
+
+For each worker count, the benchmark starts that many worker processes sharing
+the node and compares three layouts:
+
+- ``default``: library defaults, every worker using one thread per visible core,
+- ``planned``: the thread planner's split of physical cores between workers,
+- ``pinned``: the planned split with each worker pinned to its CPUs.
+
+Every worker loads the model, then generates back-to-back for ``--seconds``.
+
+Usage:
+    python -m benchmarks.thread_benchmark --model wassim249/ads-genius-gemma-3-1b-it-finetuned-merged --workers 1,2,4
+"""
+
+import argparse
+import json
+import multiprocessing
+import statistics
+import time
+
+from benchmarks.compile_benchmark import PROMPTS
+
+LAYOUTS = ("default", "planned", "pinned")
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Get the q-th percentile of the values (nearest rank)."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def worker(
+    model_name: str,
+    layout: str,
+    workers: int,
+    worker_index: int,
+    seconds: float,
+    max_new_tokens: int,
+    barrier,
+    results,
+) -> None:
+    """Run one worker process: apply the layout, load the model and generate until the deadline."""
+    from app.core.thread_plan import apply_thread_plan, available_cpus, physical_cores, plan_threads
+
+    plan = None
+    if layout != "default":
+        plan = plan_threads(workers, worker_index, physical_cores(available_cpus()), pin_affinity=layout == "pinned")
+        apply_thread_plan(plan)
+
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer  # type: ignore
+
+    from benchmarks.compile_benchmark import encode
+
+    torch.set_grad_enabled(False)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForCausalLM.from_pretrained(model_name).eval()
+    prompts = [encode(tokenizer, prompt) for prompt in PROMPTS]
+    generate_kwargs = {"max_new_tokens": max_new_tokens, "min_new_tokens": max_new_tokens, "do_sample": False}
+    model.generate(prompts[0], attention_mask=torch.ones_like(prompts[0]), **{**generate_kwargs, "max_new_tokens": 2})
+
+    barrier.wait()
+    latencies = []
+    new_tokens = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        input_ids = prompts[len(latencies) % len(prompts)]
+        start = time.perf_counter()
+        outputs = model.generate(input_ids, attention_mask=torch.ones_like(input_ids), **generate_kwargs)
+        latencies.append(time.perf_counter() - start)
+        new_tokens += outputs.shape[1] - input_ids.shape[1]
+    results.put(
+        {
+            "latencies": latencies,
+            "new_tokens": new_tokens,
+            "intra_op_threads": torch.get_num_threads(),
+            "cpus": plan.cpus if plan else available_cpus(),
+        }
+    )
+
+
+def run_layout(model_name: str, layout: str, workers: int, seconds: float, max_new_tokens: int) -> dict:
+    """Run the workers of a layout concurrently and aggregate their results."""
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=worker,
+            args=(model_name, layout, workers, index, seconds, max_new_tokens, barrier, results),
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    worker_results = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    latencies = [latency for result in worker_results for latency in result["latencies"]]
+    new_tokens = sum(result["new_tokens"] for result in worker_results)
+    return {
+        "layout": layout,
+        "workers": workers,
+        "intra_op_threads": [result["intra_op_threads"] for result in worker_results],
+        "requests": len(latencies),
+        "requests_per_second": len(latencies) / seconds,
+        "tokens_per_second": new_tokens / seconds,
+        "p50_latency_seconds": statistics.median(latencies) if latencies else None,
+        "p95_latency_seconds": percentile(latencies, 95) if latencies else None,
+        "p99_latency_seconds": percentile(latencies, 99) if latencies else None,
+    }
+
+
+def main() -> None:
+    """Run every layout for every worker count and print a JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True, help="Model name or path")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--layouts", default=",".join(LAYOUTS), help="Comma-separated layouts")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Measured duration per layout")
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    args = parser.parse_args()
+
+    report = []
+    for workers in [int(count) for count in args.workers.split(",")]:
+        for layout in args.layouts.split(","):
+            result = run_layout(args.model, layout, workers, args.seconds, args.max_new_tokens)
+            report.append(result)
+            print(
+                f"{layout:>8} x{workers}: {result['tokens_per_second']:8.1f} tok/s, "
+                f"p50 {result['p50_latency_seconds'] or 0:.3f}s, p99 {result['p99_latency_seconds'] or 0:.3f}s",
+                flush=True,
+            )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,6 @@ import os
 import sys
 from typing import Optional
 
-from src import main
 from src.config import FIELD_GROUPS, FIELDS
 from src.config.settings import settings
 from src.utils.logging import get_logger, setup_logging
@@ -70,7 +69,22 @@ def run_cli():
         help=f"Number of examples to generate per field (default: {settings.pipeline.num_examples})",
     )
     parser.add_argument(
-        "--retry-delay", type=int, help=f"Delay between batches in seconds (default: {settings.pipeline.retry_delay})"
+        "--retry-delay",
+        type=int,
+        help=f"Maximum retry backoff, and delay between batches without rate limits, in seconds "
+        f"(default: {settings.pipeline.retry_delay})",
+    )
+    parser.add_argument(
+        "--async",
+        dest="async_mode",
+        action="store_true",
+        default=None,
+        help="Generate all fields concurrently instead of in batches separated by --retry-delay",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help=f"Maximum number of concurrent LLM requests with --async (default: {settings.pipeline.concurrency})",
     )
 
     # Logging configuration
@@ -132,8 +146,13 @@ def run_cli():
         batch_size=args.batch_size or settings.pipeline.batch_size,
         num_examples=args.num_examples or settings.pipeline.num_examples,
         retry_delay=args.retry_delay or settings.pipeline.retry_delay,
+        async_mode=args.async_mode if args.async_mode is not None else settings.pipeline.async_mode,
+        concurrency=args.concurrency or settings.pipeline.concurrency,
     )
 
+    # The pipeline pulls in langchain and the OpenAI client, so it is only imported once it runs
+    from src.core.pipeline import main
+
     # Run the pipeline
     try:
         main(
@@ -144,6 +163,8 @@ def run_cli():
             batch_size=args.batch_size,
             num_examples=args.num_examples,
             retry_delay=args.retry_delay,
+            async_mode=args.async_mode,
+            concurrency=args.concurrency,
         )
         logger.info("pipeline_execution_completed")
         return 0
@@ -1,11 +1,12 @@
 """Field definitions for the ad generation pipeline."""
 
 import json
+import os
 from pathlib import Path
 from typing import Optional
 
-# Get the path to the fields.json file
-FIELDS_FILE = Path(__file__).parent / "fields.json"
+# Get the path to the fields.json file, which FIELDS_FILE overrides
+FIELDS_FILE = Path(os.environ.get("FIELDS_FILE", Path(__file__).parent / "fields.json"))
 
 
 def load_fields() -> list[str]:
@@ -32,7 +32,19 @@ class PipelineSettings(BaseModel):
         default="fixed_ads_list.json", description="Path to the final flattened output JSON file"
     )
     retry_attempts: int = Field(default=3, description="Number of retry attempts for failed requests")
-    retry_delay: int = Field(default=60, description="Delay between retry attempts in seconds")
+    retry_delay: int = Field(
+        default=60,
+        description="Maximum backoff between retry attempts, and delay between batches without rate limits, in seconds",
+    )
+    requests_per_minute: int = Field(default=60, description="Request budget of the LLM deployment (0 disables it)")
+    tokens_per_minute: int = Field(default=60000, description="Token budget of the LLM deployment (0 disables it)")
+    output_tokens_estimate: int = Field(
+        default=800, description="Completion tokens reserved per request until its usage is known"
+    )
+    async_mode: bool = Field(
+        default=False, description="Generate all fields concurrently instead of in batches separated by retry_delay"
+    )
+    concurrency: int = Field(default=8, description="Maximum number of concurrent LLM requests in async mode")
 
 
 class Settings(BaseSettings):
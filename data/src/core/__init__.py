@@ -1,20 +1,13 @@
-"""Core functionality for the ad generation pipeline."""
+"""Core functionality for the ad generation pipeline.
 
-from src.core.llm import generate_with_retry, get_azure_openai_client
-from src.core.pipeline import fix_failed_responses, main, process_batch
-from src.core.prompts import (
-    create_ad_generation_prompt,
-    create_json_fix_prompt,
-    get_output_parser,
-)
+The LLM client, prompts and pipeline are imported from their modules
+(``src.core.llm``, ``src.core.prompts``, ``src.core.pipeline``), so that the
+rate limiter loads without the LLM client dependencies.
+"""
+
+from src.core.rate_limiter import RateLimiter, get_rate_limiter
 
 __all__ = [
-    "get_azure_openai_client",
-    "generate_with_retry",
-    "create_ad_generation_prompt",
-    "create_json_fix_prompt",
-    "get_output_parser",
-    "process_batch",
-    "fix_failed_responses",
-    "main",
+    "RateLimiter",
+    "get_rate_limiter",
 ]
@@ -1,15 +1,26 @@
 """LLM client setup for the ad generation pipeline."""
 
-from langchain_openai import AzureChatOpenAI
-from tenacity import retry, stop_after_attempt, wait_fixed
+from typing import TYPE_CHECKING
+
+from tenacity import retry, retry_if_exception, stop_after_attempt
 
 from src.config import settings
+from src.core.rate_limiter import (
+    backoff_seconds,
+    estimate_tokens,
+    get_rate_limiter,
+    is_transient_error,
+    response_tokens,
+)
 from src.utils.logging import get_logger
 
+if TYPE_CHECKING:
+    from langchain_openai import AzureChatOpenAI
+
 logger = get_logger("data_pipeline.core.llm")
 
 
-def get_azure_openai_client() -> AzureChatOpenAI:
+def get_azure_openai_client() -> "AzureChatOpenAI":
     """Get the Azure OpenAI client with the configured settings.
 
     Returns:
@@ -23,6 +34,9 @@ def get_azure_openai_client() -> AzureChatOpenAI:
         temperature=settings.azure_openai.temperature,
     )
 
+    # Imported here so that the CLI starts without loading the OpenAI client stack
+    from langchain_openai import AzureChatOpenAI
+
     client = AzureChatOpenAI(
         deployment_name=settings.azure_openai.deployment_name,
         azure_endpoint=settings.azure_openai.azure_endpoint,
@@ -37,6 +51,8 @@ def get_azure_openai_client() -> AzureChatOpenAI:
 
 def log_retry_attempt(retry_state):
     """Log retry attempts."""
+    if hasattr(retry_state.next_action, "sleep"):
+        get_rate_limiter().record_backoff(retry_state.next_action.sleep)
     logger.warning(
         "retry_attempt",
         attempt_number=retry_state.attempt_number,
@@ -46,14 +62,23 @@ def log_retry_attempt(retry_state):
     )
 
 
+def wait_before_retry(retry_state) -> float:
+    """Get the wait before the next attempt: jittered exponential backoff, or the limiter's pause when throttled."""
+    error = retry_state.outcome.exception() if retry_state.outcome is not None else None
+    return backoff_seconds(retry_state.attempt_number, error, get_rate_limiter())
+
+
 @retry(
     stop=stop_after_attempt(settings.pipeline.retry_attempts),
-    wait=wait_fixed(settings.pipeline.retry_delay),
+    wait=wait_before_retry,
+    retry=retry_if_exception(is_transient_error),
     before_sleep=log_retry_attempt,
 )
 def generate_with_retry(llm, prompt, **kwargs):
     """Generate text with the LLM with retry logic.
 
+    Requests wait for the rate limiter's budgets; throttling, server and connection errors are retried.
+
     Args:
         llm: The LLM client.
         prompt: The prompt to send to the LLM.
@@ -63,10 +88,49 @@ def generate_with_retry(llm, prompt, **kwargs):
         The LLM response.
     """
     logger.debug("generating_text", prompt_length=len(prompt))
+    limiter = get_rate_limiter()
+    tokens = estimate_tokens(prompt)
+    limiter.acquire(tokens)
     try:
         response = llm.invoke(prompt, **kwargs)
+        limiter.record_success(tokens, response_tokens(response))
+        logger.debug("text_generated", response_length=len(response.content))
+        return response
+    except Exception as e:
+        limiter.record_failure(e)
+        logger.error("generation_failed", error=str(e), error_type=type(e).__name__)
+        raise
+
+
+@retry(
+    stop=stop_after_attempt(settings.pipeline.retry_attempts),
+    wait=wait_before_retry,
+    retry=retry_if_exception(is_transient_error),
+    before_sleep=log_retry_attempt,
+)
+async def agenerate_with_retry(llm, prompt, **kwargs):
+    """Generate text with the LLM's async API with retry logic.
+
+    Rate limiter and retry waits are awaited, so other requests keep running meanwhile.
+
+    Args:
+        llm: The LLM client.
+        prompt: The prompt to send to the LLM.
+        **kwargs: Additional arguments to pass to the LLM.
+
+    Returns:
+        The LLM response.
+    """
+    logger.debug("generating_text", prompt_length=len(prompt))
+    limiter = get_rate_limiter()
+    tokens = estimate_tokens(prompt)
+    await limiter.aacquire(tokens)
+    try:
+        response = await llm.ainvoke(prompt, **kwargs)
+        limiter.record_success(tokens, response_tokens(response))
         logger.debug("text_generated", response_length=len(response.content))
         return response
     except Exception as e:
+        limiter.record_failure(e)
         logger.error("generation_failed", error=str(e), error_type=type(e).__name__)
         raise
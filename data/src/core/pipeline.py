@@ -1,19 +1,29 @@
-"""Main pipeline functionality for ad generation."""
+"""Main pipeline functionality for ad generation.
 
+Fields are generated either in batches separated by ``retry_delay`` (the
+default), or, in async mode, all at once through the LLM client's async API
+with at most ``concurrency`` requests in flight, so a run is bound by the
+provider's quota rather than by fixed sleeps. Either way, requests are paced by
+the shared rate limiter (``src.core.rate_limiter``), which replaces the sleeps
+between batches when its budgets are set.
+"""
+
+import asyncio
 import time
-from typing import Optional
+from typing import Callable, Optional
 
 from langchain_core.exceptions import OutputParserException
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.prompts import PromptTemplate
 
 from src.config import FIELDS, settings
-from src.core.llm import generate_with_retry, get_azure_openai_client
+from src.core.llm import agenerate_with_retry, generate_with_retry, get_azure_openai_client
 from src.core.prompts import (
     create_ad_generation_prompt,
     create_json_fix_prompt,
     get_output_parser,
 )
+from src.core.rate_limiter import get_rate_limiter
 from src.utils.file_utils import (
     flatten_entries,
     get_fields_batch,
@@ -25,6 +35,33 @@ from src.utils.logging import get_logger
 logger = get_logger("data_pipeline.core.pipeline")
 
 
+def _parse_response(field: str, response, output_parser: PydanticOutputParser) -> dict:
+    """Parse the LLM response for a field.
+
+    Args:
+        field: The field the response was generated for.
+        response: The LLM response.
+        output_parser: The output parser.
+
+    Returns:
+        The generated ad entries, or the raw response when it could not be parsed, for later fixing.
+    """
+    try:
+        parsed_result = output_parser.parse(response.content)
+    except OutputParserException as e:
+        logger.error(
+            "output_parsing_failed",
+            field=field,
+            error=str(e),
+            error_type="OutputParserException",
+            response=response.content,
+        )
+        # Store the raw response for later fixing
+        return {"field": field, "raw_response": response.content}
+    logger.info("field_processed_successfully", field=field, entries_count=len(parsed_result.entries))
+    return parsed_result.model_dump()
+
+
 def process_batch(
     fields_batch: list[str],
     llm,
@@ -62,25 +99,8 @@ def process_batch(
             response = generate_with_retry(llm, prompt)
             logger.debug("llm_response_received", field=field, response_length=len(response.content))
 
-            parsed_result = output_parser.parse(response.content)
-            results.append(parsed_result.model_dump())
-            logger.info("field_processed_successfully", field=field, entries_count=len(parsed_result.entries))
-
-        except OutputParserException as e:
-            logger.error(
-                "output_parsing_failed",
-                field=field,
-                error=str(e),
-                error_type="OutputParserException",
-                response=response.content if "response" in locals() else None,
-            )
-            # Store the raw response for later fixing
-            results.append(
-                {
-                    "field": field,
-                    "raw_response": response.content if "response" in locals() else None,
-                }
-            )
+            results.append(_parse_response(field, response, output_parser))
+
         except Exception as e:
             logger.error("field_processing_failed", field=field, error=str(e), error_type=type(e).__name__)
             results.append({"field": field, "error": str(e)})
@@ -127,6 +147,233 @@ def fix_failed_responses(
     return fixed_results
 
 
+async def _agenerate_field(
+    field: str,
+    llm,
+    prompt_template: PromptTemplate,
+    output_parser: PydanticOutputParser,
+    num_examples: int,
+    semaphore: asyncio.Semaphore,
+) -> dict:
+    """Generate and parse the ad copy of one field, holding a concurrency slot during the LLM request."""
+    logger.debug("processing_field", field=field)
+    try:
+        prompt = prompt_template.format(input_field=field, num_examples=num_examples)
+        logger.debug("prompt_created", field=field, prompt_length=len(prompt))
+
+        async with semaphore:
+            response = await agenerate_with_retry(llm, prompt)
+        logger.debug("llm_response_received", field=field, response_length=len(response.content))
+
+        return _parse_response(field, response, output_parser)
+    except Exception as e:
+        logger.error("field_processing_failed", field=field, error=str(e), error_type=type(e).__name__)
+        return {"field": field, "error": str(e)}
+
+
+async def aprocess_batch(
+    fields_batch: list[str],
+    llm,
+    prompt_template: PromptTemplate,
+    output_parser: PydanticOutputParser,
+    num_examples: int,
+    concurrency: int = settings.pipeline.concurrency,
+    on_result: Optional[Callable[[dict], None]] = None,
+) -> list[dict]:
+    """Process fields concurrently with the LLM's async API.
+
+    Args:
+        fields_batch: The fields to process.
+        llm: The LLM client.
+        prompt_template: The prompt template.
+        output_parser: The output parser.
+        num_examples: The number of examples to generate per field.
+        concurrency: The maximum number of LLM requests in flight.
+        on_result: Called with each result as soon as its field completes.
+
+    Returns:
+        A list of generated ad entries, in completion order.
+    """
+    logger.info("processing_batch_started", fields=fields_batch, num_examples=num_examples, concurrency=concurrency)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tasks = [
+        asyncio.create_task(_agenerate_field(field, llm, prompt_template, output_parser, num_examples, semaphore))
+        for field in fields_batch
+    ]
+
+    # Handle results as they complete rather than in submission order
+    results = []
+    for next_result in asyncio.as_completed(tasks):
+        result = await next_result
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    logger.info("processing_batch_completed", successful_count=len([r for r in results if "field" not in r]))
+    return results
+
+
+async def afix_failed_responses(
+    failed_responses: list[dict],
+    llm,
+    fix_prompt_template: PromptTemplate,
+    output_parser: PydanticOutputParser,
+    concurrency: int = settings.pipeline.concurrency,
+) -> list[dict]:
+    """Fix failed responses concurrently using a JSON fixing prompt.
+
+    Args:
+        failed_responses: The list of failed responses.
+        llm: The LLM client.
+        fix_prompt_template: The prompt template for fixing JSON.
+        output_parser: The output parser.
+        concurrency: The maximum number of LLM requests in flight.
+
+    Returns:
+        A list of fixed responses.
+    """
+    logger.info("fixing_failed_responses_started", count=len(failed_responses), concurrency=concurrency)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fix(response: dict) -> Optional[dict]:
+        field = response.get("field", "unknown")
+        if "raw_response" not in response:
+            logger.warning("skipping_response_without_raw_data", field=field)
+            return None
+        logger.debug("fixing_response", field=field)
+        try:
+            prompt = fix_prompt_template.format(json=response["raw_response"])
+            async with semaphore:
+                fixed_response = await agenerate_with_retry(llm, prompt)
+            parsed_result = output_parser.parse(fixed_response.content)
+            logger.info("response_fixed_successfully", field=field)
+            return parsed_result.model_dump()
+        except Exception as e:
+            logger.error("response_fixing_failed", field=field, error=str(e), error_type=type(e).__name__)
+            return None
+
+    fixed = await asyncio.gather(*[fix(response) for response in failed_responses])
+    fixed_results = [result for result in fixed if result is not None]
+    logger.info("fixing_failed_responses_completed", fixed_count=len(fixed_results))
+    return fixed_results
+
+
+def _run_in_batches(
+    fields: list[str],
+    llm,
+    ad_prompt: PromptTemplate,
+    fix_prompt: PromptTemplate,
+    output_parser: PydanticOutputParser,
+    results: list[dict],
+    output_file: str,
+    batch_size: int,
+    num_examples: int,
+    retry_delay: int,
+) -> tuple[list[dict], list[dict]]:
+    """Generate the fields batch by batch, sleeping between batches, then fix the failed responses.
+
+    Successful results are appended to ``results`` and saved to ``output_file`` after each batch.
+
+    Returns:
+        The failed responses and the fixed ones.
+    """
+    failed_responses = []
+
+    # Process fields in batches
+    total_batches = (len(fields) + batch_size - 1) // batch_size
+    for batch_idx, start_idx in enumerate(range(0, len(fields), batch_size)):
+        fields_batch = get_fields_batch(fields, start_idx, batch_size)
+        logger.info(
+            "processing_batch",
+            batch_number=batch_idx + 1,
+            total_batches=total_batches,
+            start_idx=start_idx,
+            end_idx=start_idx + len(fields_batch),
+        )
+
+        batch_results = process_batch(fields_batch, llm, ad_prompt, output_parser, num_examples)
+
+        # Separate successful and failed responses
+        batch_success = 0
+        batch_failed = 0
+        for result in batch_results:
+            if "raw_response" in result:
+                failed_responses.append(result)
+                batch_failed += 1
+            else:
+                results.append(result)
+                batch_success += 1
+
+        logger.info("batch_completed", batch_number=batch_idx + 1, successful=batch_success, failed=batch_failed)
+
+        # Save intermediate results
+        save_json_file(output_file, results)
+        logger.debug("intermediate_results_saved", file=output_file)
+
+        # Don't sleep after the last batch, nor when the rate limiter paces the requests
+        if batch_idx < total_batches - 1 and not get_rate_limiter().enabled:
+            logger.info("sleeping_before_next_batch", delay_seconds=retry_delay)
+            time.sleep(retry_delay)
+
+    fixed_results = []
+    if failed_responses:
+        logger.info("fixing_failed_responses", count=len(failed_responses))
+        fixed_results = fix_failed_responses(failed_responses, llm, fix_prompt, output_parser)
+    return failed_responses, fixed_results
+
+
+async def _run_concurrently(
+    fields: list[str],
+    llm,
+    ad_prompt: PromptTemplate,
+    fix_prompt: PromptTemplate,
+    output_parser: PydanticOutputParser,
+    results: list[dict],
+    output_file: str,
+    save_every: int,
+    num_examples: int,
+    concurrency: int,
+) -> tuple[list[dict], list[dict]]:
+    """Generate all the fields concurrently, then fix the failed responses, in a single event loop.
+
+    Successful results are appended to ``results`` as they complete and saved to ``output_file`` every
+    ``save_every`` completed fields and at the end.
+
+    Returns:
+        The failed responses and the fixed ones.
+    """
+    failed_responses = []
+    completed = 0
+    started_at = time.perf_counter()
+
+    def on_result(result: dict) -> None:
+        nonlocal completed
+        completed += 1
+        if "raw_response" in result:
+            failed_responses.append(result)
+        else:
+            results.append(result)
+        if completed % save_every == 0:
+            save_json_file(output_file, results)
+            logger.info(
+                "progress",
+                completed=completed,
+                total=len(fields),
+                fields_per_minute=round(completed / (time.perf_counter() - started_at) * 60, 2),
+            )
+
+    await aprocess_batch(fields, llm, ad_prompt, output_parser, num_examples, concurrency, on_result)
+    save_json_file(output_file, results)
+    logger.debug("intermediate_results_saved", file=output_file)
+
+    fixed_results = []
+    if failed_responses:
+        logger.info("fixing_failed_responses", count=len(failed_responses))
+        fixed_results = await afix_failed_responses(failed_responses, llm, fix_prompt, output_parser, concurrency)
+    return failed_responses, fixed_results
+
+
 def main(
     fields: Optional[list[str]] = None,
     output_file: Optional[str] = None,
@@ -135,6 +382,8 @@ def main(
     batch_size: Optional[int] = None,
     num_examples: Optional[int] = None,
     retry_delay: Optional[int] = None,
+    async_mode: Optional[bool] = None,
+    concurrency: Optional[int] = None,
 ):
     """Main function to run the ad generation pipeline.
 
@@ -146,6 +395,10 @@ def main(
         batch_size: The batch size. Defaults to settings.pipeline.batch_size.
         num_examples: The number of examples to generate per field. Defaults to settings.pipeline.num_examples.
         retry_delay: The delay between batches in seconds. Defaults to settings.pipeline.retry_delay.
+        async_mode: Whether to generate all fields concurrently. Defaults to settings.pipeline.async_mode.
+            Results are then saved every batch_size completed fields, without sleeping.
+        concurrency: The maximum number of concurrent LLM requests in async mode.
+            Defaults to settings.pipeline.concurrency.
     """
     # Check if API key is set
     if not settings.azure_openai.api_key:
@@ -163,12 +416,16 @@ def main(
     batch_size = batch_size or settings.pipeline.batch_size
     num_examples = num_examples or settings.pipeline.num_examples
     retry_delay = retry_delay or settings.pipeline.retry_delay
+    async_mode = settings.pipeline.async_mode if async_mode is None else async_mode
+    concurrency = concurrency or settings.pipeline.concurrency
 
     logger.info(
         "pipeline_started",
         fields_count=len(fields),
         batch_size=batch_size,
         num_examples=num_examples,
+        async_mode=async_mode,
+        concurrency=concurrency if async_mode else None,
         output_file=output_file,
         fixed_output_file=fixed_output_file,
         final_output_file=final_output_file,
@@ -191,50 +448,37 @@ def main(
     results = load_json_file(output_file, [])
     logger.info("existing_results_loaded", count=len(results))
 
-    failed_responses = []
-
-    # Process fields in batches
-    total_batches = (len(fields) + batch_size - 1) // batch_size
-    for batch_idx, start_idx in enumerate(range(0, len(fields), batch_size)):
-        fields_batch = get_fields_batch(fields, start_idx, batch_size)
-        logger.info(
-            "processing_batch",
-            batch_number=batch_idx + 1,
-            total_batches=total_batches,
-            start_idx=start_idx,
-            end_idx=start_idx + len(fields_batch),
+    if async_mode:
+        failed_responses, fixed_results = asyncio.run(
+            _run_concurrently(
+                fields,
+                llm,
+                ad_prompt,
+                fix_prompt,
+                output_parser,
+                results,
+                output_file,
+                batch_size,
+                num_examples,
+                concurrency,
+            )
+        )
+    else:
+        failed_responses, fixed_results = _run_in_batches(
+            fields,
+            llm,
+            ad_prompt,
+            fix_prompt,
+            output_parser,
+            results,
+            output_file,
+            batch_size,
+            num_examples,
+            retry_delay,
         )
 
-        batch_results = process_batch(fields_batch, llm, ad_prompt, output_parser, num_examples)
-
-        # Separate successful and failed responses
-        batch_success = 0
-        batch_failed = 0
-        for result in batch_results:
-            if "raw_response" in result:
-                failed_responses.append(result)
-                batch_failed += 1
-            else:
-                results.append(result)
-                batch_success += 1
-
-        logger.info("batch_completed", batch_number=batch_idx + 1, successful=batch_success, failed=batch_failed)
-
-        # Save intermediate results
-        save_json_file(output_file, results)
-        logger.debug("intermediate_results_saved", file=output_file)
-
-        if batch_idx < total_batches - 1:  # Don't sleep after the last batch
-            logger.info("sleeping_before_next_batch", delay_seconds=retry_delay)
-            time.sleep(retry_delay)
-
-    # Fix failed responses
-    fixed_results = []
+    # Save fixed results
     if failed_responses:
-        logger.info("fixing_failed_responses", count=len(failed_responses))
-        fixed_results = fix_failed_responses(failed_responses, llm, fix_prompt, output_parser)
-
-        # Save fixed results
         save_json_file(fixed_output_file, fixed_results)
         logger.info("fixed_results_saved", count=len(fixed_results), file=fixed_output_file)
 
@@ -258,3 +502,4 @@ def main(
         final_count=len(flattened_results),
         success_rate=f"{(len(results) + len(fixed_results)) / len(fields) * 100:.2f}%",
     )
+    logger.info("llm_usage_report", **get_rate_limiter().report())
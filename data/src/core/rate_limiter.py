@@ -0,0 +1,365 @@
+"""Client-side rate limiting of the LLM requests of the pipeline.
+
+Requests-per-minute and tokens-per-minute budgets are enforced with token
+buckets holding about ``_BURST_SECONDS`` of quota, matching the short windows
+providers such as Azure OpenAI enforce their per-minute quotas on. A request
+reserves one request and its estimated tokens up front, waiting when a bucket
+is empty; the estimate is corrected with the token usage of the response.
+
+When the provider still throttles (HTTP 429), every request waits for the
+``Retry-After`` of the response (or the reset of an exhausted
+``x-ratelimit-*`` quota), and the budgets are halved, then recovered a little
+with each successful request, so the pipeline settles just under the quota
+actually granted.
+"""
+
+import asyncio
+import email.utils
+import random
+import re
+import threading
+import time
+from typing import Any, Optional
+
+from src.config import settings
+from src.utils.logging import get_logger
+
+logger = get_logger("data_pipeline.core.rate_limiter")
+
+# Seconds of quota a bucket holds, bounding bursts
+_BURST_SECONDS = 10.0
+# Budget scale after a throttled request (multiplied) and per successful request (added back)
+_THROTTLE_DECREASE = 0.5
+_RECOVERY_INCREASE = 0.05
+_MIN_SCALE = 0.1
+# Characters per prompt token assumed when estimating the tokens of a request
+_CHARS_PER_TOKEN = 4
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, per_minute: float) -> None:
+        """Initialize a full bucket.
+
+        Args:
+            per_minute: Quota granted per minute.
+        """
+        self.level = 0.0
+        self.updated = time.monotonic()
+        self.set_rate(per_minute)
+        self.level = self.capacity
+
+    def set_rate(self, per_minute: float) -> None:
+        """Change the refill rate, and the capacity with it."""
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * _BURST_SECONDS)
+        self.level = min(self.level, self.capacity)
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take quota from the bucket, possibly going into debt.
+
+        Args:
+            amount: Quota taken.
+            now: Current monotonic time.
+
+        Returns:
+            float: Seconds to wait before using the quota; later reservations wait for the debt to be repaid.
+        """
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        # Requests larger than the bucket only wait for a full bucket
+        delay = max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+        self.level -= amount
+        return delay
+
+    def adjust(self, amount: float) -> None:
+        """Give back (positive) or take (negative) quota, e.g. to correct an estimate."""
+        self.level = min(self.capacity, self.level + amount)
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parse a rate-limit duration header value.
+
+    Args:
+        value: Seconds (``"20"``), a Go-style duration (``"1m30s"``, ``"250ms"``) or an HTTP date.
+
+    Returns:
+        Optional[float]: The duration in seconds, or None when it cannot be parsed.
+    """
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(headers: Any) -> Optional[float]:
+    """Get the time to wait from the headers of a throttled response.
+
+    ``retry-after-ms`` and ``retry-after`` come first; otherwise the reset time of an exhausted
+    ``x-ratelimit-remaining-requests`` / ``-tokens`` quota is used.
+
+    Args:
+        headers: Response headers (case-insensitive mapping).
+
+    Returns:
+        Optional[float]: Seconds to wait, or None when the headers do not say.
+    """
+    if not headers:
+        return None
+    if (value := headers.get("retry-after-ms")) is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    if (value := headers.get("retry-after")) is not None and (seconds := parse_duration(value)) is not None:
+        return seconds
+    waits = []
+    for quota in ("requests", "tokens"):
+        remaining = headers.get(f"x-ratelimit-remaining-{quota}")
+        reset = headers.get(f"x-ratelimit-reset-{quota}")
+        if remaining is not None and reset is not None and remaining.strip() == "0":
+            if (seconds := parse_duration(reset)) is not None:
+                waits.append(seconds)
+    return max(waits) if waits else None
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """Get the HTTP status code of an LLM client error, if any."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def error_headers(error: BaseException) -> Any:
+    """Get the response headers of an LLM client error, if any."""
+    return getattr(getattr(error, "response", None), "headers", None)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether an LLM request failed for a reason worth retrying: throttling, server errors, timeouts, connections."""
+    status = error_status(error)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    # Client errors without a status, e.g. openai.APIConnectionError and openai.APITimeoutError
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError", "Timeout", "ServiceUnavailableError")
+
+
+def estimate_tokens(prompt: Any, output_tokens: int = settings.pipeline.output_tokens_estimate) -> int:
+    """Estimate the tokens of a request, before knowing its usage.
+
+    Args:
+        prompt: The prompt sent to the LLM.
+        output_tokens: Expected completion tokens.
+
+    Returns:
+        int: The estimated prompt and completion tokens.
+    """
+    return len(str(prompt)) // _CHARS_PER_TOKEN + output_tokens
+
+
+def response_tokens(response: Any) -> Optional[int]:
+    """Get the total tokens used by an LLM response, from its usage metadata."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage and usage.get("total_tokens") is not None:
+        return usage["total_tokens"]
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return token_usage.get("total_tokens")
+
+
+class RateLimiter:
+    """Enforce requests-per-minute and tokens-per-minute budgets, adapting to throttling."""
+
+    def __init__(
+        self,
+        requests_per_minute: float = settings.pipeline.requests_per_minute,
+        tokens_per_minute: float = settings.pipeline.tokens_per_minute,
+    ) -> None:
+        """Initialize the rate limiter.
+
+        Args:
+            requests_per_minute: Request budget (0 disables it).
+            tokens_per_minute: Token budget (0 disables it).
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.scale = 1.0
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self.stats = {
+            "requests": 0,
+            "tokens": 0,
+            "throttled_responses": 0,
+            "failed_requests": 0,
+            "wait_seconds": 0.0,
+            "backoff_seconds": 0.0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a budget is enforced."""
+        return self.requests is not None or self.tokens is not None
+
+    def _reserve(self, tokens: int) -> float:
+        """Reserve a request and its estimated tokens, returning the seconds to wait before sending it."""
+        with self._lock:
+            now = time.monotonic()
+            if self._started_at is None:
+                self._started_at = now
+            delay = max(0.0, self.paused_until - now)
+            if self.requests is not None:
+                delay = max(delay, self.requests.reserve(1, now))
+            if self.tokens is not None:
+                delay = max(delay, self.tokens.reserve(tokens, now))
+            self.stats["wait_seconds"] += delay
+            return delay
+
+    def acquire(self, tokens: int) -> float:
+        """Wait until a request of the given estimated tokens fits in the budgets.
+
+        Args:
+            tokens: Estimated tokens of the request.
+
+        Returns:
+            float: Seconds waited.
+        """
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def aacquire(self, tokens: int) -> float:
+        """Wait, without blocking the event loop, until a request fits in the budgets.
+
+        Args:
+            tokens: Estimated tokens of the request.
+
+        Returns:
+            float: Seconds waited.
+        """
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def _set_scale(self, scale: float) -> None:
+        """Scale the budgets relative to the configured ones."""
+        self.scale = min(1.0, max(_MIN_SCALE, scale))
+        if self.requests is not None:
+            self.requests.set_rate(self.requests_per_minute * self.scale)
+        if self.tokens is not None:
+            self.tokens.set_rate(self.tokens_per_minute * self.scale)
+
+    def record_success(self, estimated_tokens: int, used_tokens: Optional[int]) -> None:
+        """Account a successful request, correcting its token estimate with the actual usage.
+
+        Args:
+            estimated_tokens: Tokens reserved for the request.
+            used_tokens: Tokens the response reports using, if known.
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["tokens"] += used_tokens if used_tokens is not None else estimated_tokens
+            if self.tokens is not None and used_tokens is not None:
+                self.tokens.adjust(estimated_tokens - used_tokens)
+            if self.scale < 1.0:
+                self._set_scale(self.scale + _RECOVERY_INCREASE)
+            self._finished_at = time.monotonic()
+
+    def record_failure(self, error: BaseException) -> Optional[float]:
+        """Account a failed request; a throttled one pauses every request and lowers the budgets.
+
+        Args:
+            error: The error raised by the LLM client.
+
+        Returns:
+            Optional[float]: The pause imposed by a throttled response, in seconds.
+        """
+        with self._lock:
+            self.stats["failed_requests"] += 1
+            self._finished_at = time.monotonic()
+            if error_status(error) != 429:
+                return None
+            self.stats["throttled_responses"] += 1
+            pause = retry_after_seconds(error_headers(error))
+            if pause is not None:
+                self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            self._set_scale(self.scale * _THROTTLE_DECREASE)
+        logger.warning("llm_request_throttled", retry_after=pause, budget_scale=round(self.scale, 3))
+        return pause
+
+    def record_backoff(self, seconds: float) -> None:
+        """Account time spent backing off before a retry."""
+        with self._lock:
+            self.stats["backoff_seconds"] += seconds
+
+    def report(self) -> dict:
+        """Get the achieved throughput and the time spent throttled.
+
+        Returns:
+            dict: Requests and tokens, achieved RPM and TPM, limiter wait and retry backoff time, and budgets.
+        """
+        with self._lock:
+            elapsed = (self._finished_at or time.monotonic()) - (self._started_at or time.monotonic())
+            minutes = elapsed / 60
+            return {
+                **{key: round(value, 3) if isinstance(value, float) else value for key, value in self.stats.items()},
+                "elapsed_seconds": round(elapsed, 3),
+                "achieved_rpm": round(self.stats["requests"] / minutes, 2) if minutes > 0 else None,
+                "achieved_tpm": round(self.stats["tokens"] / minutes, 2) if minutes > 0 else None,
+                "requests_per_minute": self.requests_per_minute or None,
+                "tokens_per_minute": self.tokens_per_minute or None,
+                "budget_scale": round(self.scale, 3),
+            }
+
+
+def backoff_seconds(attempt: int, error: Optional[BaseException], limiter: Optional[RateLimiter] = None) -> float:
+    """Get the wait before retrying a failed request.
+
+    Throttled requests wait in the rate limiter for the pause set from ``Retry-After``, so they only get a
+    short jitter here; other errors back off exponentially with full jitter, capped at ``retry_delay``.
+
+    Args:
+        attempt: Number of the attempt that failed, from 1.
+        error: The error of the attempt.
+        limiter: Rate limiter pausing throttled requests.
+
+    Returns:
+        float: Seconds to wait.
+    """
+    if (
+        error is not None
+        and error_status(error) == 429
+        and limiter is not None
+        and limiter.paused_until > time.monotonic()
+    ):
+        return random.uniform(0, 1)
+    return random.uniform(0, min(settings.pipeline.retry_delay, 2**attempt))
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the rate limiter shared by the LLM requests of the process, created from the settings."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
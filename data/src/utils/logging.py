@@ -1,28 +1,67 @@
 """Logging configuration for the data pipeline."""
 
+import atexit
 import json
 import logging
 import os
+import queue
+import random
+import sys
+import threading
+import time
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Optional, TextIO
 
 import structlog
 
+# Levels never sampled out
+_ALWAYS_KEPT_LEVELS = frozenset({"warning", "error", "critical", "exception"})
+# Fields kept whole by the truncation
+_UNTRUNCATED_FIELDS = frozenset({"exception", "stack"})
+
 
 class JSONFileLogHandler:
-    """Handler for JSON file logging."""
+    """Processor handing copies of log events to a background JSON lines writer.
+
+    Events are copied onto a bounded queue and written by a background thread
+    in batches, to daily files rolling over to a new part once they reach
+    ``max_bytes``, so logging does not touch the file system on the caller's
+    thread. Events are dropped when the queue is full.
+    """
 
-    def __init__(self, log_dir: str = "logs/data_pipeline"):
-        """Initialize the JSON file log handler.
+    def __init__(
+        self,
+        log_dir: str = "logs/data_pipeline",
+        max_bytes: int = 100 * 1024 * 1024,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        queue_size: int = 10000,
+    ):
+        """Initialize the handler and start its writer thread.
 
         Args:
             log_dir: Directory to store log files.
+            max_bytes: Size after which a log file rolls over to the next part of the day.
+            batch_size: Maximum number of events written at once.
+            flush_interval: Maximum seconds an event waits in a partial batch.
+            queue_size: Maximum number of pending events.
         """
         os.makedirs(log_dir, exist_ok=True, mode=0o755)
         self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._file: Optional[TextIO] = None
+        self._file_day: Optional[str] = None
+        self._file_part = 0
+        self._file_size = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
 
     def __call__(self, _, __, event_dict: dict) -> dict:
-        """Log the event dictionary to a JSON file.
+        """Queue a copy of the event dictionary for writing.
 
         Args:
             _: Logger (not used)
@@ -30,19 +69,154 @@ class JSONFileLogHandler:
             event_dict: Event dictionary to log
 
         Returns:
-            The event dictionary
+            The event dictionary, for the console renderer
         """
-        # Create log filename based on date
+        try:
+            # Copied, as the console renderer pops fields from the event
+            self._queue.put_nowait(dict(event_dict))
+        except queue.Full:
+            self.dropped += 1
+        return event_dict
+
+    @property
+    def pending(self) -> int:
+        """Number of events waiting to be written."""
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        """Write queued events in batches until the stop sentinel is received."""
+        while True:
+            event = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while event is not None:
+                batch.append(event)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    event = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+            if event is None:
+                self._close_file()
+                return
+
+    def _write_batch(self, batch: list[dict]) -> None:
+        """Serialize a batch of events and write it with one call."""
+        lines = []
+        for event_dict in batch:
+            try:
+                lines.append(json.dumps(event_dict, default=str) + "\n")
+            except (TypeError, ValueError) as e:
+                lines.append(json.dumps({"event": "Unserializable log event", "error": str(e)}) + "\n")
+        data = "".join(lines)
+        try:
+            self._log_file(len(data)).write(data)
+            self._file.flush()  # type: ignore
+            self._file_size += len(data)
+        except OSError as e:
+            print(f"Failed to write {len(batch)} log events: {e}", file=sys.stderr)
+
+    def _log_file(self, incoming: int) -> TextIO:
+        """Get the file to append to, rolling over on a new day or when the file is full."""
         today = datetime.now().strftime("%Y-%m-%d")
-        log_file = os.path.join(self.log_dir, f"{today}.jsonl")
+        if self._file is not None and today == self._file_day and self._file_size + incoming <= self.max_bytes:
+            return self._file
+        if today != self._file_day:
+            self._file_day, self._file_part = today, 0
+        elif self._file is not None:
+            self._file_part += 1
+        self._close_file()
+        # Skip parts already filled, e.g. by a previous process
+        while True:
+            suffix = f".{self._file_part}" if self._file_part else ""
+            path = os.path.join(self.log_dir, f"{today}{suffix}.jsonl")
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size == 0 or size + incoming <= self.max_bytes:
+                break
+            self._file_part += 1
+        self._file = open(path, "a", encoding="utf-8")
+        self._file_size = size
+        return self._file
+
+    def _close_file(self) -> None:
+        """Close the current log file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write the pending events and stop the writer thread.
 
-        # Append log entry to file
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event_dict) + "\n")
+        Args:
+            timeout: Maximum seconds to wait for the pending events to be written.
+        """
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+class EventSampler:
+    """Processor keeping a fraction of the INFO and DEBUG events with a given name."""
+
+    def __init__(self, rates: dict[str, float]):
+        """Initialize the sampler.
 
+        Args:
+            rates: Fraction of events kept, by event name. Events not listed are always kept.
+        """
+        self.rates = rates
+
+    def __call__(self, _, method_name: str, event_dict: dict) -> dict:
+        """Drop the event when it is sampled out."""
+        rate = self.rates.get(event_dict.get("event"))  # type: ignore
+        if rate is not None and method_name not in _ALWAYS_KEPT_LEVELS and random.random() >= rate:
+            raise structlog.DropEvent
         return event_dict
 
 
+def _truncate(value: Any, max_length: int) -> Any:
+    """Truncate the strings in a value, recursing into dictionaries and lists."""
+    if isinstance(value, str):
+        if len(value) > max_length:
+            return f"{value[:max_length]}... [{len(value)} chars]"
+        return value
+    if isinstance(value, dict):
+        return {key: _truncate(item, max_length) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_truncate(item, max_length) for item in value]
+    return value
+
+
+class FieldTruncator:
+    """Processor truncating long string fields, so large payloads do not bloat the logs."""
+
+    def __init__(self, max_length: int):
+        """Initialize the truncator.
+
+        Args:
+            max_length: Maximum number of characters kept per string.
+        """
+        self.max_length = max_length
+
+    def __call__(self, _, __, event_dict: dict) -> dict:
+        """Truncate the long strings of the event, except tracebacks."""
+        return {
+            key: value if key in _UNTRUNCATED_FIELDS else _truncate(value, self.max_length)
+            for key, value in event_dict.items()
+        }
+
+
+# File handler of the current logging configuration, kept across reconfigurations
+_file_handler: Optional[JSONFileLogHandler] = None
+
+
 class PipelineLoggerFactory:
     """Factory for creating pipeline loggers."""
 
@@ -60,25 +234,45 @@ class PipelineLoggerFactory:
         return structlog.get_logger(name)
 
 
-def setup_logging(log_level: int = logging.INFO, console: bool = True, file: bool = True) -> None:
+def setup_logging(
+    log_level: int = logging.INFO,
+    console: bool = True,
+    file: bool = True,
+    max_field_length: int = 2000,
+    sample_rates: Optional[dict[str, float]] = None,
+) -> None:
     """Setup logging configuration for the data pipeline.
 
     Args:
         log_level: The logging level
         console: Whether to log to console
         file: Whether to log to file
+        max_field_length: Longer string fields are truncated (0 disables truncation)
+        sample_rates: Fraction of INFO/DEBUG events kept, by event name
     """
+    global _file_handler
     processors = [
         structlog.contextvars.merge_contextvars,
         structlog.processors.add_log_level,
+    ]
+
+    if sample_rates:
+        processors.append(EventSampler(sample_rates))
+
+    processors += [
         structlog.dev.set_exc_info,
         structlog.processors.StackInfoRenderer(),
         structlog.processors.format_exc_info,
         structlog.processors.TimeStamper(fmt="iso"),
     ]
 
+    if max_field_length > 0:
+        processors.append(FieldTruncator(max_field_length))
+
     if file:
-        processors.append(JSONFileLogHandler())
+        if _file_handler is None:
+            _file_handler = JSONFileLogHandler()
+        processors.append(_file_handler)
 
     if console:
         processors.append(structlog.dev.ConsoleRenderer(colors=True))
@@ -94,6 +288,17 @@ def setup_logging(log_level: int = logging.INFO, console: bool = True, file: boo
     )
 
 
+def shutdown_logging() -> None:
+    """Write the pending log events to the file and stop the writer thread."""
+    global _file_handler
+    if _file_handler is not None:
+        _file_handler.close()
+        _file_handler = None
+
+
+atexit.register(shutdown_logging)
+
+
 def get_logger(name: Optional[str] = None) -> Any:
     """Get a logger instance with the given name.
 
@@ -104,7 +309,3 @@ def get_logger(name: Optional[str] = None) -> Any:
         A configured logger
     """
     return structlog.get_logger(name)
-
-
-# Initialize logging with default settings
-setup_logging()
@@ -0,0 +1,11 @@
+"""Shared test configuration: the pipeline package is importable from any directory, with test fields."""
+
+import os
+import sys
+from pathlib import Path
+
+TESTS_DIR = Path(__file__).parent
+
+# The pipeline imports itself as the top-level ``src`` package, and loads its fields when imported
+sys.path.insert(0, str(TESTS_DIR.parent))
+os.environ.setdefault("FIELDS_FILE", str(TESTS_DIR / "fields.json"))
@@ -0,0 +1,29 @@
+"""Tests of the JSON lines logging of the data pipeline."""
+
+import json
+
+from src.utils.logging import FieldTruncator, JSONFileLogHandler
+
+
+def test_truncator_shortens_nested_strings_but_keeps_tracebacks():
+    truncator = FieldTruncator(max_length=4)
+
+    event = truncator(None, "info", {"response": {"text": "abcdefgh"}, "exception": "Traceback " * 10})
+
+    assert event["response"]["text"] == "abcd... [8 chars]"
+    assert event["exception"] == "Traceback " * 10
+
+
+def test_handler_writes_events_as_json_lines(tmp_path):
+    handler = JSONFileLogHandler(log_dir=str(tmp_path), flush_interval=0.01)
+    event = {"event": "Batch processed", "count": 3}
+
+    # The event is passed on unchanged to the console renderer
+    assert handler(None, "info", event) is event
+    handler(None, "info", {"event": "Object logged", "value": object()})
+    handler.close()
+
+    lines = [json.loads(line) for path in tmp_path.glob("*.jsonl") for line in path.read_text().splitlines()]
+    assert lines[0] == event
+    # Values JSON cannot represent are written as strings
+    assert lines[1]["value"].startswith("<object")
@@ -0,0 +1,169 @@
+"""Tests of the client-side rate limiter of the LLM requests."""
+
+import time
+
+import pytest
+from src.core.rate_limiter import (
+    RateLimiter,
+    TokenBucket,
+    backoff_seconds,
+    is_transient_error,
+    parse_duration,
+    retry_after_seconds,
+)
+
+
+class FakeResponse:
+    """HTTP response carried by an LLM client error."""
+
+    def __init__(self, status_code: int, headers: dict) -> None:
+        self.status_code = status_code
+        self.headers = headers
+
+
+class FakeAPIError(Exception):
+    """LLM client error with an HTTP response, like ``openai.APIStatusError``."""
+
+    def __init__(self, status_code: int, headers: dict = None) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(status_code, headers or {})
+
+
+def test_bucket_starts_full():
+    bucket = TokenBucket(per_minute=60)
+
+    # One per second, holding ten seconds of quota
+    assert bucket.capacity == 10
+    assert bucket.reserve(10, bucket.updated) == 0.0
+
+
+def test_bucket_reservations_go_into_debt():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+
+    assert bucket.reserve(10, now) == 0.0
+    assert bucket.reserve(1, now) == pytest.approx(1.0)
+    # The next reservation waits for the debt of the previous one to be repaid too
+    assert bucket.reserve(1, now) == pytest.approx(2.0)
+    assert bucket.reserve(1, now + 2) == pytest.approx(1.0)
+
+
+def test_bucket_reservation_larger_than_capacity_waits_for_a_full_bucket():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+    bucket.reserve(10, now)
+
+    assert bucket.reserve(50, now) == pytest.approx(10.0)
+
+
+def test_bucket_adjust_refunds_an_overestimate():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+    bucket.reserve(10, now)
+    bucket.adjust(5)
+
+    assert bucket.reserve(5, now) == 0.0
+
+
+@pytest.mark.parametrize(
+    ("value", "seconds"),
+    [("20", 20.0), ("0.5", 0.5), ("1m30s", 90.0), ("250ms", 0.25), ("6s", 6.0), ("1h", 3600.0), ("-3", 0.0)],
+)
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds)
+
+
+def test_parse_duration_of_an_http_date():
+    future = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))
+
+    assert 28 <= parse_duration(future) <= 30
+
+
+@pytest.mark.parametrize("value", ["soon", "1m30", "5x", ""])
+def test_parse_duration_of_garbage(value):
+    assert parse_duration(value) is None
+
+
+def test_retry_after_seconds_prefers_milliseconds():
+    assert retry_after_seconds({"retry-after-ms": "1500", "retry-after": "20"}) == 1.5
+    assert retry_after_seconds({"retry-after": "20"}) == 20.0
+
+
+def test_retry_after_seconds_from_exhausted_quotas():
+    headers = {
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "2s",
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-reset-tokens": "1m",
+    }
+
+    assert retry_after_seconds(headers) == 60.0
+    assert retry_after_seconds({**headers, "x-ratelimit-remaining-tokens": "1200"}) == 2.0
+
+
+def test_retry_after_seconds_without_a_wait():
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds({}) is None
+    assert retry_after_seconds({"retry-after": "later"}) is None
+    assert retry_after_seconds({"x-ratelimit-remaining-tokens": "10", "x-ratelimit-reset-tokens": "1s"}) is None
+
+
+def test_transient_errors():
+    assert is_transient_error(FakeAPIError(429))
+    assert is_transient_error(FakeAPIError(503))
+    assert is_transient_error(TimeoutError())
+    assert not is_transient_error(FakeAPIError(400))
+    assert not is_transient_error(FakeAPIError(401))
+    assert not is_transient_error(ValueError("bad prompt"))
+
+
+def test_throttled_response_pauses_requests_and_halves_the_budgets():
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+
+    pause = limiter.record_failure(FakeAPIError(429, {"retry-after": "2"}))
+
+    assert pause == 2.0
+    assert limiter.scale == 0.5
+    assert limiter.requests.rate == 5.0
+    assert limiter.paused_until - time.monotonic() == pytest.approx(2.0, abs=0.1)
+    # Throttled retries only get a short jitter: the pause is enforced when acquiring
+    assert backoff_seconds(1, FakeAPIError(429), limiter) <= 1.0
+
+
+def test_budgets_recover_with_successes():
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=0)
+    limiter.record_failure(FakeAPIError(429))
+
+    for _ in range(10):
+        limiter.record_success(100, None)
+
+    assert limiter.scale == pytest.approx(1.0)
+    assert limiter.tokens is None
+
+
+def test_backoff_is_capped_exponential_jitter():
+    for attempt in range(1, 4):
+        assert 0 <= backoff_seconds(attempt, FakeAPIError(503)) <= 2**attempt
+
+
+def test_report():
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+    limiter.acquire(100)
+    limiter.record_success(100, 120)
+    limiter.record_failure(FakeAPIError(500))
+
+    report = limiter.report()
+
+    assert report["requests"] == 1
+    assert report["tokens"] == 120
+    assert report["failed_requests"] == 1
+    assert report["throttled_responses"] == 0
+    assert report["requests_per_minute"] == 600
+
+
+def test_disabled_limiter_never_waits():
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0)
+
+    assert not limiter.enabled
+    assert all(limiter.acquire(10_000) == 0.0 for _ in range(100))
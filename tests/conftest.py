@@ -0,0 +1,45 @@
+"""Shared fixtures: the API runs in-process on the fake backend, with an in-memory Redis stand-in."""
+
+import os
+import tempfile
+
+import pytest
+
+# Settings are read when the application modules are imported, so the test configuration comes first
+os.environ.setdefault("INFERENCE_BACKEND", "fake")
+os.environ.setdefault("DEVICE", "cpu")
+os.environ.setdefault("HEALTH_CANARY_ENABLED", "false")
+os.environ.setdefault("AUTOTUNE_ENABLED", "false")
+os.environ.setdefault("THREAD_PLAN_ENABLED", "false")
+os.environ.setdefault("FAKE_PREFILL_SECONDS_PER_TOKEN", "0")
+os.environ.setdefault("FAKE_DECODE_SECONDS_PER_TOKEN", "0")
+os.environ.setdefault("MEMORY_BUDGET_MB", "256")
+os.environ.setdefault("LOG_CONSOLE", "false")
+os.environ.setdefault("LOG_DIR", os.path.join(tempfile.gettempdir(), "ads-genius-test-logs"))
+
+
+@pytest.fixture
+def redis():
+    """Replace the Redis client of the model service with an empty in-memory stand-in."""
+    from benchmarks.stubs import use_in_memory_redis
+
+    return use_in_memory_redis()
+
+
+@pytest.fixture
+def client(redis):
+    """Test client of the application, with its lifespan (model loading, request queue) run."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def model_service(client):
+    """The loaded model service of the application."""
+    from app.services.model_service import get_model_service
+
+    return get_model_service()
@@ -0,0 +1,94 @@
+"""Tests of the completion API against the fake backend."""
+
+import json
+
+
+def complete(client, text: str, **fields):
+    """Post a completion request."""
+    return client.post("/api/complete", json={"text": text, "max_new_tokens": 16, **fields})
+
+
+def test_completion_is_cached(client):
+    first = complete(client, "a reusable water bottle")
+    second = complete(client, "a reusable water bottle")
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert first.json()["metadata"]["cached"] is False
+    assert second.json()["metadata"]["cached"] is True
+    assert second.json()["completions"] == first.json()["completions"]
+    assert second.json()["metadata"]["output_tokens"] == first.json()["metadata"]["output_tokens"]
+
+
+def test_cache_is_keyed_by_tone(client):
+    complete(client, "noise cancelling headphones", tone="casual")
+    response = complete(client, "noise cancelling headphones", tone="friendly")
+
+    assert response.json()["metadata"]["cached"] is False
+
+
+def test_malformed_cache_entry_is_a_miss(client, redis):
+    complete(client, "a standing desk")
+    for key in redis.store:
+        redis.store[key] = json.dumps({"completion": "stale", "metadata": {}}).encode()
+
+    response = complete(client, "a standing desk")
+
+    assert response.status_code == 200
+    assert response.json()["metadata"]["cached"] is False
+    assert response.json()["completions"] != ["stale"]
+
+
+def test_unknown_adapter_is_rejected(client):
+    response = complete(client, "running shoes", adapter="retail")
+
+    assert response.status_code == 400
+
+
+def test_request_over_memory_budget_is_rejected(client, model_service, monkeypatch):
+    monkeypatch.setattr(model_service.memory_budget, "max_tokens", 8)
+
+    response = complete(client, "a mechanical keyboard for programmers")
+
+    assert response.status_code == 503
+
+
+def test_stage_timings(client):
+    response = complete(client, "organic coffee beans", include_timings=True)
+
+    server_timing = response.headers["Server-Timing"]
+    assert "decode;dur=" in server_timing
+    assert "total;dur=" in server_timing
+    assert {"tokenize", "prefill", "decode"} <= set(response.json()["metadata"]["timings"])
+
+
+def test_candidates_are_ranked(client):
+    response = complete(client, "a travel backpack", num_candidates=4)
+
+    body = response.json()
+    assert len(body["completions"]) == 4
+    assert body["scores"] == sorted(body["scores"], reverse=True)
+    assert body["metadata"]["cached"] is False
+
+
+def test_queue_headers_and_status(client):
+    response = complete(client, "a smart thermostat")
+
+    assert response.headers["X-Queue-Size"] == "0"
+    assert client.get("/api/queue/status").json()["active_requests"] == 0
+
+
+def test_admin_diagnostics_on_the_fake_backend(client, monkeypatch):
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "ADMIN_TOKEN", "secret")
+    headers = {"X-Admin-Token": "secret"}
+
+    threads = client.get("/api/admin/threads", headers=headers)
+    memory = client.get("/api/admin/memory", headers=headers, params={"top": 3})
+
+    assert threads.status_code == 200
+    # The fake backend runs without torch, so its thread settings are not reported
+    assert threads.json()["torch_intra_op_threads"] is None
+    assert memory.status_code == 200
+    assert client.get("/api/admin/memory").status_code == 401
@@ -0,0 +1,142 @@
+"""Tests of the parallelism and batch window autotuner."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.queue import RequestQueue
+from app.services import autotuner
+from app.services.autotuner import ConcurrencyAutotuner
+
+
+class Clock:
+    """Performance counter advanced by hand."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        """Get the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(autotuner.time, "perf_counter", clock)
+    return clock
+
+
+def tuner(max_parallel_requests: int = 2, window_ms: float = 4.0, max_batch_size: int = 8) -> ConcurrencyAutotuner:
+    """Build an autotuner over a real request queue and a stand-in batcher."""
+    batcher = SimpleNamespace(window_seconds=window_ms / 1000, max_batch_size=max_batch_size)
+    model_service = SimpleNamespace(batcher=batcher, memory_budget=None)
+    return ConcurrencyAutotuner(
+        model_service,
+        RequestQueue(max_parallel_requests),
+        latency_slo=5.0,
+        min_samples=10,
+        min_gain=0.05,
+        decrease_factor=0.5,
+        min_parallel_requests=1,
+        max_parallel_requests=16,
+        max_batch_window_ms=20.0,
+    )
+
+
+def interval(
+    tuning: ConcurrencyAutotuner, clock: Clock, tokens_per_second: float, latency: float = 1.0, waiting: int = 1
+) -> dict | None:
+    """Complete 10 requests over a 10 second interval, with requests waiting for a slot, and step."""
+    tuning.queue.waiting = waiting
+    for _ in range(10):
+        tuning.observe(latency, int(tokens_per_second))
+    clock.now += 10
+    return asyncio.run(tuning.step())
+
+
+def test_slo_breach_cuts_parallelism_and_batch_window(clock):
+    tuning = tuner(max_parallel_requests=8, window_ms=4.0)
+
+    decision = interval(tuning, clock, 100, latency=6.0)
+
+    assert (decision["action"], decision["parameter"]) == ("decrease", "all")
+    assert tuning.queue.max_parallel_requests == 4
+    assert tuning.batch_window_ms == pytest.approx(2.0)
+    assert not tuning.slow_start
+
+
+def test_slow_start_doubles_parallelism_while_it_pays_off(clock):
+    tuning = tuner(max_parallel_requests=2)
+
+    assert interval(tuning, clock, 100)["action"] == "increase"
+    assert tuning.queue.max_parallel_requests == 4
+    # The gain is kept, and the batch window is explored next
+    assert interval(tuning, clock, 150)["parameter"] == "batch_window_ms"
+    assert tuning.batch_window_ms == pytest.approx(6.0)
+    interval(tuning, clock, 200)
+    assert tuning.queue.max_parallel_requests == 8
+
+
+def test_adjustment_without_gain_is_reverted(clock):
+    tuning = tuner(max_parallel_requests=2)
+    interval(tuning, clock, 100)
+
+    decision = interval(tuning, clock, 102)
+
+    assert (decision["action"], decision["parameter"]) == ("revert", "max_parallel_requests")
+    assert tuning.queue.max_parallel_requests == 2
+    assert not tuning.slow_start
+    # After the revert, the batch window is explored, then the parallelism grows by one
+    assert interval(tuning, clock, 110)["parameter"] == "batch_window_ms"
+    assert interval(tuning, clock, 120)["parameter"] == "max_parallel_requests"
+    assert tuning.queue.max_parallel_requests == 3
+
+
+def test_reverted_batch_window_explores_the_other_way(clock):
+    tuning = tuner(window_ms=4.0)
+    tuning._next_parameter = 1
+
+    assert interval(tuning, clock, 100)["action"] == "increase"
+    assert tuning.batch_window_ms == pytest.approx(6.0)
+    assert interval(tuning, clock, 100)["action"] == "revert"
+    assert tuning.batch_window_ms == pytest.approx(4.0)
+    assert tuning.window_direction == -1
+
+
+def test_unsaturated_server_holds(clock):
+    tuning = tuner(max_parallel_requests=2)
+
+    decision = interval(tuning, clock, 100, waiting=0)
+
+    assert decision["action"] == "hold"
+    assert tuning.queue.max_parallel_requests == 2
+
+
+def test_unbatched_generation_holds(clock):
+    tuning = tuner(max_parallel_requests=2, window_ms=4.0, max_batch_size=1)
+
+    assert interval(tuning, clock, 100)["action"] == "hold"
+    assert interval(tuning, clock, 200)["action"] == "hold"
+    assert tuning.queue.max_parallel_requests == 2
+    assert tuning.batch_window_ms == pytest.approx(4.0)
+    # SLO breaches still cut the parallelism
+    assert interval(tuning, clock, 100, latency=6.0)["action"] == "decrease"
+    assert tuning.queue.max_parallel_requests == 1
+
+
+def test_interval_with_too_few_requests_is_ignored(clock):
+    tuning = tuner()
+    tuning.observe(1.0, 100)
+    clock.now += 10
+
+    assert asyncio.run(tuning.step()) is None
+
+
+def test_parallelism_stays_within_the_guard_rails(clock):
+    tuning = tuner(max_parallel_requests=12)
+
+    interval(tuning, clock, 100)
+
+    assert tuning.queue.max_parallel_requests == 16
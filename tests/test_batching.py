@@ -0,0 +1,65 @@
+"""Tests of the micro-batching of generation requests."""
+
+import asyncio
+import threading
+import time
+
+from app.services.backends import GenerationOutput, GenerationParams
+from app.services.batching import BatchScheduler
+
+
+class RecordingModel:
+    """Blocking generate function recording its batches and concurrent calls."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, prompts: list, params: GenerationParams, adapters: list | None) -> list[GenerationOutput]:
+        """Generate one token per prompt, its character code."""
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.batches.append(prompts)
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+        return [
+            GenerationOutput(token_ids=[[ord(prompt)]], input_tokens=1, prefill_seconds=0.0, decode_seconds=0.01)
+            for prompt in prompts
+        ]
+
+
+def params(temperature: float = 0.7) -> GenerationParams:
+    """Build decoding parameters differing by temperature."""
+    return GenerationParams(
+        max_new_tokens=16, temperature=temperature, top_p=1.0, top_k=0, do_sample=True, repetition_penalty=1.0
+    )
+
+
+def test_concurrent_requests_share_a_batch():
+    model = RecordingModel()
+
+    async def run():
+        scheduler = BatchScheduler(model, mixed_adapters=False, max_batch_size=2, window_ms=50)
+        return await asyncio.gather(*(scheduler.submit(prompt, params()) for prompt in ["a", "b", "c"]))
+
+    outputs = asyncio.run(run())
+
+    assert [output.token_ids for output in outputs] == [[[ord("a")]], [[ord("b")]], [[ord("c")]]]
+    assert model.batches == [["a", "b"], ["c"]]
+
+
+def test_batches_are_generated_one_at_a_time():
+    model = RecordingModel()
+
+    async def run():
+        scheduler = BatchScheduler(model, mixed_adapters=False, max_batch_size=1, window_ms=0)
+        await asyncio.gather(*(scheduler.submit(str(i), params(0.1 * (i + 1))) for i in range(6)))
+
+    asyncio.run(run())
+
+    assert len(model.batches) == 6
+    assert model.max_running == 1
@@ -0,0 +1,57 @@
+"""Tests of the compiled inference mode's handling of prompt shapes."""
+
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from app.services import compilation
+from app.services.compilation import CompiledGenerator
+
+
+class RecordingModel:
+    """Causal LM stand-in recording the forward and KV cache each generate call runs with."""
+
+    def __init__(self) -> None:
+        self.config = SimpleNamespace()
+        self.device = torch.device("cpu")
+        self.dtype = torch.float32
+        self.calls: list[tuple] = []
+
+    def forward(self, input_ids: torch.Tensor) -> torch.Tensor:
+        """Return the inputs unchanged."""
+        return input_ids
+
+    def generate(self, input_ids: torch.Tensor, past_key_values=None, **kwargs) -> torch.Tensor:
+        """Record the forward in use instead of generating."""
+        self.calls.append((self.forward, past_key_values))
+        return input_ids
+
+
+@pytest.fixture
+def generator(monkeypatch: pytest.MonkeyPatch) -> CompiledGenerator:
+    monkeypatch.setattr(compilation, "configure_compile_cache", lambda: None)
+    monkeypatch.setattr(compilation, "StaticCache", lambda **kwargs: SimpleNamespace(reset=lambda: None))
+    return CompiledGenerator(RecordingModel(), buckets=[8, 16])
+
+
+def test_bucketed_prompts_use_the_compiled_forward_and_a_static_cache(generator):
+    compiled_forward = generator.model.forward
+
+    generator.generate(torch.ones((1, 5), dtype=torch.long), pad_token_id=0, max_new_tokens=4)
+
+    forward, cache = generator.model.calls[-1]
+    assert forward is compiled_forward
+    assert cache is not None
+
+
+def test_generations_beyond_the_static_cache_use_the_eager_forward(generator):
+    compiled_forward = generator.model.forward
+
+    generator.generate(torch.ones((1, 40), dtype=torch.long), pad_token_id=0, max_new_tokens=1000)
+
+    forward, cache = generator.model.calls[-1]
+    assert forward == generator._eager_forward
+    assert cache is None
+    # The compiled forward is back for the next prompts
+    assert generator.model.forward is compiled_forward
@@ -0,0 +1,111 @@
+"""Tests of the load-shedding quality ladder."""
+
+import pytest
+
+from app.services import degradation
+from app.services.degradation import DegradationPolicy, approximate_cache_key, quality_ladder
+
+
+class Clock:
+    """Monotonic clock advanced by hand."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        """Get the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(degradation.time, "monotonic", clock)
+    return clock
+
+
+def policy() -> DegradationPolicy:
+    """Build a policy driven by the queue depth only, with a 10 second cooldown."""
+    return DegradationPolicy(
+        queue_thresholds=[2, 4, 6, 8], latency_thresholds=[1e9] * 4, latency_window=10, cooldown_seconds=10.0
+    )
+
+
+def test_levels_apply_their_reductions():
+    levels = quality_ladder(reduced_beams=2, max_new_tokens_factor=0.5)
+
+    assert levels[0].apply(100, True, 4) == (100, True, 4)
+    assert levels[1].apply(100, True, 4) == (100, True, 2)
+    assert levels[2].apply(100, True, 4) == (100, False, 1)
+    assert levels[3].apply(100, True, 4) == (50, False, 1)
+    assert levels[4].approximate_cache
+
+
+def test_level_rises_at_once(clock):
+    shedding = policy()
+
+    assert shedding.update(5).name == "greedy"
+    assert shedding.update(9).name == "approximate_cache"
+
+
+def test_level_falls_one_level_per_cooldown(clock):
+    shedding = policy()
+    shedding.update(9)
+
+    assert shedding.update(0).level == 4
+    clock.now += 9
+    assert shedding.update(0).level == 4
+    clock.now += 1
+    assert shedding.update(0).level == 3
+    clock.now += 10
+    assert shedding.update(0).level == 2
+
+
+def test_quiet_period_drops_several_levels(clock):
+    shedding = policy()
+    shedding.update(9)
+    shedding.update(0)
+
+    # A single request after 35 quiet seconds drops three levels
+    clock.now += 35
+    assert shedding.update(0).level == 1
+    # The remaining 5 seconds count toward the next step
+    clock.now += 5
+    assert shedding.update(0).level == 0
+
+
+def test_level_does_not_fall_below_the_pressure(clock):
+    shedding = policy()
+    shedding.update(9)
+    shedding.update(4)
+
+    clock.now += 100
+    assert shedding.update(4).name == "greedy"
+
+
+def test_pressure_resets_the_cooldown(clock):
+    shedding = policy()
+    shedding.update(5)
+    shedding.update(0)
+
+    clock.now += 9
+    shedding.update(5)
+    clock.now += 9
+    assert shedding.update(0).level == 2
+
+
+def test_latency_raises_the_level(clock):
+    shedding = DegradationPolicy(
+        queue_thresholds=[100] * 4, latency_thresholds=[1.0, 2.0, 3.0, 4.0], latency_window=10, cooldown_seconds=10.0
+    )
+    for seconds in [2.5] * 10:
+        shedding.observe_latency(seconds)
+
+    assert shedding.update(0).name == "greedy"
+
+
+def test_approximate_cache_key_ignores_order_case_and_punctuation():
+    assert approximate_cache_key("Fresh coffee, every morning!", "casual") == approximate_cache_key(
+        "every MORNING fresh coffee", "casual"
+    )
+    assert approximate_cache_key("Fresh coffee", "casual") != approximate_cache_key("Fresh coffee", "formal")
@@ -0,0 +1,60 @@
+"""Tests of the background canary inference of the health service."""
+
+import asyncio
+
+from app.services.health_service import HealthService
+
+
+class CanaryModel:
+    """Stand-in model service whose canary takes a given time, with or without queued work."""
+
+    def __init__(self, seconds: float, backlog: bool = False) -> None:
+        self.seconds = seconds
+        self.backlog = backlog
+
+    async def run_canary(self, text: str, max_new_tokens: int) -> int:
+        """Generate the canary tokens after a delay."""
+        await asyncio.sleep(self.seconds)
+        return max_new_tokens
+
+    def has_backlog(self) -> bool:
+        """Whether generations are queued behind other work."""
+        return self.backlog
+
+
+def test_fast_canary_is_healthy():
+    health = HealthService(CanaryModel(0.0), timeout=1.0)
+
+    result = asyncio.run(health.run_canary())
+
+    assert result.ok
+    assert health.status()["status"] == "healthy"
+
+
+def test_canary_timing_out_behind_queued_work_is_degraded():
+    health = HealthService(CanaryModel(1.0, backlog=True), timeout=0.01)
+
+    result = asyncio.run(health.run_canary())
+
+    assert not result.ok
+    assert result.busy
+    assert health.status()["status"] == "degraded"
+
+
+def test_canary_timing_out_on_an_idle_replica_is_unhealthy():
+    health = HealthService(CanaryModel(1.0), timeout=0.01)
+
+    result = asyncio.run(health.run_canary())
+
+    assert not result.busy
+    assert health.status()["status"] == "unhealthy"
+
+
+def test_canary_stays_out_of_the_request_statistics(model_service):
+    health = HealthService(model_service, timeout=5.0)
+    predictor_keys = len(model_service.length_predictor.stats())
+
+    result = asyncio.run(health.run_canary())
+
+    assert result.ok
+    assert len(model_service.length_predictor.stats()) == predictor_keys
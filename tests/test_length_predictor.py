@@ -0,0 +1,60 @@
+"""Tests of the output length predictor."""
+
+from app.services.length_predictor import OutputLengthPredictor, prompt_length_bucket
+
+LABELS = {"tone": "professional", "profile": "greedy"}
+
+
+def observe(predictor: OutputLengthPredictor, lengths: list[int], predicted: int = 200, requested: int = 200) -> None:
+    """Record completions of 20-token prompts."""
+    for length in lengths:
+        predictor.observe(LABELS, 20, length, predicted, requested)
+
+
+def test_prompt_length_bucket():
+    assert prompt_length_bucket(1) == 32
+    assert prompt_length_bucket(32) == 32
+    assert prompt_length_bucket(33) == 64
+    assert prompt_length_bucket(5000) == 0
+
+
+def test_requested_limit_until_enough_samples():
+    predictor = OutputLengthPredictor(min_samples=10)
+    observe(predictor, [40] * 9)
+
+    assert predictor.predict("professional", 20, 200) == 200
+
+
+def test_prediction_is_the_rounded_percentile_with_margin():
+    predictor = OutputLengthPredictor(min_samples=10, percentile=90, margin=1.25)
+    observe(predictor, list(range(31, 51)))
+
+    # p90 of 31..50 is 48, times 1.25 is 60, rounded up to a multiple of 16
+    assert predictor.predict("professional", 20, 200) == 64
+    assert predictor.predict("professional", 20, 50) == 50
+
+
+def test_predictions_are_per_tone_and_prompt_bucket():
+    predictor = OutputLengthPredictor(min_samples=5)
+    observe(predictor, [40] * 5)
+
+    assert predictor.predict("casual", 20, 200) == 200
+    assert predictor.predict("professional", 100, 200) == 200
+
+
+def test_truncated_completions_raise_the_prediction():
+    predictor = OutputLengthPredictor(min_samples=5, percentile=100, margin=1.0)
+    observe(predictor, [32] * 5)
+    assert predictor.predict("professional", 20, 200) == 32
+
+    # Cut by the predicted cap: recorded as twice the cap
+    observe(predictor, [32], predicted=32)
+
+    assert predictor.predict("professional", 20, 200) == 64
+
+
+def test_completions_cut_by_the_client_limit_are_ignored():
+    predictor = OutputLengthPredictor(min_samples=1)
+    observe(predictor, [16], predicted=16, requested=16)
+
+    assert predictor.stats() == {}
@@ -0,0 +1,85 @@
+"""Tests of the KV cache memory budget."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.memory_budget import MemoryBudget, MemoryBudgetExceededError, kv_cache_bytes_per_token
+
+
+def budget(max_tokens: int, admission_timeout: float = 1.0, reference_request_tokens: int = 100) -> MemoryBudget:
+    """Build a budget of the given number of tokens, one byte each."""
+    return MemoryBudget(
+        bytes_per_token=1,
+        available_bytes=max_tokens,
+        headroom=0.0,
+        admission_timeout=admission_timeout,
+        reference_request_tokens=reference_request_tokens,
+    )
+
+
+def test_kv_cache_bytes_per_token():
+    config = SimpleNamespace(num_attention_heads=8, num_key_value_heads=2, hidden_size=512, num_hidden_layers=4)
+
+    # Keys and values, 4 layers, 2 KV heads of 64 dimensions, 2 bytes each
+    assert kv_cache_bytes_per_token(config, 2) == 2 * 4 * 2 * 64 * 2
+
+
+def test_kv_cache_bytes_per_token_reads_the_text_config():
+    text_config = SimpleNamespace(num_attention_heads=4, head_dim=32, num_hidden_layers=2)
+
+    assert kv_cache_bytes_per_token(SimpleNamespace(text_config=text_config), 4) == 2 * 2 * 4 * 32 * 4
+
+
+def test_headroom_and_safe_concurrency():
+    memory = MemoryBudget(bytes_per_token=10, available_bytes=10_000, headroom=0.2, reference_request_tokens=100)
+
+    assert memory.max_tokens == 800
+    assert memory.safe_concurrency() == 8
+    assert memory.safe_concurrency(num_beams=4) == 2
+    assert memory.safe_concurrency(num_beams=100) == 1
+    assert MemoryBudget.request_tokens(30, 70, num_beams=3) == 300
+
+
+def test_request_larger_than_the_budget_is_refused():
+    async def run():
+        async with budget(100).reserve(101):
+            pass
+
+    with pytest.raises(MemoryBudgetExceededError):
+        asyncio.run(run())
+
+
+def test_request_waits_for_memory_to_be_released():
+    memory = budget(100)
+    events = []
+
+    async def hold(name: str, tokens: int, seconds: float) -> None:
+        async with memory.reserve(tokens) as waited:
+            events.append((name, waited >= 0.04))
+            await asyncio.sleep(seconds)
+
+    async def run():
+        first = asyncio.create_task(hold("first", 80, 0.05))
+        await asyncio.sleep(0)
+        await asyncio.gather(first, hold("second", 40, 0))
+
+    asyncio.run(run())
+
+    assert events == [("first", False), ("second", True)]
+    assert memory.reserved_tokens == 0
+    assert memory.waiting == 0
+
+
+def test_admission_timeout():
+    memory = budget(100, admission_timeout=0.01)
+
+    async def run():
+        async with memory.reserve(100):
+            async with memory.reserve(1):
+                pass
+
+    with pytest.raises(MemoryBudgetExceededError):
+        asyncio.run(run())
+    assert memory.reserved_tokens == 0
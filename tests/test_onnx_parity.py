@@ -0,0 +1,47 @@
+"""Greedy parity of the ONNX Runtime generator with transformers.
+
+Runs against the export in ``ONNX_MODEL_DIR`` (``make export-onnx``) and the
+model it was exported from, ``ONNX_PARITY_MODEL`` or the served model.
+"""
+
+import os
+
+import pytest
+import torch
+
+from app.core.config import get_settings
+from benchmarks.compile_benchmark import PROMPTS, encode
+
+pytest.importorskip("onnxruntime")
+
+settings = get_settings()
+
+if not os.path.exists(os.path.join(settings.ONNX_MODEL_DIR, "model.onnx")):
+    pytest.skip(f"No ONNX export in {settings.ONNX_MODEL_DIR}", allow_module_level=True)
+
+GENERATE_KWARGS = {"max_new_tokens": 32, "do_sample": False, "repetition_penalty": 1.1}
+
+
+@pytest.fixture(scope="module")
+def models():
+    from transformers import AutoModelForCausalLM, AutoTokenizer  # type: ignore
+
+    from app.services.onnx_generator import OnnxGenerator
+
+    model_name = os.environ.get("ONNX_PARITY_MODEL", settings.SERVED_MODEL)
+    tokenizer = AutoTokenizer.from_pretrained(settings.ONNX_MODEL_DIR)
+    model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32).eval()
+    return tokenizer, model, OnnxGenerator(settings.ONNX_MODEL_DIR)
+
+
+@pytest.mark.parametrize("prompt", PROMPTS)
+def test_greedy_tokens_match_transformers(models, prompt):
+    tokenizer, model, onnx_generator = models
+    input_ids = encode(tokenizer, prompt)
+    attention_mask = torch.ones_like(input_ids)
+
+    with torch.no_grad():
+        expected = model.generate(input_ids, attention_mask=attention_mask, num_beams=1, **GENERATE_KWARGS)
+    actual = onnx_generator.generate(input_ids, attention_mask, **GENERATE_KWARGS)
+
+    assert actual[0].tolist() == expected[0].tolist()
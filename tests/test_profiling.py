@@ -0,0 +1,40 @@
+"""Tests of the on-demand profiler capture."""
+
+import contextvars
+import threading
+
+from app.core.profiling import ProfilerManager
+
+
+def busy_generation() -> int:
+    """Stand-in for a generate call."""
+    return sum(index * index for index in range(10_000))
+
+
+def busy_event_loop() -> int:
+    """Stand-in for the coroutines of concurrent requests."""
+    return sum(range(10_000))
+
+
+def test_capture_profiles_the_generation_thread_only(tmp_path):
+    profiler = ProfilerManager(profile_dir=str(tmp_path))
+    profiler.arm(requests=1)
+
+    with profiler.capture_request():
+        busy_event_loop()
+        # The generation thread runs with the request's context, like the batch scheduler's worker
+        context = contextvars.copy_context()
+
+        def generate() -> None:
+            with profiler.profile_model():
+                busy_generation()
+
+        worker = threading.Thread(target=context.run, args=(generate,))
+        worker.start()
+        worker.join()
+
+    status = profiler.status()
+    assert not status["armed"]
+    summary = open(status["last_summary"], encoding="utf-8").read()
+    assert "busy_generation" in summary
+    assert "busy_event_loop" not in summary
@@ -0,0 +1,35 @@
+"""Tests of the prompt building and the memoized prompt tokenization."""
+
+import torch
+
+from app.api.schemas import Tone
+from app.services.prompt_cache import PromptTokenCache, build_prompt
+
+
+class CharTokenizer:
+    """Tokenizer stand-in with one id per character and a minimal chat template."""
+
+    def __call__(self, text: str, add_special_tokens: bool = False) -> dict:
+        """Tokenize a string into character codes."""
+        return {"input_ids": [ord(char) for char in text]}
+
+    def apply_chat_template(self, messages: list, tokenize: bool, add_generation_prompt: bool) -> str:
+        """Render the user message between turn markers."""
+        return f"<user>{messages[0]['content'][0]['text']}</user><model>"
+
+
+def test_prompt_renders_the_tone_value():
+    assert build_prompt("a tent", Tone.CASUAL) == "Create an ad copy in a casual tone for the following:\n\na tent"
+    assert build_prompt("a tent", "casual") == build_prompt("a tent", Tone.CASUAL)
+    assert build_prompt("a tent") == "Create an ad copy for the following:\n\na tent"
+
+
+def test_cache_entries_are_keyed_by_the_rendered_tone():
+    cache = PromptTokenCache(CharTokenizer(), torch.device("cpu"))
+
+    enum_ids = cache.input_ids("a tent", Tone.CASUAL)
+    string_ids = cache.input_ids("a tent", "casual")
+
+    assert cache.stats()["hits"] == 1
+    assert torch.equal(enum_ids, string_ids)
+    assert enum_ids[0].tolist() == [ord(char) for char in f"<user>{build_prompt('a tent', 'casual')}</user><model>"]
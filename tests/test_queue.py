@@ -0,0 +1,81 @@
+"""Tests of the request queue."""
+
+import asyncio
+
+from app.core.queue import RequestQueue
+
+
+def test_queue_depth_counts_requests_waiting_for_a_slot():
+    queue = RequestQueue(max_parallel_requests=2)
+    release = asyncio.Event()
+    depths = []
+
+    async def handler() -> None:
+        await release.wait()
+
+    async def submit() -> None:
+        async with queue.request(handler):
+            pass
+
+    async def run():
+        tasks = [asyncio.create_task(submit()) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        depths.append((queue.current_requests, queue.waiting))
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    assert depths == [(2, 3)]
+    assert queue.waiting == 0
+    assert queue.current_requests == 0
+
+
+def test_raising_the_limit_admits_waiting_requests():
+    queue = RequestQueue(max_parallel_requests=1)
+    release = asyncio.Event()
+
+    async def handler() -> None:
+        await release.wait()
+
+    async def submit() -> None:
+        async with queue.request(handler):
+            pass
+
+    async def run():
+        tasks = [asyncio.create_task(submit()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        before = (queue.current_requests, queue.waiting)
+        await queue.set_max_parallel_requests(3)
+        await asyncio.sleep(0.01)
+        after = (queue.current_requests, queue.waiting)
+        release.set()
+        await asyncio.gather(*tasks)
+        return before, after
+
+    assert asyncio.run(run()) == ((1, 2), (3, 0))
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    queue = RequestQueue(max_parallel_requests=1)
+    release = asyncio.Event()
+
+    async def handler() -> None:
+        await release.wait()
+
+    async def submit() -> None:
+        async with queue.request(handler):
+            pass
+
+    async def run():
+        first = asyncio.create_task(submit())
+        second = asyncio.create_task(submit())
+        await asyncio.sleep(0.01)
+        second.cancel()
+        await asyncio.sleep(0.01)
+        waiting = queue.waiting
+        release.set()
+        await first
+        return waiting
+
+    assert asyncio.run(run()) == 0
@@ -0,0 +1,51 @@
+"""Tests of the candidate reranker."""
+
+import pytest
+
+from app.services.reranker import CandidateReranker, format_score, length_score, word_overlap
+
+
+def test_format_score():
+    assert format_score("") == 0.0
+    assert format_score("Fresh coffee, every morning.") == 1.0
+    assert format_score("Fresh coffee.\n#Coffee #Morning") == 1.0
+    assert format_score("Fresh coffee, every") == 0.5
+    assert format_score("Buy now.\nBuy now.") == 0.75
+
+
+def test_length_score():
+    assert length_score(40, 40) == 0.0
+    assert length_score(10, 40) < length_score(30, 40) < 0
+    assert length_score(160, 40) < length_score(50, 40) < 0
+    assert length_score(5, 0) == 0.0
+
+
+def test_word_overlap():
+    assert word_overlap({"a", "b"}, {"a", "b"}) == 1.0
+    assert word_overlap({"a", "b"}, {"b", "c"}) == pytest.approx(1 / 3)
+    assert word_overlap(set(), set()) == 1.0
+
+
+def test_rank_prefers_likely_complete_candidates():
+    reranker = CandidateReranker(length_weight=0.0, diversity_penalty=0.0)
+
+    ranked = reranker.rank(["Bold new style", "Bold new style.", "Fresh deals today."], logprobs=[-0.5, -2.0, -0.5])
+
+    assert [candidate.text for candidate in ranked] == ["Fresh deals today.", "Bold new style", "Bold new style."]
+    assert [candidate.score for candidate in ranked] == sorted((candidate.score for candidate in ranked), reverse=True)
+
+
+def test_near_duplicates_sink():
+    reranker = CandidateReranker(likelihood_weight=0.0, length_weight=0.0, diversity_penalty=1.0)
+
+    ranked = reranker.rank(["Shop the sale now.", "Shop the sale now!", "Fresh coffee every morning."])
+
+    assert [candidate.text for candidate in ranked][:2] == ["Shop the sale now.", "Fresh coffee every morning."]
+    assert ranked[0].overlap == 0.0
+    assert ranked[2].overlap == 1.0
+
+
+def test_rank_without_logprobs():
+    ranked = CandidateReranker().rank(["One.", "Two."])
+
+    assert all(candidate.likelihood == 0.0 for candidate in ranked)
@@ -0,0 +1,49 @@
+"""Tests of the request router against the real replica application."""
+
+import asyncio
+
+import httpx
+
+from app.api.schemas import CompletionRequest
+from app.core.queue import init_queue
+from app.main import app
+from app.router import ReplicaRouter
+from app.services.replica_pool import ReplicaPool
+
+REPLICA_URL = "http://replica-0"
+
+
+def test_router_observes_the_requests_queued_on_a_replica(model_service, monkeypatch):
+    # Slow enough generation for requests to wait behind the single slot
+    monkeypatch.setattr(model_service.backend, "decode_seconds_per_token", 0.005)
+    pool = ReplicaPool([REPLICA_URL], policy="power_of_two", affinity=False)
+
+    async def run() -> list[tuple[int, int]]:
+        # A queue of the test's event loop, admitting one request at a time
+        init_queue(1)
+        reports = []
+        async with httpx.AsyncClient(mounts={REPLICA_URL: httpx.ASGITransport(app=app)}) as client:
+            router = ReplicaRouter(pool, client, retries=0, health_interval=0, health_timeout=1.0)
+            requests = [CompletionRequest(text=f"a sturdy camping tent, model {index}") for index in range(4)]
+            for completion in asyncio.as_completed([router.complete(request) for request in requests]):
+                replica, response = await completion
+                assert response.status_code == 200
+                reports.append((int(response.headers["X-Queue-Size"]), replica.queue_size))
+        return reports
+
+    reports = asyncio.run(run())
+
+    # The replica's response headers carry its waiting requests, and the pool records them
+    assert max(queue_size for queue_size, _ in reports) >= 2
+    assert all(queue_size == observed for queue_size, observed in reports)
+    assert reports[-1] == (0, 0)
+
+
+def test_power_of_two_prefers_the_shorter_reported_queue():
+    pool = ReplicaPool(["http://busy", "http://idle"], policy="power_of_two", affinity=False)
+    busy, idle = pool.replicas
+    pool.observe(busy, {"x-queue-size": "3", "x-active-requests": "1"})
+    pool.observe(idle, {"x-queue-size": "0", "x-active-requests": "1"})
+
+    assert busy.queue_depth == 4
+    assert all(pool.choose() is idle for _ in range(10))
@@ -0,0 +1,72 @@
+"""Tests of the ad-aware early stopping rules."""
+
+import torch
+
+from app.services.stopping import AdStoppingCriteria, AdStopRules, newline_token_ids
+
+
+class WordTokenizer:
+    """Tokenizer with one token per vocabulary entry, decoded by concatenation."""
+
+    def __init__(self, vocabulary: list[str]) -> None:
+        self.vocabulary = vocabulary
+
+    def get_vocab(self) -> dict[str, int]:
+        """Get the token -> id mapping."""
+        return {token: token_id for token_id, token in enumerate(self.vocabulary)}
+
+    def decode(self, ids: torch.Tensor, skip_special_tokens: bool = True) -> str:
+        """Concatenate the tokens of the ids."""
+        return "".join(self.vocabulary[token_id] for token_id in ids.tolist())
+
+
+def test_hashtag_line_ends_the_ad():
+    rules = AdStopRules()
+
+    assert rules.stop_reason("Fresh coffee, every morning.\n#Coffee #Morning\n") == "hashtags"
+    assert rules.stop_reason("Fresh coffee, every morning.\n#Coffee #Morning") is None
+    assert AdStopRules(hashtag_line=False).stop_reason("Fresh coffee.\n#Coffee\n") is None
+
+
+def test_mixed_line_is_not_a_hashtag_line():
+    assert AdStopRules().stop_reason("Try #Coffee today\n") is None
+
+
+def test_call_to_action_marker_is_case_insensitive():
+    rules = AdStopRules(hashtag_line=False, cta_markers=("shop now",))
+
+    assert rules.stop_reason("Bold new style.\nSHOP NOW and save!\n") == "cta"
+    assert rules.stop_reason("Bold new style.\n") is None
+
+
+def test_blank_lines_only_stop_after_the_body():
+    rules = AdStopRules(hashtag_line=False, max_blank_lines=2)
+
+    assert rules.stop_reason("\n\n\n") is None
+    assert rules.stop_reason("Bold new style.\n\n\n") == "blank_lines"
+    assert rules.stop_reason("Bold new style.\n\n") is None
+
+
+def test_paragraph_count():
+    rules = AdStopRules(hashtag_line=False, max_paragraphs=2)
+
+    assert rules.stop_reason("First.\n\nSecond.\n") is None
+    assert rules.stop_reason("First.\n\nSecond.\n\n") == "paragraphs"
+
+
+def test_criteria_stop_rows_completing_a_matching_line():
+    tokenizer = WordTokenizer(["<pad>", "Buy", " now", "\n", "#Deal"])
+    criteria = AdStoppingCriteria(tokenizer, AdStopRules(), newline_token_ids(tokenizer))
+    prompt = [0, 0]
+
+    # First call: the prompt plus one new token
+    criteria(torch.tensor([prompt + [1], prompt + [4]]), torch.zeros(2, 5))
+    done = criteria(torch.tensor([prompt + [1, 3], prompt + [4, 3]]), torch.zeros(2, 5))
+
+    assert done.tolist() == [False, True]
+
+
+def test_newline_token_ids_cover_byte_level_spellings():
+    tokenizer = WordTokenizer(["a", "\n", "Ċ", "ĊĊ", "<0x0A>", "b"])
+
+    assert newline_token_ids(tokenizer).tolist() == [1, 2, 3, 4]
@@ -0,0 +1,41 @@
+"""Tests of the CPU threading plan."""
+
+import pytest
+
+from app.core.thread_plan import apply_thread_plan, plan_threads
+
+# Four physical cores with two SMT siblings each
+CORES = [[0, 4], [1, 5], [2, 6], [3, 7]]
+
+
+def test_workers_split_whole_cores():
+    plans = [plan_threads(3, index, CORES) for index in range(3)]
+
+    assert [plan.cpus for plan in plans] == [[0, 1, 4, 5], [2, 6], [3, 7]]
+    assert [plan.physical_cores for plan in plans] == [2, 1, 1]
+    assert all(plan.inter_op_threads == 1 for plan in plans)
+
+
+def test_more_workers_than_cores_share_them():
+    plan = plan_threads(6, 5, CORES)
+
+    assert plan.cpus == [1, 5]
+    assert plan.intra_op_threads == 1
+    assert plan.tokenizer_threads == 1
+
+
+def test_cpu_quota_limits_the_cores():
+    plan = plan_threads(1, 0, CORES, cpu_limit=2.5)
+
+    assert plan.cpus == [0, 1, 4, 5]
+    assert plan.intra_op_threads == 2
+
+
+def test_apply_without_torch(monkeypatch: pytest.MonkeyPatch):
+    for variable in ("RAYON_NUM_THREADS", "RAYON_RS_NUM_CPUS", "TOKENIZERS_PARALLELISM"):
+        monkeypatch.setenv(variable, "")
+
+    plan = apply_thread_plan(plan_threads(1, 0, CORES), torch_threads=False)
+
+    assert plan.applied["tokenizers_parallelism"] == "true"
+    assert "torch_intra_op_threads" not in plan.applied